@@ -15,6 +15,7 @@ from gi.repository import GdkPixbuf
 from gi.repository import Pango
 from mosaicode.system import System as System
 from mosaicode.GUI.blockmenu import BlockMenu
+from mosaicode.GUI.connector import SELECTED_DASH, NORMAL_DASH
 from mosaicode.model.plugin import Plugin
 
 WIDTH_DEFAULT = 112
@@ -68,18 +69,28 @@ class Block(GooCanvas.CanvasGroup, Plugin):
                 * **Types** (:class:`boolean<boolean>`)
                 Indicates the button is pressed.
             """
+        # A new drag starts a new undo entry
+        self.diagram.history.close()
+
+        selected = set(self.diagram.current_widgets)
         # with Shift
         if event.state == Gdk.ModifierType.SHIFT_MASK \
                 | Gdk.ModifierType.MOD2_MASK:
             if self in self.diagram.current_widgets:
                 self.diagram.current_widgets.remove(self)
             else:
-                self.diagram.current_widgets.append(self)
+                self.diagram.current_widgets.add(self)
 
         else:
             if self not in self.diagram.current_widgets:
-                self.diagram.current_widgets = []
-                self.diagram.current_widgets.append(self)
+                self.diagram.current_widgets = set([self])
+
+        # Only the block and the widgets that entered or left the
+        # selection change
+        changed = selected.symmetric_difference(self.diagram.current_widgets)
+        changed.add(self)
+        for widget in changed:
+            self.diagram.mark_dirty(widget)
 
         self.diagram.show_block_property(self)
 
@@ -92,8 +103,6 @@ class Block(GooCanvas.CanvasGroup, Plugin):
             BlockMenu(self, event)
             return True
 
-        self.diagram.update_flows()
-
         return True
 
     # ----------------------------------------------------------------------
@@ -457,8 +466,15 @@ class Block(GooCanvas.CanvasGroup, Plugin):
             Parameters:
                 * **data**
         """
-        self.diagram.do("Set block property")
+        old_values = {}
+        for prop in self.get_properties():
+            old_values[prop["name"]] = prop["value"]
         Plugin.set_properties(self, data)
+        new_values = {}
+        for prop in self.get_properties():
+            new_values[prop["name"]] = prop["value"]
+        self.diagram.do("Set block property",
+                        ("properties", self, old_values, new_values))
 
     # ----------------------------------------------------------------------
     def get_properties(self):
@@ -479,14 +495,10 @@ class Block(GooCanvas.CanvasGroup, Plugin):
                 * **Types** (:class:`boolean<boolean>`)
         """
         self.has_flow = True
-        distinct_con = []
-        for conn in self.diagram.connectors:
-            if conn.sink != self:
-                continue
-            if conn.sink_port not in distinct_con:
-                distinct_con.append(conn.sink_port)
-        if len(distinct_con) < len(self.in_ports):
-            self.has_flow = False
+        for port in range(len(self.in_ports)):
+            if not self.diagram.get_input_connections(self, port):
+                self.has_flow = False
+                break
         self.__update_state()
         return self.has_flow
 
@@ -510,10 +522,10 @@ class Block(GooCanvas.CanvasGroup, Plugin):
         # selected: Line = dashed
         if self in self.diagram.current_widgets:
             self.widgets["Rect"].set_property(
-                "line_dash", GooCanvas.CanvasLineDash.newv((4.0, 2.0)))
+                "line_dash", SELECTED_DASH)
         else:
             self.widgets["Rect"].set_property(
-                "line_dash", GooCanvas.CanvasLineDash.newv((10.0, 0.0)))
+                "line_dash", NORMAL_DASH)
 
     # ----------------------------------------------------------------------
     def __get_port_label(self, port_type):
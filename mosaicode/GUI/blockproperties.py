@@ -63,4 +63,14 @@ class BlockProperties(Gtk.Notebook):
         self.help.get_buffer().set_text(block.help)
         self.property_box.set_block(block)
 
+# ----------------------------------------------------------------------
+    def get_block(self):
+        """
+        This method returns the block whose properties are shown.
+
+            Returns:
+            * **Types** (:class:`block<mosaicode.GUI.block>`)
+        """
+        return self.property_box.block
+
 # ----------------------------------------------------------------------
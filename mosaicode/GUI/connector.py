@@ -10,10 +10,14 @@ from gi.repository import Gtk
 from gi.repository import GooCanvas
 from connectormenu import ConnectorMenu
 
-from mosaicode.model.connectionmodel import ConnectionModel
 from mosaicode.system import System as System
+from mosaicode.utils.GeometryUtils import get_path
 
-class Connector(GooCanvas.CanvasGroup, ConnectionModel):
+# Shared by all connectors
+SELECTED_DASH = GooCanvas.CanvasLineDash.newv((4.0, 2.0))
+NORMAL_DASH = GooCanvas.CanvasLineDash.newv((10.0, 0.0))
+
+class Connector(GooCanvas.CanvasGroup):
     """
     This class contains the methods related to Connector class.
     """
@@ -25,12 +29,19 @@ class Connector(GooCanvas.CanvasGroup, ConnectionModel):
         This method is the constructor.
         """
         GooCanvas.CanvasGroup.__init__(self)
-        ConnectionModel.__init__(self, diagram, source, source_port, conn_type)
+        # The attributes of ConnectionModel
+        self.source = source
+        self.source_port = source_port
+        self.conn_type = conn_type
+        self.sink = None
+        self.sink_port = -1
+        self.diagram = diagram
 
         self.__from_point = self.source.get_output_pos(self.source_port)
         self.__to_point = (0, 0)
 
         self.__focus = False
+        self.__state = None  # (focus, selected) last drawn
         self.width = 0
         self.height = 0
 
@@ -58,12 +69,16 @@ class Connector(GooCanvas.CanvasGroup, ConnectionModel):
         if event.button.button == 3:
             ConnectorMenu(self, event)
 
+        selected = set(self.diagram.current_widgets)
         if self in self.diagram.current_widgets:
-            self.diagram.current_widgets = []
+            self.diagram.current_widgets = set()
         else:
-            self.diagram.current_widgets.append(self)
+            self.diagram.current_widgets.add(self)
 
-        self.diagram.update_flows()
+        # Only the widgets that entered or left the selection change
+        changed = selected.symmetric_difference(self.diagram.current_widgets)
+        for widget in changed:
+            self.diagram.mark_dirty(widget)
         return True
 
     # ----------------------------------------------------------------------
@@ -100,9 +115,8 @@ class Connector(GooCanvas.CanvasGroup, ConnectionModel):
         else:
             b += 1
 
-        self.__to_point = self.__from_point[
-            0] + a - 5, self.__from_point[1] + b
-        self.__update_draw()
+        to_point = self.__from_point[0] + a - 5, self.__from_point[1] + b
+        self.set_points(self.__from_point, to_point)
 
     # ----------------------------------------------------------------------
     def update_flow(self):
@@ -110,38 +124,58 @@ class Connector(GooCanvas.CanvasGroup, ConnectionModel):
         This method update the flow.
 
         """
-        self.__from_point = self.source.get_output_pos(self.source_port)
-        self.__to_point = self.sink.get_input_pos(self.sink_port)
-        self.__update_draw()
+        from_point, to_point = self.get_flow_points()
+        self.set_points(from_point, to_point)
 
     # ----------------------------------------------------------------------
-    def __update_draw(self):
+    def get_flow_points(self):
         """
-        This method update draw.
+        This method returns the positions of the output and input ports.
+
+            Returns:
+                * **Types** (:class:`tuple<tuple>`): from and to points.
         """
-        # svg M L bezier curve
-        path = ""
-        x0 = self.__from_point[0]
-        y0 = self.__from_point[1]
-        x1 = self.__to_point[0]
-        y1 = self.__to_point[1]
+        return (self.source.get_output_pos(self.source_port),
+                self.sink.get_input_pos(self.sink_port))
 
-        path += "M " + str(x0) + " " + str(y0)
+    # ----------------------------------------------------------------------
+    def get_points(self):
+        """
+        This method returns the ends of the connector as last drawn.
 
-        path += " L " + str(x0 + 25) + " " + str(y0)
-        path += " L " + str(x0 + 25) + " " + str((y0 + y1) / 2)
-        if x1 < x0 + 50:
-            path += " L " + str((x1 + x0) / 2) + " " + str((y0 + y1) / 2)
-            path += " L " + str(x1 - 25) + " " + str((y0 + y1) / 2)
-        else:
-            path += " L " + str(x0 + 25) + " " + str(y1)
-        path += " L " + str(x1 - 25) + " " + str(y1)
-        path += " L " + str(x1) + " " + str(y1)
+            Returns:
+                * **Types** (:class:`tuple<tuple>`): from and to points.
+        """
+        return self.__from_point, self.__to_point
 
-        path += " L " + str(x1 - 4) + " " + str(y1 - 4)
-        path += " L " + str(x1 - 4) + " " + str(y1 + 4)
-        path += " L " + str(x1) + " " + str(y1)
+    # ----------------------------------------------------------------------
+    def set_points(self, from_point, to_point, path=None):
+        """
+        This method sets the ends of the connector.
 
+        The path is built again only if an end moved.
+
+            Parameters:
+                * **from_point** (:class:`tuple<tuple>`)
+                * **to_point** (:class:`tuple<tuple>`)
+                * **path** (:class:`str<str>`): the path for these points,
+                  if it was already computed.
+        """
+        if "Line" in self.__widgets and from_point == self.__from_point \
+                and to_point == self.__to_point:
+            self.__update_state()
+            return
+        self.__from_point = from_point
+        self.__to_point = to_point
+        if path is None:
+            path = get_path(from_point, to_point)
+        self.__update_draw(path)
+
+    # ----------------------------------------------------------------------
+    def __update_draw(self, path):
+        """
+        This method update draw.
+        """
         color = 'black'
         if self.conn_type in System.ports:
             color = System.ports[self.conn_type].color
@@ -164,6 +198,11 @@ class Connector(GooCanvas.CanvasGroup, ConnectionModel):
         This method update the connector state.
         """
 
+        state = (self.__focus, self in self.diagram.current_widgets)
+        if state == self.__state:
+            return
+        self.__state = state
+
         # With focus: line width = 3
         if self.__focus:
             self.__widgets["Line"].set_property("line-width", 3)
@@ -171,10 +210,8 @@ class Connector(GooCanvas.CanvasGroup, ConnectionModel):
             self.__widgets["Line"].set_property("line-width", 2)
 
         # selected: line style = dashed and line width = 3
-        if self in self.diagram.current_widgets:
-            self.__widgets["Line"].set_property(
-                "line_dash", GooCanvas.CanvasLineDash.newv((4.0, 2.0)))
+        if state[1]:
+            self.__widgets["Line"].set_property("line_dash", SELECTED_DASH)
         else:
-            self.__widgets["Line"].set_property(
-                "line_dash", GooCanvas.CanvasLineDash.newv((10.0, 0.0)))
+            self.__widgets["Line"].set_property("line_dash", NORMAL_DASH)
 
@@ -3,18 +3,21 @@
 This module contains the Diagram class.
 """
 import gi
-import copy
 gi.require_version('Gtk', '3.0')
 gi.require_version('GooCanvas', '2.0')
 from gi.repository import Gtk
 from gi.repository import Gdk
 from gi.repository import GObject
+from gi.repository import GLib
 from gi.repository import GooCanvas
 from block import Block
 from connector import Connector
+from connector import SELECTED_DASH
 from mosaicode.system import System as System
 from mosaicode.model.diagrammodel import DiagramModel
 from mosaicode.model.plugin import Plugin
+from mosaicode.utils.SpatialUtils import SpatialIndex
+from mosaicode.utils.GeometryUtils import get_paths
 import gettext
 _ = gettext.gettext
 
@@ -29,13 +32,24 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
     def __init__(self, main_window):
         GooCanvas.Canvas.__init__(self)
         DiagramModel.__init__(self)
+        self.history.max_entries = System.properties.undo_entries
+        self.history.max_size = System.properties.undo_memory
         self.set_property("expand", True)
 
         self.last_clicked_point = (None, None)
         self.main_window = main_window
 
         self.curr_connector = None
-        self.current_widgets = []
+        self.current_widgets = set()
+        # Bounds of the blocks and connectors, for the selection
+        self.spatial_index = SpatialIndex()
+
+        # Widgets to update in the next redraw
+        self.__dirty_blocks = set()
+        self.__dirty_connectors = set()
+        self.__dirty_all = False
+        self.__flush_id = None
+        self.__batch_changed = False
 
         self.grab_focus()
         self.connect("motion-notify-event", self.__on_motion_notify)
@@ -54,14 +68,15 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
         self.white_board = None
         self.show_grid = False
         self.select_rect = None
+        # White board and grid, below all blocks and connectors
+        self.__background = None
+        self.__background_state = None
+        self.__grid = None
         self.__update_white_board()
         self.scrolled_window = None
         self.set_property("has-tooltip", True)  # Allow tooltip on elements
         self.show()
 
-        # Used for cycle detection
-        self.__marks = None
-
     # ----------------------------------------------------------------------
     def set_scrolled_window(self, frame):
         """
@@ -79,22 +94,17 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
         # Select elements
         if self.select_rect is not None:
             self.__update_select(event.x / scale, event.y / scale)
-            items = self.get_items_in_area(
-                self.select_rect.bounds, True, False, True)
-            self.current_widgets = []
-            for item in items:
-                if not isinstance(item, Connector) and not \
-                        isinstance(item, Block):
-                    continue
-                if item not in self.current_widgets:
-                    self.current_widgets.append(item)
-            self.update_flows()
+            self.flush()
+            bounds = self.select_rect.bounds
+            selected = self.spatial_index.query(
+                (bounds.x1, bounds.y1, bounds.x2, bounds.y2), True)
+            # Only the widgets that entered or left the selection change
+            changed = selected.symmetric_difference(self.current_widgets)
+            self.current_widgets = selected
+            for widget in changed:
+                self.mark_dirty(widget)
             return True  # Abort other events
 
-        if event.state & Gdk.ModifierType.BUTTON1_MASK:
-            for connector in self.connectors:
-                connector.update_flow()
-
         if self.curr_connector is None:
             return False
         point = (event.x / scale, event.y / scale)
@@ -103,6 +113,8 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
 
     # ----------------------------------------------------------------------
     def __on_key_press(self, widget, event=None):
+        # Each key press is a new undo entry
+        self.history.close()
         grid = System.properties.grid
         modifier_mask = Gtk.accelerator_get_default_mod_mask()
         event.state = event.state & modifier_mask
@@ -140,6 +152,8 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
 
     # ----------------------------------------------------------------------
     def __on_button_release(self, widget, event=None):
+        # A drag is a single undo entry
+        self.history.close()
         self.__end_select()
 
     # ----------------------------------------------------------------------
@@ -147,9 +161,11 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
         Gtk.Widget.grab_focus(self)
         if event.button == 1:
             self.last_clicked_point = (event.x, event.y)
-            self.current_widgets = []
+            selected = self.current_widgets
+            self.current_widgets = set()
             self.__abort_connection()
-            self.update_flows()
+            for widget in selected:
+                self.mark_dirty(widget)
             self.__start_select()
             return False
         return False
@@ -165,7 +181,7 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
                 height=0,
                 stroke_color="black",
                 fill_color=None,
-                line_dash=GooCanvas.CanvasLineDash.newv((4.0, 2.0))
+                line_dash=SELECTED_DASH
             )
 
     # ----------------------------------------------------------------------
@@ -217,28 +233,12 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
         """
         x, y, width, height = self.get_min_max()
         if x >= 0 and y >= 0:
-            self.update_flows()
             return
         for block_id in self.blocks:
             block = self.blocks[block_id]
             block.move(0 - x, 0 - y)
         self.update_flows()
 
-    # ----------------------------------------------------------------------
-    def insert_block(self, block):
-        if self.language is not None and self.language != block.language:
-            System.log("Block language is different from diagram language.")
-            return False
-        if self.language is None or self.language == 'None':
-            self.language = block.language
-
-        self.last_id = max(int(self.last_id), int(block.id))
-        if block.id < 0:
-            block.id = self.last_id
-        self.blocks[block.id] = block
-        self.last_id += 1
-        return True
-
     # ----------------------------------------------------------------------
     def add_block(self, plugin):
         """
@@ -249,10 +249,13 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
             Returns:
                 * **Types** (:class:`boolean<boolean>`)
         """
-        new_block = Block(self, copy.deepcopy(plugin))
+        if not plugin.is_usable():
+            return False
+        new_block = Block(self, plugin)
         if self.insert_block(new_block):
-            self.do("Add")
+            self.do("Add", ("add_block", new_block))
             self.get_root_item().add_child(new_block, -1)
+            self.mark_dirty(new_block)
             return True
         else:
             return False
@@ -265,40 +268,15 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
         Returns
              * **Types** (:class:`boolean<boolean>`)
         """
-        for oldCon in self.connectors:
-            if oldCon.sink == newCon.sink \
-                    and oldCon.sink_port == newCon.sink_port\
-                    and not System.ports[newCon.conn_type].multiple:
-                System.log(_("Connector Already exists"))
-                return False
-        if (newCon.sink == newCon.source) or self.__cycle_detection(newCon):
+        if self.get_input_connections(newCon.sink, newCon.sink_port) \
+                and not System.ports[newCon.conn_type].multiple:
+            System.log(_("Connector Already exists"))
+            return False
+        if self.creates_cycle(newCon.source, newCon.sink):
             System.log(_("Recursive connection is not allowed"))
             return False
         return True
 
-    # ----------------------------------------------------------------------
-    def __cycle_detection(self, newCon):
-        self.__marks = {}
-        self.__marks[newCon.source] = None
-        self.__marks[newCon.sink] = None
-        if self.__dfs(newCon.sink):
-            return True
-        return False
-
-    # Depth-First Search
-    # ----------------------------------------------------------------------
-    def __dfs(self, sink):
-        for connection in self.connectors:
-            if (connection.source != sink):
-                continue
-            adjacent = connection.sink
-            if adjacent in self.__marks:
-                return True
-            self.__marks[adjacent] = None
-            if self.__dfs(adjacent):
-                return True
-        return False
-
     # ----------------------------------------------------------------------
     def __abort_connection(self):
         if self.curr_connector is None:
@@ -324,7 +302,8 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
         conn_type = block.out_ports[output]["type"]
         self.curr_connector = Connector(self, block, output, conn_type)
         self.get_root_item().add_child(self.curr_connector, -1)
-        self.update_flows()
+        # The new connector draws itself as it follows the pointer
+        self.mark_dirty(block)
 
     # ----------------------------------------------------------------------
     def end_connection(self, block, block_input):
@@ -352,9 +331,10 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
             System.log(_("Connection Types mismatch"))
             self.__abort_connection()
             return False
-        self.connectors.append(self.curr_connector)
+        self.add_connection(self.curr_connector)
+        self.mark_dirty(self.curr_connector.sink)
+        self.do("Connect", ("connect", self.curr_connector))
         self.curr_connector = None
-        self.update_flows()
         return True
 
     # ----------------------------------------------------------------------
@@ -367,43 +347,69 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
 
     # ----------------------------------------------------------------------
     def __update_white_board(self):
+        """
+        This method updates the white board and the grid.
+
+        They are created once and drawn again only if the window size, the
+        grid size or the grid visibility changed.
+
+            Returns:
+                * **Types** (:class:`boolean<boolean>`): True if the grid
+                  size changed.
+        """
         width = self.main_window.get_size()[0]
         height = self.main_window.get_size()[1]
-        self.white_board = GooCanvas.CanvasRect(
-            parent=self.get_root_item(),
-            x=0,
-            y=0,
-            width=width,
-            height=height,
-            stroke_color="white",
-            fill_color="white")
+        state = (width, height, System.properties.grid, self.show_grid)
+        if state == self.__background_state:
+            return False
+        old_state = self.__background_state
+        self.__background_state = state
+
+        if self.__background is None:
+            self.__background = GooCanvas.CanvasGroup(
+                parent=self.get_root_item())
+            self.white_board = GooCanvas.CanvasRect(
+                parent=self.__background,
+                x=0,
+                y=0,
+                width=width,
+                height=height,
+                stroke_color="white",
+                fill_color="white")
+            self.white_board.connect("focus-in-event",
+                                     self.__white_board_event)
+        else:
+            self.white_board.set_property("width", width)
+            self.white_board.set_property("height", height)
 
         self.__draw_grid()
-
-        self.white_board.connect("focus-in-event", self.__white_board_event)
+        return old_state is not None and old_state[2] != state[2]
 
     # ----------------------------------------------------------------------
     def __draw_grid(self):
-        if self.show_grid:
-            width = self.main_window.get_size()[0]
-            height = self.main_window.get_size()[1]
-
-            i = 0
-            while i < height:
-                GooCanvas.CanvasPath(
-                        parent=self.get_root_item(),
-                        stroke_color="#F9F9F9",
-                        data="M 0 " + str(i) + " L "+ str(width) +" "+ str(i) + ""
-                        )
-                i = i + System.properties.grid
-            i = 0
-            while i < width:
-                GooCanvas.CanvasPath(
-                        parent=self.get_root_item(),
-                        stroke_color="#F9F9F9",
-                        data="M " + str(i) + " 0 L "+ str(i) + " "+ str(height) +""
-                        )
-                i = i + System.properties.grid
+        """
+        This method draws all grid lines as a single path item.
+
+        The grid does not take events, so it is never hit tested.
+        """
+        if self.__grid is not None:
+            self.__grid.remove()
+            self.__grid = None
+        if not self.show_grid:
+            return
+        width = self.main_window.get_size()[0]
+        height = self.main_window.get_size()[1]
+        grid = System.properties.grid
+        data = []
+        for i in range(0, height, grid):
+            data.append("M 0 %d L %d %d" % (i, width, i))
+        for i in range(0, width, grid):
+            data.append("M %d 0 L %d %d" % (i, i, height))
+        self.__grid = GooCanvas.CanvasPath(
+                parent=self.__background,
+                stroke_color="#F9F9F9",
+                pointer_events=GooCanvas.CanvasPointerEvents.NONE,
+                data=" ".join(data))
 
     # ----------------------------------------------------------------------
     def set_show_grid(self, bool):
@@ -414,12 +420,108 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
     def update_flows(self):
         """
         This method update flows.
+
+        All the blocks and connectors are updated in the next redraw.
         """
+        self.__dirty_all = True
+        if self.in_batch():
+            return
         self.white_board.set_property("stroke_color", "white")
-        for block_id in self.blocks:
-            self.blocks[block_id].update_flow()
-        for conn in self.connectors:
-            conn.update_flow()
+        self.__schedule_flush()
+
+    # ----------------------------------------------------------------------
+    def mark_dirty(self, widget):
+        """
+        This method marks a block, with its connectors, or a connector to
+        be updated in the next redraw.
+
+            Parameters:
+                * **widget** (:class:`Block<mosaicode.GUI.block>` or
+                  :class:`Connector<mosaicode.GUI.connector>`)
+        """
+        if self.in_batch():
+            # Everything is updated when the batch ends
+            return
+        if isinstance(widget, Block):
+            self.__dirty_blocks.add(widget)
+            self.__dirty_connectors.update(self.get_connections(widget))
+        elif isinstance(widget, Connector):
+            self.__dirty_connectors.add(widget)
+        else:
+            return
+        self.__schedule_flush()
+
+    # ----------------------------------------------------------------------
+    def __schedule_flush(self):
+        # Many changes between two frames cost a single update
+        if self.__flush_id is None:
+            self.__flush_id = GLib.idle_add(self.flush,
+                                            priority=GLib.PRIORITY_HIGH_IDLE)
+
+    # ----------------------------------------------------------------------
+    def flush(self):
+        """
+        This method updates the blocks and connectors marked as dirty.
+
+        It runs from an idle callback, before GTK draws the next frame.
+
+            Returns:
+                * **Types** (:class:`boolean<boolean>`): False, so the idle
+                  callback runs only once.
+        """
+        if self.__flush_id is not None:
+            GLib.source_remove(self.__flush_id)
+            self.__flush_id = None
+        if self.__dirty_all:
+            blocks = self.blocks.values()
+            connectors = self.connectors
+            self.spatial_index.clear()
+        else:
+            # Widgets removed since they were marked are skipped
+            blocks = [block for block in self.__dirty_blocks
+                      if self.blocks.get(block.id) is block]
+            connectors = [connector for connector in self.__dirty_connectors
+                          if connector in
+                          self.get_output_connections(connector.source)]
+        self.__dirty_blocks = set()
+        self.__dirty_connectors = set()
+        self.__dirty_all = False
+        for block in blocks:
+            block.update_flow()
+            self.__update_bounds(block)
+        self.update_connectors(connectors)
+        for connector in connectors:
+            self.__update_bounds(connector)
+        return False
+
+    # ----------------------------------------------------------------------
+    def update_connectors(self, connectors):
+        """
+        This method updates many connectors at once.
+
+        The ends of all connectors are read first and only the connectors
+        with a moved end get a new path, all built in one batch.
+
+            Parameters:
+                * **connectors** (:class:`list<list>`)
+        """
+        moved = []
+        points = []
+        for connector in connectors:
+            ends = connector.get_flow_points()
+            if ends == connector.get_points():
+                connector.set_points(ends[0], ends[1])
+            else:
+                moved.append(connector)
+                points.append(ends)
+        for connector, ends, path in zip(moved, points, get_paths(points)):
+            connector.set_points(ends[0], ends[1], path)
+
+    # ----------------------------------------------------------------------
+    def __update_bounds(self, widget):
+        bounds = widget.get_bounds()
+        self.spatial_index.update(
+            widget, (bounds.x1, bounds.y1, bounds.x2, bounds.y2))
 
     # ----------------------------------------------------------------------
     def set_file_name(self, file_name):
@@ -437,6 +539,7 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
     def __apply_zoom(self):
         self.set_scale(self.zoom)
         self.update_scrolling()
+        self.update_flows()
         self.set_modified(True)
 
     # ----------------------------------------------------------------------
@@ -495,11 +598,8 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
         """
         This method select all blocks in diagram.
         """
-        self.current_widgets = []
-        for block_id in self.blocks:
-            self.current_widgets.append(self.blocks[block_id])
-        for conn in self.connectors:
-            self.current_widgets.append(conn)
+        self.current_widgets = set(self.blocks.values())
+        self.current_widgets.update(self.connectors)
         self.update_flows()
 
     # ----------------------------------------------------------------------
@@ -511,12 +611,14 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
                 * **(x,y)** (:class:`float<float>`)
 
         """
-        self.do("Move blocks")
-        for block_id in self.blocks:
-            if (self.blocks[block_id] in self.current_widgets):
-                block_pos_x, block_pos_y = self.blocks[block_id].get_position()
-                x, y = self.check_limit(x, y, block_pos_x, block_pos_y)
-                self.blocks[block_id].move(x, y)
+        for block_id in self.get_selected_blocks_id():
+            block_pos_x, block_pos_y = self.blocks[block_id].get_position()
+            x, y = self.check_limit(x, y, block_pos_x, block_pos_y)
+            self.blocks[block_id].move(x, y)
+            self.mark_dirty(self.blocks[block_id])
+            new_x, new_y = self.blocks[block_id].get_position()
+            self.do("Move blocks", ("move", self.blocks[block_id],
+                    new_x - block_pos_x, new_y - block_pos_y), True)
         self.update_scrolling()
 
     # ---------------------------------------------------------------------
@@ -545,11 +647,12 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
     def get_selected_blocks_id(self):
         selected_blocks_id = []
 
-        for block_id in self.blocks:
-            if self.blocks[block_id] in self.current_widgets:
-                selected_blocks_id.append(block_id)
+        for widget in self.current_widgets:
+            if isinstance(widget, Block) and \
+                    self.blocks.get(widget.id) is widget:
+                selected_blocks_id.append(widget.id)
 
-        return selected_blocks_id
+        return sorted(selected_blocks_id)
 
     # ---------------------------------------------------------------------
     def delete(self):
@@ -559,11 +662,10 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
         """
         if len(self.current_widgets) < 1:
             return
-        self.do("Delete")
-        for widget in self.current_widgets:
-            widget.delete()
-        self.current_widgets = []
-        self.update_flows()
+        with self.batch("Delete"):
+            for widget in self.current_widgets:
+                widget.delete()
+        self.current_widgets = set()
 
     # ---------------------------------------------------------------------
     def paste(self):
@@ -571,37 +673,37 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
         This method paste a block.
         """
         replace = {}
-        self.current_widgets = []
-        # interact into blocks, add blocks and change their id
-        clipboard = self.main_window.main_control.get_clipboard()
-        for widget in clipboard:
-            if not isinstance(widget, Block):
-                continue
-            plugin = Plugin(widget)
-            plugin.x += 20
-            plugin.y += 20
-            plugin.id = -1
-            if not self.main_window.main_control.add_block(plugin):
-                return
-            replace[widget.id] = plugin
-            self.current_widgets.append(plugin)
-        # interact into connections changing block ids
-        for widget in clipboard:
-            if not isinstance(widget, Connector):
-                continue
-            # if a connector is copied without blocks
-            if widget.source.id not in replace or widget.sink.id \
-                    not in replace:
-                continue
-            print _("continuing...")
-            source = replace[widget.source.id]
-            source_port = widget.source_port
-            sink = replace[widget.sink.id]
-            sink_port = widget.sink_port
-            self.start_connection(source, source_port)
-            self.current_widgets.append(self.curr_connector)
-            self.end_connection(sink, sink_port)
-        self.update_flows()
+        self.current_widgets = set()
+        with self.batch("Paste"):
+            # interact into blocks, add blocks and change their id
+            clipboard = self.main_window.main_control.get_clipboard()
+            for widget in clipboard:
+                if not isinstance(widget, Block):
+                    continue
+                plugin = Plugin(widget)
+                plugin.x += 20
+                plugin.y += 20
+                plugin.id = -1
+                if not self.main_window.main_control.add_block(plugin):
+                    return
+                replace[widget.id] = plugin
+                self.current_widgets.add(plugin)
+            # interact into connections changing block ids
+            for widget in clipboard:
+                if not isinstance(widget, Connector):
+                    continue
+                # if a connector is copied without blocks
+                if widget.source.id not in replace or widget.sink.id \
+                        not in replace:
+                    continue
+                print _("continuing...")
+                source = replace[widget.source.id]
+                source_port = widget.source_port
+                sink = replace[widget.sink.id]
+                sink_port = widget.sink_port
+                self.start_connection(source, source_port)
+                self.current_widgets.add(self.curr_connector)
+                self.end_connection(sink, sink_port)
 
     # ---------------------------------------------------------------------
     def copy(self):
@@ -619,11 +721,11 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
         """
         if len(self.current_widgets) < 1:
             return
-        self.do(_("Cut"))
-        self.main_window.main_control.reset_clipboard()
-        for widget in self.current_widgets:
-            self.main_window.main_control.get_clipboard().append(widget)
-            widget.delete()
+        with self.batch(_("Cut")):
+            self.main_window.main_control.reset_clipboard()
+            for widget in self.current_widgets:
+                self.main_window.main_control.get_clipboard().append(widget)
+                widget.delete()
 
     # ----------------------------------------------------------------------
     def delete_connection(self, connection):
@@ -633,8 +735,10 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
             Parameters:
                 connection
         """
-        if connection in self.connectors:
-            self.connectors.remove(connection)
+        self.spatial_index.remove(connection)
+        if self.remove_connection(connection):
+            self.mark_dirty(connection.sink)
+            self.do("Delete connection", ("disconnect", connection))
         connection.remove()
 
     # ----------------------------------------------------------------------
@@ -649,13 +753,14 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
             System.log("Block " + str(block.id) + \
                 " is not present in this diagram.")
             return
-        for idx in reversed(range(len(self.connectors))):
-            if self.connectors[idx].source == block \
-                    or self.connectors[idx].sink == block:
-                self.delete_connection(self.connectors[idx])
+        self.history.begin("Delete block")
+        for connection in self.get_connections(block):
+            self.delete_connection(connection)
+        self.do("Delete block", ("remove_block", block))
+        self.history.end()
+        self.spatial_index.remove(block)
         self.blocks[block.id].remove()
         del self.blocks[block.id]
-        self.update_flows()
 
     # ---------------------------------------------------------------------
     def set_modified(self, state):
@@ -665,7 +770,7 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
             Parameters:
                 * **state**
         """
-        self.modified = state
+        DiagramModel.set_modified(self, state)
         self.main_window.work_area.rename_diagram(self)
 
     # ---------------------------------------------------------------------
@@ -679,45 +784,119 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
     # ---------------------------------------------------------------------
     def redraw(self):
         """
-        This method redraw a block.
+        This method brings the canvas to the state of the diagram.
+
+        The canvas is compared with the blocks and connectors of the
+        diagram and only the items that differ are removed or added.
         """
-        while self.get_root_item().get_n_children() != 0:
-            self.get_root_item().remove_child(0)
-        self.__update_white_board()
+        grid_changed = self.__update_white_board()
+        root = self.get_root_item()
+        items = set(self.blocks.values())
+        items.update(self.connectors)
+        keep = set([self.__background, self.select_rect, self.curr_connector])
+
+        # Removed from the top, so the other indexes do not change
+        present = set()
+        for index in reversed(range(root.get_n_children())):
+            child = root.get_child(index)
+            if child in items:
+                present.add(child)
+            elif child not in keep:
+                root.remove_child(index)
+
         for block_id in self.blocks:
-            self.get_root_item().add_child(self.blocks[block_id], -1)
-            self.blocks[block_id].adjust_position()
+            block = self.blocks[block_id]
+            if block not in present:
+                root.add_child(block, -1)
+                block.adjust_position()
+            elif grid_changed:
+                block.adjust_position()
         for connector in self.connectors:
-            self.get_root_item().add_child(connector, -1)
+            if connector not in present:
+                root.add_child(connector, -1)
+        if grid_changed:
+            self.update_flows()
 
     # ---------------------------------------------------------------------
-    def do(self, new_msg):
+    def do(self, new_msg, operation, merge=False):
         """
-        This method do something
+        This method records an operation in the undo history.
+
             Parameters:
                 * **new_msg** (:class:`str<str>`)
+                * **operation** (:class:`tuple<tuple>`): name and arguments.
+                * **merge** (:class:`boolean<boolean>`): join the last entry
+                  if it has the same message, as in a drag.
         """
-        self.set_modified(True)
-        action = (copy.copy(self.blocks), copy.copy(self.connectors), new_msg)
-        self.undo_stack.append(action)
-        System.log(_("Do: " + new_msg))
+        if self.in_batch():
+            self.__batch_changed = True
+        else:
+            self.set_modified(True)
+        if self.history.add(new_msg, operation, merge):
+            System.log(_("Do: " + new_msg))
+
+    # ---------------------------------------------------------------------
+    def end_batch(self):
+        """
+        This method marks the diagram as modified and updates all blocks
+        and connectors once, after a batch of changes.
+        """
+        if self.__batch_changed:
+            self.__batch_changed = False
+            self.set_modified(True)
+        self.update_flows()
+
+    # ---------------------------------------------------------------------
+    def __apply(self, operation, undo):
+        """
+        This method applies an operation of the history or its inverse.
+        """
+        name = operation[0]
+        if name in ("add_block", "remove_block"):
+            block = operation[1]
+            if (name == "add_block") == undo:
+                self.delete_block(block)
+            else:
+                self.blocks[block.id] = block
+                self.get_root_item().add_child(block, -1)
+                self.mark_dirty(block)
+        elif name in ("connect", "disconnect"):
+            connection = operation[1]
+            if (name == "connect") == undo:
+                self.delete_connection(connection)
+            else:
+                self.add_connection(connection)
+                self.get_root_item().add_child(connection, -1)
+                self.mark_dirty(connection.sink)
+        elif name == "move":
+            block, x, y = operation[1:]
+            if undo:
+                x, y = -x, -y
+            block.translate(x, y)
+            self.mark_dirty(block)
+        elif name == "properties":
+            block, old_values, new_values = operation[1:]
+            if undo:
+                Plugin.set_properties(block, old_values)
+            else:
+                Plugin.set_properties(block, new_values)
+            self.mark_dirty(block)
+            # The fields still show the values before the change
+            if self.main_window.block_properties.get_block() is block:
+                self.show_block_property(block)
 
     # ---------------------------------------------------------------------
     def undo(self):
         """
         This method undo a modification.
+
+        Only the operations of the last entry are reverted.
         """
-        if len(self.undo_stack) < 1:
+        self.current_widgets = set()
+        msg = self.history.undo(self.__apply)
+        if msg is None:
             return
-        self.set_modified(True)
-        action = self.undo_stack.pop()
-        self.blocks = action[0]
-        self.connectors = action[1]
-        msg = action[2]
-        self.redraw()
-        self.redo_stack.append(action)
-        if len(self.undo_stack) == 0:
-            self.set_modified(False)
+        self.set_modified(not self.history.is_saved())
         System.log(_("Undo: " + msg))
 
     # ---------------------------------------------------------------------
@@ -725,15 +904,11 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
         """
         This method redo a modification.
         """
-        if len(self.redo_stack) < 1:
+        self.current_widgets = set()
+        msg = self.history.redo(self.__apply)
+        if msg is None:
             return
-        self.set_modified(True)
-        action = self.redo_stack.pop()
-        self.blocks = action[0]
-        self.connectors = action[1]
-        msg = action[2]
-        self.redraw()
-        self.undo_stack.append(action)
+        self.set_modified(not self.history.is_saved())
         System.log(_("Redo: " + msg))
 
     # ---------------------------------------------------------------------
@@ -775,6 +950,7 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
         for block_id in blocks_id:
             x, y = self.blocks[block_id].get_position()
             self.blocks[block_id].move(0, top -y)
+            self.mark_dirty(self.blocks[block_id])
 
         self.update_scrolling()
 
@@ -791,6 +967,7 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
         for block_id in blocks_id:
             x, y = self.blocks[block_id].get_position()
             self.blocks[block_id].move(0, bottom -y)
+            self.mark_dirty(self.blocks[block_id])
 
         self.update_scrolling()
 
@@ -807,6 +984,7 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
         for block_id in blocks_id:
             x, y = self.blocks[block_id].get_position()
             self.blocks[block_id].move(left -x, 0)
+            self.mark_dirty(self.blocks[block_id])
 
         self.update_scrolling()
 
@@ -823,6 +1001,7 @@ class Diagram(GooCanvas.Canvas, DiagramModel):
         for block_id in blocks_id:
             x, y = self.blocks[block_id].get_position()
             self.blocks[block_id].move(right -x, 0)
+            self.mark_dirty(self.blocks[block_id])
 
         self.update_scrolling()
 
@@ -83,6 +83,7 @@ class Menu(Gtk.MenuBar):
         # -------------------------- Process --------------------------------
         process_menu = Gtk.Menu()
         self.__create_menu(_("Run"), "<Control>R", process_menu, mc.run)
+        self.__create_menu(_("Stop"), "<Control>T", process_menu, mc.stop)
         self.__create_menu(_("Save Source"), None,
                            process_menu, mc.save_source)
         self.__create_menu(_("View Source"), None,
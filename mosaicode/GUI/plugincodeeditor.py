@@ -72,10 +72,8 @@ class PluginCodeEditor(Gtk.ScrolledWindow):
             Parameters:
                 * **plugin** (:class:`<>`)
         """
-        count = 0
-        for code_widget in self.code_widgets:
-            self.plugin.codes[count] = self.code_widgets[count].get_value()
-            count = count + 1
+        self.plugin.codes = [code_widget.get_value()
+                             for code_widget in self.code_widgets]
 
     # ----------------------------------------------------------------------
     def __populate_combos(self, button_bar):
@@ -44,7 +44,12 @@ class PluginEditor(Gtk.Dialog):
                                 Gtk.STOCK_SAVE, Gtk.ResponseType.OK))
 
         self.plugin_manager = plugin_manager
-        self.plugin = plugin
+        # Blocks share codes and ports with the plugin, so the changes are
+        # made in a copy that is only added when saved
+        self.plugin = Plugin(plugin)
+        self.plugin.codes = list(self.plugin.codes)
+        self.plugin.in_ports = list(self.plugin.in_ports)
+        self.plugin.out_ports = list(self.plugin.out_ports)
         self.set_default_size(800, 600)
         box = self.get_content_area()
 
@@ -64,7 +69,7 @@ class PluginEditor(Gtk.Dialog):
         self.show_all()
         result = self.run()
         if result == Gtk.ResponseType.OK:
-            self.plugin_manager.main_control.add_plugin(plugin)
+            self.plugin_manager.main_control.add_plugin(self.plugin)
             self.plugin_manager.update()
         self.close()
         self.destroy()
@@ -42,6 +42,9 @@ class Toolbar(Gtk.Toolbar):
         self.__create_button(Gtk.STOCK_EXECUTE,
                              _("Run"),
                              self.main_window.main_control.run)
+        self.__create_button(Gtk.STOCK_STOP,
+                             _("Stop"),
+                             self.main_window.main_control.stop)
         self.__create_button(Gtk.STOCK_SELECT_ALL,
                              _("View Source"),
                              self.main_window.main_control.view_source)
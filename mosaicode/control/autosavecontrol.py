@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+"""
+This module contains the AutosaveControl class.
+"""
+import os
+import Queue
+import threading
+from mosaicode.persistence.compactdiagrampersistence import CompactDiagramPersistence
+from mosaicode.persistence.diagrampersistence import DiagramPersistence
+from mosaicode.persistence.journalpersistence import JournalPersistence
+
+
+class AutosaveControl():
+    """
+    This class writes snapshots of diagrams to the journal in a thread.
+
+    The GUI only takes the snapshot, which is immutable. Converting it
+    and writing it to disk is done by the thread. Only the newest snapshot
+    of each diagram waits to be written, so a slow disk never makes the
+    work pile up.
+    """
+
+    # ----------------------------------------------------------------------
+    def __init__(self, file_name=None):
+        if file_name is None:
+            file_name = JournalPersistence.get_file_name()
+        self.file_name = file_name  # the journal
+        self.__pending = {}  # snapshot by key, None to remove the diagram
+        self.__lock = threading.Lock()
+        self.__queue = Queue.Queue()
+        self.__thread = None
+
+    # ----------------------------------------------------------------------
+    def start(self):
+        """
+        This method starts the thread.
+        """
+        if self.__thread is not None:
+            return
+        self.__thread = threading.Thread(target=self.__run, name="autosave")
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    # ----------------------------------------------------------------------
+    def stop(self):
+        """
+        This method waits for the pending snapshots and stops the thread.
+        """
+        if self.__thread is None:
+            return
+        self.__queue.put(None)
+        self.__thread.join()
+        self.__thread = None
+
+    # ----------------------------------------------------------------------
+    def save(self, key, snapshot):
+        """
+        This method adds a snapshot to be written.
+
+            Parameters:
+                * **key** (:class:`str<str>`): The diagram in the journal.
+                * **snapshot** (:class:`DiagramSnapshot<mosaicode.model.diagramsnapshot>`)
+        """
+        self.__put(key, snapshot)
+
+    # ----------------------------------------------------------------------
+    def remove(self, key):
+        """
+        This method tells that a diagram was saved or closed.
+
+            Parameters:
+                * **key** (:class:`str<str>`): The diagram in the journal.
+        """
+        self.__put(key, None)
+
+    # ----------------------------------------------------------------------
+    def __put(self, key, snapshot):
+        with self.__lock:
+            waiting = key in self.__pending
+            self.__pending[key] = snapshot
+        if not waiting:
+            self.__queue.put(key)
+
+    # ----------------------------------------------------------------------
+    def __run(self):
+        while True:
+            key = self.__queue.get()
+            if key is None:
+                return
+            with self.__lock:
+                snapshot = self.__pending.pop(key)
+            try:
+                self.__write(key, snapshot)
+            except Exception as e:
+                # System.log would touch the GUI from this thread
+                print "Could not autosave " + str(key) + ": " + str(e)
+
+    # ----------------------------------------------------------------------
+    def __write(self, key, snapshot):
+        if snapshot is None:
+            JournalPersistence.remove(self.file_name, key)
+        else:
+            records = DiagramPersistence.from_snapshot(snapshot)
+            data = CompactDiagramPersistence.encode(records)
+            JournalPersistence.append(self.file_name, key,
+                                      snapshot.file_name, data)
+        if os.path.getsize(self.file_name) > JournalPersistence.MAX_SIZE:
+            JournalPersistence.compact(self.file_name)
+
+# ----------------------------------------------------------------------
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+"""
+This module contains the BatchControl class.
+"""
+import os
+import time
+import multiprocessing
+from glob import glob
+from mosaicode.system import System as System
+from mosaicode.control.codegenerator import CodeGenerator
+from mosaicode.control.codetemplatecontrol import CodeTemplateControl
+from mosaicode.model.diagrammodel import DiagramModel
+from mosaicode.persistence.diagrampersistence import DiagramPersistence
+
+
+# ----------------------------------------------------------------------
+def generate_file(args):
+    """
+    This function generates the code of one diagram file.
+
+    It is a module function so it can be sent to the worker processes.
+
+        Parameters:
+            * **args** (:class:`tuple<tuple>`): file name and output directory.
+        Returns:
+            * **Types** (:class:`tuple<tuple>`): file name, output file
+              name, elapsed time and error message or None.
+    """
+    file_name, output_dir = args
+    start = time.time()
+    try:
+        diagram = DiagramModel()
+        diagram.file_name = file_name
+        DiagramPersistence.load(diagram)
+        if len(diagram.blocks) == 0:
+            return file_name, None, time.time() - start, "Diagram is empty"
+        code_template = CodeTemplateControl.get_code_template(diagram.language)
+        code = CodeGenerator(diagram, code_template).generate_code()
+        name = os.path.splitext(diagram.patch_name)[0] + code_template.extension
+        name = os.path.join(output_dir, name)
+        code_file = open(name, 'w')
+        code_file.write(code)
+        code_file.close()
+    except Exception as e:
+        return file_name, None, time.time() - start, str(e)
+    return file_name, name, time.time() - start, None
+
+
+class BatchControl():
+    """
+    This class contains methods related the BatchControl class.
+    """
+
+    # ----------------------------------------------------------------------
+
+    def __init__(self):
+        pass
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def get_files(cls, paths):
+        """
+        This method returns the diagram files. Directories are expanded to
+        the .mscd and .mscdb files inside them.
+
+        Returns:
+
+            * **Types** (:class:`list<list>`)
+        """
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                files.extend(sorted(glob(os.path.join(path, "*.mscd")) +
+                                    glob(os.path.join(path, "*.mscdb"))))
+            else:
+                files.append(path)
+        return files
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def get_tasks(cls, files, output_dir):
+        """
+        This method returns the work of each diagram file. The code of a
+        diagram is named after it, so a diagram with the same name as a
+        previous one would overwrite its code and is an error instead.
+
+        Returns:
+
+            * **Types** (:class:`tuple<tuple>`): list of (file name, output
+              directory) and list of (file name, error message).
+        """
+        tasks = []
+        errors = []
+        names = {}  # diagram file by name without extension
+        for file_name in files:
+            name = os.path.splitext(os.path.basename(file_name))[0]
+            if name in names:
+                errors.append((file_name, "Same output name as " +
+                               names[name]))
+                continue
+            names[name] = file_name
+            tasks.append((file_name, output_dir))
+        return tasks, errors
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def generate(cls, paths, output_dir, jobs=None):
+        """
+        This method generates the code of many diagrams without GUI.
+
+        Files are distributed over a pool of processes and a timing line
+        is printed for each file.
+
+        Returns:
+
+            * **Types** (:class:`boolean<boolean>`): True if all diagrams
+              were generated.
+        """
+        # Extensions are loaded once, before the workers are forked
+        System()
+        if not os.path.isdir(output_dir):
+            try:
+                os.makedirs(output_dir)
+            except:
+                pass
+        files = cls.get_files(paths)
+        tasks, collisions = cls.get_tasks(files, output_dir)
+        for file_name, error in collisions:
+            print "%8.3fs  %s ERROR: %s" % (0, file_name, error)
+        if jobs is None:
+            jobs = multiprocessing.cpu_count()
+        jobs = max(1, min(jobs, len(tasks)))
+
+        start = time.time()
+        pool = None
+        if jobs > 1:
+            pool = multiprocessing.Pool(jobs)
+            results = pool.imap(generate_file, tasks)
+        else:
+            results = (generate_file(task) for task in tasks)
+
+        errors = len(collisions)
+        for file_name, name, elapsed, error in results:
+            if error is None:
+                print "%8.3fs  %s -> %s" % (elapsed, file_name, name)
+            else:
+                errors += 1
+                print "%8.3fs  %s ERROR: %s" % (elapsed, file_name, error)
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+        print "Generated %d of %d diagrams in %.3fs using %d jobs" % \
+            (len(files) - errors, len(files), time.time() - start, jobs)
+        return errors == 0
+
+# ----------------------------------------------------------------------
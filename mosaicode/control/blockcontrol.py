@@ -51,7 +51,33 @@ class BlockControl():
 
             * **Types** (:class:`boolean<boolean>`)
         """
-        BlockPersistence.load(file_name)
+        return BlockPersistence.load(file_name)
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def load_xml(cls, parser):
+        """
+        This method loads the block from a parsed XML file.
+
+        Returns:
+
+            * **Types** (:class:`Plugin<mosaicode.model.plugin>`)
+        """
+        return BlockPersistence.load_xml(parser)
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def load_lazy(cls, file_name, root):
+        """
+        This method loads the block metadata. Codes, ports and properties
+        are loaded when the block is used.
+
+        Returns:
+
+            * **Types** (:class:`LazyPlugin<mosaicode.model.lazyplugin>`)
+        """
+        return BlockPersistence.load_lazy(file_name, root)
+
     # ----------------------------------------------------------------------
     @classmethod
     def add_plugin(cls, plugin):
@@ -6,12 +6,11 @@ import os
 import time
 import datetime
 import gettext
-import gi
-gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk
 
-from threading import Thread
+from collections import deque
 from mosaicode.system import System as System
+from mosaicode.model.diagramsnapshot import DiagramSnapshot
+from mosaicode.utils.TemplateUtils import TemplateParser
 
 
 class CodeGenerator():
@@ -19,17 +18,25 @@ class CodeGenerator():
     This class contains methods related the CodeGenerator class.
     """
 
+    # Compiled templates of plugin codes and ports, by type
+    __templates = {}
+
     # ----------------------------------------------------------------------
 
-    def __init__(self, diagram=None, code_template=None):
+    def __init__(self, diagram=None, code_template=None, cache=None):
+        # Code is generated from an immutable copy of the diagram
+        if diagram is not None and not isinstance(diagram, DiagramSnapshot):
+            diagram = DiagramSnapshot.from_diagram(diagram)
         self.diagram = diagram
         self.code_template = code_template
+        # Rendered codes and connections by block id, kept between runs
+        self.cache = cache
 
         self.dir_name = ""
         self.filename = ""
-        self.old_path = os.path.realpath(os.curdir)
 
-        self.blockList = []
+        self.layers = []
+        self.block_connections = {}
         self.connections = []
         self.codes=[[],[],[],[],[]]
 
@@ -96,149 +103,237 @@ class CodeGenerator():
         return name
 
     # ----------------------------------------------------------------------
-    def __change_directory(self):
+    def __make_directory(self):
         """
-        This method change the directory.
+        This method creates the directory of the code, if needed.
         """
         try:
             os.makedirs(self.dir_name)
         except:
             pass
-        os.chdir(self.dir_name)
-
-    # ----------------------------------------------------------------------
-    def __return_to_old_directory(self):
-        """
-        This method return path to old directory.
-        """
-        os.chdir(self.old_path)
 
     # ----------------------------------------------------------------------
     def __sort_blocks(self):
         """
-        This method sorts the blocks.
-        """
-        for block_key in self.diagram.blocks:
-            block = self.diagram.blocks[block_key]
+        This method sorts the blocks in layers.
 
-            # Creating class attributes on the fly
-            try:
-                block.weight = 1
-            except:
-                block.__class__.weight = 1
-            try:
-                block.connections = []
-            except:
-                block.__class__.connections = []
-
-            for connection in self.diagram.connectors:
-                if connection.source != block:
-                    continue
-                block.connections.append(connection)
-            self.blockList.append(block)
+        The weight of a block is the size of the longest path from a block
+        without inputs to it. The connections are indexed once and the
+        weights are computed in a single topological pass (Kahn), so the
+        cost is linear in the number of blocks and connections.
+        """
+        self.layers = []
+        self.block_connections = {}
+        weight = {}
+        in_degree = {}
+        for block in self.diagram.blocks:
+            weight[block.id] = 1
+            in_degree[block.id] = 0
+            self.block_connections[block.id] = []
+
+        for connection in self.diagram.connectors:
+            if connection.source not in in_degree:
+                continue
+            self.block_connections[connection.source].append(connection)
+            if connection.sink in in_degree:
+                in_degree[connection.sink] += 1
 
         # ajusta o peso de cada bloco
-        modification = True
-        while modification:
-            modification = False
-            for block in self.blockList:
-                for connection in block.connections:
-                    for block_target in self.blockList:
-                        if block_target != connection.sink:
-                            continue
-                        weight = block.weight
-                        if block_target.weight < weight + 1:
-                            block_target.weight = weight + 1
-                            modification = True
+        queue = deque()
+        for block in self.diagram.blocks:
+            if in_degree[block.id] == 0:
+                queue.append(block.id)
+        while queue:
+            block_id = queue.popleft()
+            for connection in self.block_connections[block_id]:
+                sink = connection.sink
+                if sink not in in_degree:
+                    continue
+                if weight[sink] < weight[block_id] + 1:
+                    weight[sink] = weight[block_id] + 1
+                in_degree[sink] -= 1
+                if in_degree[sink] == 0:
+                    queue.append(sink)
+
+        # Blocks keep the diagram order inside each layer
+        for block in self.diagram.blocks:
+            if in_degree[block.id] > 0:
+                System.log("Block " + str(block.id) + " is part of a cycle")
+            while len(self.layers) < weight[block.id]:
+                self.layers.append([])
+            self.layers[weight[block.id] - 1].append(block)
 
     # ----------------------------------------------------------------------
-    def __get_max_weight(self):
+    def __generate_parts(self):
         """
-        This method get max weight.
-
-        Returns:
-        
-            * **Types** (:class:`int<int>`)
+        This method generate parts.
         """
-        biggestWeight = -1
-        for block in self.blockList:
-            if block.weight > biggestWeight:
-                biggestWeight = block.weight
-        return biggestWeight
+        for layer in self.layers:
+            for block in layer:
+                self.generate_block_code(block)
 
     # ----------------------------------------------------------------------
-    def __generate_parts(self):
+    def generate_block_code(self, block):
         """
-        This metho generate parts.
+        This method generate the block code.
+
+        If a cache is given, the block is rendered again only if the block,
+        its output connections or its port types changed since the last
+        generation.
+
+            Parameters:
+                * **block** (:class:`BlockSnapshot<mosaicode.model.diagramsnapshot>`)
         """
-        biggestWeight = self.__get_max_weight()
-        for activeWeight in range(biggestWeight):
-            activeWeight += 1
-            for block in self.blockList:
-                if block.weight == activeWeight:
-                    self.generate_block_code(block)
+        if self.cache is None:
+            codes, connections = self.__render_block(block)
+        else:
+            key = self.__get_cache_key(block)
+            cached = self.cache.get(block.id)
+            if cached is not None and cached[0] == key:
+                codes, connections = cached[1], cached[2]
+            else:
+                codes, connections = self.__render_block(block)
+                self.cache[block.id] = (key, codes, connections)
+
+        for code, rendered in zip(self.codes, codes):
+            code.append(rendered)
+        self.connections.append(connections)
 
     # ----------------------------------------------------------------------
-    def replace_key_value(self, plugin, key, value):
-        i = 0
-        for code in plugin.codes:
-            plugin.codes[i] = code.replace(key, value)
-            i += 1
+    def __get_cache_key(self, block):
+        """
+        This method returns everything the code of a block depends on.
+        """
+        ports = []
+        for name, port_type in block.in_ports + block.out_ports:
+            ports.append(System.ports[port_type].var_name)
+        connections = self.block_connections[block.id]
+        for x in connections:
+            ports.append(System.ports[x.conn_type].code)
+        return (block, tuple(connections), tuple(ports))
 
     # ----------------------------------------------------------------------
-    def generate_block_code(self, plugin):
-        """
-        This method generate the block code.
+    def __render_block(self, block):
         """
+        This method renders the codes and the output connections of a block.
 
-        # First we replace in ports
+            Returns:
+                * **Types** (:class:`tuple<tuple>`): list of codes and the
+                  connections code.
+        """
+        templates, keys = self.__get_templates(block)
+        attributes = dict(block.attributes)
+
+        # Properties by their values
+        props = {}
+        for name, value in block.properties:
+            key = "prop[" + name + "]"
+            if key not in props:
+                props[key] = str(value)
+
+        # Ports by their variable names
+        values = {}
         cont = 0
-        for port in plugin.in_ports:
-            my_key = "$in_ports[" + port["name"] + "]$"
-            value = System.ports[port["type"]].var_name
-            value = value.replace("$port_number$", str(cont))
-            value = value.replace("$port_name$", port["name"])
-            value = value.replace("$conn_type$", "i")
-            self.replace_key_value(plugin, my_key, value)
+        for name, port_type in block.in_ports:
+            key = "in_ports[" + name + "]"
+            if key not in values:
+                values[key] = self.__get_port_value(
+                        attributes, props, name, port_type, cont, "i")
             cont += 1
-
-        # Then we replace out ports
         cont = 0
-        for port in plugin.out_ports:
-            my_key = "$out_ports[" + port["name"] + "]$"
-            value = System.ports[port["type"]].var_name
-            value = value.replace("$port_number$", str(cont))
-            value = value.replace("$port_name$", port["name"])
-            value = value.replace("$conn_type$", "o")
-            self.replace_key_value(plugin, my_key, value)
+        for name, port_type in block.out_ports:
+            key = "out_ports[" + name + "]"
+            if key not in values:
+                values[key] = self.__get_port_value(
+                        attributes, props, name, port_type, cont, "o")
             cont += 1
 
+        # Object attributes and properties, only the ones in use
+        for key in keys:
+            if key in values:
+                continue
+            value = self.__get_value(attributes, props, key)
+            if value is not None:
+                values[key] = value
 
-        # First we replace object attributes by their values
-        for key in plugin.__dict__:
-            my_key = "$" + key + "$"
-            value = str(plugin.__dict__[key])
-            self.replace_key_value(plugin, my_key, value)
-
-        # Then we replace properties by their values
-        for prop in plugin.get_properties():
-            my_key = "$prop[" + prop.get("name") + "]$"
-            value = str(prop.get("value"))
-            self.replace_key_value(plugin, my_key, value)
-
-        for code, plugin_code in zip(self.codes, plugin.codes):
-            code.append(plugin_code)
+        codes = []
+        for template in templates:
+            codes.append(template.render(values))
 
         connections = ""
-        for x in plugin.connections:
-            code = System.ports[x.conn_type].code
+        for x in self.block_connections[block.id]:
+            port = System.ports[x.conn_type]
+            template = self.__get_template(("port", x.conn_type), port.code)
             # Replace all connection properties by their values
-            for key in x.__dict__:
-                value = str(x.__dict__[key])
-                my_key = "$" + key + "$"
-                code = code.replace(my_key, value)
-            connections += code
-        self.connections.append(connections)
+            values = {}
+            for key in template.keys:
+                if key in x._fields:
+                    values[key] = str(getattr(x, key))
+            connections += template.render(values)
+        return codes, connections
+
+    # ----------------------------------------------------------------------
+    def __get_template(self, key, text):
+        """
+        This method returns the compiled template of a text.
+
+        Templates are cached by key and compiled again only if the text
+        changes.
+
+            Returns:
+                * **Types** (:class:`TemplateParser<mosaicode.utils.TemplateUtils>`)
+        """
+        cached = CodeGenerator.__templates.get(key)
+        if cached is None or cached.text != text:
+            cached = TemplateParser(text)
+            CodeGenerator.__templates[key] = cached
+        return cached
+
+    # ----------------------------------------------------------------------
+    def __get_templates(self, block):
+        """
+        This method returns the compiled codes of a block type and the
+        placeholders used by them.
+        """
+        templates = []
+        keys = set()
+        count = 0
+        for code in block.codes:
+            template = self.__get_template((block.type, count), code)
+            templates.append(template)
+            keys.update(template.keys)
+            count += 1
+        return templates, keys
+
+    # ----------------------------------------------------------------------
+    def __get_value(self, attributes, props, key):
+        """
+        This method returns the value of a placeholder or None.
+        """
+        if key in props:
+            return props[key]
+        if key in attributes:
+            return str(attributes[key])
+        return None
+
+    # ----------------------------------------------------------------------
+    def __get_port_value(self, attributes, props, name, port_type, number,
+                         conn_type):
+        """
+        This method returns the variable name of a port.
+        """
+        var_name = System.ports[port_type].var_name
+        template = self.__get_template(("var_name", port_type), var_name)
+        values = {"port_number": str(number),
+                  "port_name": name,
+                  "conn_type": conn_type}
+        for key in template.keys:
+            if key in values:
+                continue
+            value = self.__get_value(attributes, props, key)
+            if value is not None:
+                values[key] = value
+        return template.render(values)
 
     # ----------------------------------------------------------------------
     def generate_code(self):
@@ -247,9 +342,18 @@ class CodeGenerator():
         """
 
         System.log("Generating Code")
+        self.connections = []
+        self.codes = [[], [], [], [], []]
         self.__sort_blocks()
         self.__generate_parts()
 
+        # Forget the blocks removed from the diagram
+        if self.cache is not None:
+            ids = set(block.id for block in self.diagram.blocks)
+            for block_id in list(self.cache):
+                if block_id not in ids:
+                    del self.cache[block_id]
+
         code = self.code_template.code
 
         # Replace single code
@@ -311,8 +415,7 @@ class CodeGenerator():
         """
         if name is None:
             name = self.dir_name + self.filename + self.code_template.extension
-            self.__change_directory()
-            self.__return_to_old_directory()
+            self.__make_directory()
         System.log("Saving Code to " + name)
         codeFile = open(name, 'w')
         if code is None:
@@ -321,29 +424,50 @@ class CodeGenerator():
         codeFile.close()
 
     # ----------------------------------------------------------------------
-    def run(self, code = None):
+    def get_command(self):
         """
-        This method runs the code.
+        This method returns the command that runs the code.
+
+        Returns:
+
+            * **Types** (:class:`str<str>`)
         """
         command = self.code_template.command
         command = command.replace("$filename$", self.filename)
         command = command.replace("$extension$", self.code_template.extension)
         command = command.replace("$dir_name$", self.dir_name)
+        return command
 
+    # ----------------------------------------------------------------------
+    def run(self, code=None, execution=None, key=None):
+        """
+        This method saves the code and runs it in a child process, in the
+        directory of the code. It returns at once, the output of the
+        command is shown in the log while it runs.
+
+            Parameters:
+                * **code** (:class:`str<str>`): Code to save instead of
+                  the generated one.
+                * **execution** (:class:`ExecutionControl<mosaicode.control.executioncontrol>`):
+                  Runs the command. A new one is used if None.
+                * **key**: Identifies the run, like the diagram. A run
+                  with the same key is stopped first.
+            Returns:
+                * **Types** (:class:`Job<mosaicode.control.executioncontrol>`)
+        """
+        command = self.get_command()
         self.save_code(code = code)
-        self.__change_directory()
 
         from mosaicode.system import System as System
         System.log("Executing Code: " + command)
 
-        program = Thread(target=os.system, args=(command,))
-        program.start()
-
-        while program.isAlive():
-            program.join(0.4)
-            while Gtk.events_pending():
-                Gtk.main_iteration()
-
-        self.__return_to_old_directory()
+        # GLib is only needed here, code generation runs without GUI
+        from mosaicode.control.executioncontrol import ExecutionControl
+        if execution is None:
+            execution = ExecutionControl()
+        if key is None:
+            key = self.dir_name + self.filename
+        return execution.run(key, command, self.dir_name,
+                             System.properties.run_timeout)
 
 # -------------------------------------------------------------------------
@@ -25,7 +25,35 @@ class CodeTemplateControl():
     # ----------------------------------------------------------------------
     @classmethod
     def load(cls, file_name):
-        CodeTemplatePersistence.load(file_name)
+        return CodeTemplatePersistence.load(file_name)
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def load_xml(cls, parser):
+        """
+        This method loads the code template from a parsed XML file.
+
+        Returns:
+
+            * **Types** (:class:`CodeTemplate<mosaicode.model.codetemplate>`)
+        """
+        return CodeTemplatePersistence.load_xml(parser)
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def get_code_template(cls, language):
+        """
+        This method returns the code template of a language.
+
+        Returns:
+
+            * **Types** (:class:`CodeTemplate<mosaicode.model.codetemplate>`)
+        """
+        from mosaicode.system import System as System
+        for key in System.code_templates:
+            if System.code_templates[key].language == language:
+                return System.code_templates[key]
+        return CodeTemplate()
 
     # ----------------------------------------------------------------------
     @classmethod
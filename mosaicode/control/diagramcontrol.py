@@ -10,8 +10,9 @@ from gi.repository import Gdk
 from mosaicode.utils.XMLUtils import XMLParser
 from mosaicode.system import System as System
 from mosaicode.control.codegenerator import CodeGenerator
-from mosaicode.model.codetemplate import CodeTemplate
+from mosaicode.control.codetemplatecontrol import CodeTemplateControl
 from mosaicode.persistence.diagrampersistence import DiagramPersistence
+from mosaicode.persistence.compactdiagrampersistence import CompactDiagramPersistence
 
 
 class DiagramControl():
@@ -26,12 +27,10 @@ class DiagramControl():
 
     # ----------------------------------------------------------------------
     def get_code_template(self):
-        code_template = CodeTemplate()
-        for key in System.code_templates:
-            if System.code_templates[key].language == self.diagram.language:
-                code_template = System.code_templates[key]
-                break
-        generator = CodeGenerator(self.diagram, code_template)
+        code_template = CodeTemplateControl.get_code_template(
+                self.diagram.language)
+        generator = CodeGenerator(self.diagram, code_template,
+                                  self.diagram.code_cache)
         return generator
 
     # ----------------------------------------------------------------------
@@ -53,9 +52,28 @@ class DiagramControl():
                        "' does not exist!")
             return False
 
-        DiagramPersistence.load(self.diagram)
-        self.diagram.redo_stack = []
-        self.diagram.undo_stack = []
+        try:
+            DiagramPersistence.load(self.diagram)
+        except ValueError as error:
+            System.log(str(error))
+            return False
+        self.diagram.history.clear()
+        return True
+
+    # ----------------------------------------------------------------------
+    def recover(self, file_name, data):
+        """
+        This method loads a diagram kept by the autosave.
+
+            Parameters:
+                * **file_name** (:class:`str<str>`): The file of the diagram.
+                * **data** (:class:`str<str>`): The diagram in the compact
+                  format.
+        """
+        self.diagram.file_name = file_name
+        DiagramPersistence.load(self.diagram,
+                                CompactDiagramPersistence.decode(data))
+        self.diagram.history.clear()
 
     # ----------------------------------------------------------------------
     def save(self, file_name=None):
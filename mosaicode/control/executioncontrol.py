@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+"""
+This module contains the ExecutionControl class.
+"""
+import os
+import time
+import signal
+import subprocess
+from mosaicode.model.job import Job
+from mosaicode.system import System as System
+
+
+class ExecutionControl():
+    """
+    This class runs commands in child processes without blocking the GUI.
+
+    The output of each command is sent to the log line by line, as soon
+    as it is written, through GLib watches. Each command has its own
+    working directory, so the directory of the process never changes.
+    Several commands can run at the same time, one for each key, like
+    the diagram that started it.
+
+    GLib is imported only where it is used, so commands can be started
+    and stopped without a main loop.
+    """
+
+    # Seconds between asking a command to stop and killing it
+    KILL_DELAY = 2
+
+    # Bytes read from an output at a time
+    READ_SIZE = 4096
+
+    # ----------------------------------------------------------------------
+    def __init__(self):
+        self.jobs = {}  # running Job by key
+
+    # ----------------------------------------------------------------------
+    def run(self, key, command, cwd, timeout=0):
+        """
+        This method starts a command. A command running with the same key
+        is stopped first.
+
+            Parameters:
+                * **key**: Identifies the command, like its diagram.
+                * **command** (:class:`str<str>`): Shell command.
+                * **cwd** (:class:`str<str>`): Working directory.
+                * **timeout** (:class:`int<int>`): Seconds before the
+                  command is stopped, 0 to wait until it ends.
+            Returns:
+                * **Types** (:class:`Job<Job>`)
+        """
+        from gi.repository import GLib
+        self.cancel(key)
+        job = ExecutionControl.start(key, command, cwd)
+        self.jobs[key] = job
+        for stream in (job.process.stdout, job.process.stderr):
+            GLib.io_add_watch(stream.fileno(),
+                              GLib.PRIORITY_DEFAULT,
+                              GLib.IO_IN | GLib.IO_HUP | GLib.IO_ERR,
+                              self.__on_output,
+                              job,
+                              stream)
+        if timeout > 0:
+            job.timeout_id = GLib.timeout_add_seconds(timeout,
+                                                      self.__on_timeout,
+                                                      job)
+        return job
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def start(cls, key, command, cwd):
+        """
+        This method starts a command without reading its output.
+
+            Parameters:
+                * **key**: Identifies the command, like its diagram.
+                * **command** (:class:`str<str>`): Shell command.
+                * **cwd** (:class:`str<str>`): Working directory.
+            Returns:
+                * **Types** (:class:`Job<Job>`)
+        """
+        # A new session, so the command and its children can be stopped
+        # together
+        null = open(os.devnull)
+        try:
+            process = subprocess.Popen(command,
+                                       shell=True,
+                                       cwd=cwd,
+                                       stdin=null,
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE,
+                                       close_fds=True,
+                                       preexec_fn=os.setsid)
+        finally:
+            null.close()
+        return Job(key, command, process)
+
+    # ----------------------------------------------------------------------
+    def is_running(self, key):
+        """
+        This method tells if a command is running.
+
+            Returns:
+                * **Types** (:class:`boolean<boolean>`)
+        """
+        return key in self.jobs
+
+    # ----------------------------------------------------------------------
+    def cancel(self, key):
+        """
+        This method stops a command.
+
+            Returns:
+                * **Types** (:class:`boolean<boolean>`): False if there was
+                  no command running with this key.
+        """
+        job = self.jobs.get(key)
+        if job is None:
+            return False
+        self.__stop(job, "cancelled")
+        return True
+
+    # ----------------------------------------------------------------------
+    def cancel_all(self):
+        """
+        This method stops all commands.
+        """
+        for key in list(self.jobs):
+            self.cancel(key)
+
+    # ----------------------------------------------------------------------
+    def stop_all(self, timeout=None):
+        """
+        This method stops all commands and waits for them to end. It is
+        used on exit, when the main loop will not run to kill them later.
+
+            Parameters:
+                * **timeout** (:class:`int<int>`): Seconds to wait before
+                  the commands are killed, KILL_DELAY if None.
+        """
+        if timeout is None:
+            timeout = ExecutionControl.KILL_DELAY
+        jobs = self.jobs.values()
+        self.jobs.clear()
+        for job in jobs:
+            self.__signal(job, signal.SIGTERM)
+        end = time.time() + timeout
+        for job in jobs:
+            while job.process.poll() is None and time.time() < end:
+                time.sleep(0.05)
+        # Children of the commands that ignored SIGTERM are still in
+        # their groups
+        for job in jobs:
+            self.__signal(job, signal.SIGKILL)
+            job.process.wait()
+
+    # ----------------------------------------------------------------------
+    def __stop(self, job, reason):
+        from gi.repository import GLib
+        if job.stopped is not None:
+            return
+        job.stopped = reason
+        self.__signal(job, signal.SIGTERM)
+        GLib.timeout_add_seconds(ExecutionControl.KILL_DELAY,
+                                 self.__kill,
+                                 job)
+
+    # ----------------------------------------------------------------------
+    def __kill(self, job):
+        if job.process.poll() is None:
+            self.__signal(job, signal.SIGKILL)
+        return False
+
+    # ----------------------------------------------------------------------
+    def __signal(self, job, sig):
+        try:
+            os.killpg(job.process.pid, sig)
+        except OSError:
+            pass
+
+    # ----------------------------------------------------------------------
+    def __on_timeout(self, job):
+        job.timeout_id = None
+        self.__stop(job, "timed out")
+        return False
+
+    # ----------------------------------------------------------------------
+    def __on_output(self, fd, condition, job, stream):
+        from gi.repository import GLib
+        data = ""
+        if condition & GLib.IO_IN:
+            data = os.read(fd, ExecutionControl.READ_SIZE)
+        for line in job.read(stream, data):
+            System.log(line)
+        if data:
+            return True
+
+        # The command closed this output
+        stream.close()
+        job.open_streams -= 1
+        if job.open_streams == 0 and self.__wait(job):
+            GLib.timeout_add(100, self.__wait, job)
+        return False
+
+    # ----------------------------------------------------------------------
+    def __wait(self, job):
+        """
+        This method checks if the command ended.
+
+            Returns:
+                * **Types** (:class:`boolean<boolean>`): True while it runs.
+        """
+        from gi.repository import GLib
+        code = job.process.poll()
+        if code is None:
+            return True
+        if job.timeout_id is not None:
+            GLib.source_remove(job.timeout_id)
+            job.timeout_id = None
+        if self.jobs.get(job.key) is job:
+            del self.jobs[job.key]
+        elapsed = time.time() - job.start
+        if job.stopped is not None:
+            System.log("Execution %s after %.1fs" % (job.stopped, elapsed))
+        else:
+            System.log("Execution finished with code %d after %.1fs" %
+                       (code, elapsed))
+        return False
+
+# ----------------------------------------------------------------------
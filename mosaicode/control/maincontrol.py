@@ -5,6 +5,7 @@ This module contains the MainControl class.
 import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk
+from gi.repository import GLib
 from mosaicode.GUI.dialog import Dialog
 from mosaicode.GUI.about import About
 from mosaicode.GUI.diagram import Diagram
@@ -14,6 +15,10 @@ from mosaicode.GUI.pluginmanager import PluginManager
 from mosaicode.GUI.portmanager import PortManager
 from mosaicode.GUI.preferencewindow import PreferenceWindow
 from mosaicode.control.diagramcontrol import DiagramControl
+from mosaicode.control.autosavecontrol import AutosaveControl
+from mosaicode.control.executioncontrol import ExecutionControl
+from mosaicode.model.diagramsnapshot import DiagramSnapshot
+from mosaicode.persistence.journalpersistence import JournalPersistence
 from mosaicode.system import System as System
 from mosaicode.persistence.preferencespersistence import PreferencesPersistence
 from mosaicode.control.portcontrol import PortControl
@@ -33,6 +38,100 @@ class MainControl():
         self.main_window = main_window
         # It must be possible to exchange data between diagrams
         self.clipboard = []
+        self.autosave = AutosaveControl()
+        self.__autosaved = {}  # changes autosaved by diagram key
+        self.execution = ExecutionControl()  # runs of the diagrams
+
+    # ----------------------------------------------------------------------
+    def start_autosave(self):
+        """
+        This method offers to recover the diagrams left by a crash and
+        starts the autosave.
+        """
+        journals = []  # (journal, entries) left by a crash
+        for journal in JournalPersistence.get_orphans():
+            try:
+                journals.append((journal, JournalPersistence.load(journal)))
+            except IOError:
+                pass
+        recover = False
+        discard = False
+        if any(entries for journal, entries in journals):
+            dialog = Dialog().confirm_dialog(
+                    _("Mosaicode was not closed properly.\n"
+                      "Recover the unsaved diagrams?"), self.main_window)
+            recover = dialog.run() == Gtk.ResponseType.OK
+            dialog.destroy()
+            if not recover:
+                dialog = Dialog().confirm_dialog(
+                        _("Discard the unsaved diagrams?\n"
+                          "If they are kept, they are offered again at "
+                          "the next start."), self.main_window)
+                discard = dialog.run() == Gtk.ResponseType.OK
+                dialog.destroy()
+        # Journals are deleted only when nothing in them can be lost
+        for journal, entries in journals:
+            done = discard or not entries
+            if recover:
+                done = True
+                for key, saved, file_name, data in entries:
+                    done = self.__recover(file_name, data) and done
+            if done:
+                JournalPersistence.delete(journal)
+            elif journal == self.autosave.file_name:
+                JournalPersistence.set_aside(journal)
+
+        if System.properties.autosave_interval > 0:
+            self.autosave.start()
+            GLib.timeout_add_seconds(System.properties.autosave_interval,
+                                     self.__autosave)
+
+    # ----------------------------------------------------------------------
+    def __recover(self, file_name, data):
+        """
+        This method opens a diagram kept by the autosave.
+
+            Returns:
+                * **Types** (:class:`boolean<boolean>`): False if it could
+                  not be read.
+        """
+        diagram = Diagram(self.main_window)
+        self.main_window.work_area.add_diagram(diagram)
+        recovered = True
+        try:
+            DiagramControl(diagram).recover(file_name, data)
+        except Exception as e:
+            System.log("Could not recover " + file_name + ": " + str(e))
+            recovered = False
+        diagram.set_file_name(file_name)
+        diagram.set_modified(True)
+        diagram.history.set_saved(False)  # it differs from the file
+        return recovered
+
+    # ----------------------------------------------------------------------
+    def __autosave(self):
+        """
+        This method sends the diagrams changed since the last autosave to
+        the autosave thread. Only the snapshots are taken here.
+        """
+        keys = set()
+        for diagram in self.main_window.work_area.get_diagrams():
+            key = str(id(diagram))
+            keys.add(key)
+            if not diagram.modified:
+                if key in self.__autosaved:
+                    del self.__autosaved[key]
+                    self.autosave.remove(key)
+                continue
+            if self.__autosaved.get(key) == diagram.changes:
+                continue
+            self.__autosaved[key] = diagram.changes
+            self.autosave.save(key, DiagramSnapshot.from_diagram(diagram))
+        # Closed diagrams
+        for key in set(self.__autosaved) - keys:
+            del self.__autosaved[key]
+            self.autosave.remove(key)
+        return True
 
     # ----------------------------------------------------------------------
     def new(self):
@@ -60,8 +159,12 @@ class MainControl():
         """
         diagram = Diagram(self.main_window)
         self.main_window.work_area.add_diagram(diagram)
-        DiagramControl(diagram).load(file_name)
+        loaded = DiagramControl(diagram).load(file_name)
         diagram.set_modified(False)
+        if not loaded:
+            # Saving an empty tab would overwrite the file that failed
+            self.main_window.work_area.close_tab()
+            return
         MainControl.add_recent_file(System.properties, file_name)
         self.main_window.menu.update_recent_file()
 
@@ -88,7 +191,7 @@ class MainControl():
                         title = _("Save Diagram"),
                         filename = diagram.file_name,
                         filetype = "mscd")
-                if name and not name.endswith("mscd"):
+                if name and not name.endswith(("mscd", "mscdb")):
                     name = (("%s" + ".mscd") % name)
                 if Dialog().confirm_overwrite(name, self.main_window):
                     diagram.set_file_name(name)
@@ -148,6 +251,9 @@ class MainControl():
         """
         PreferencesPersistence.save(System.properties)
         if self.main_window.work_area.close_tabs():
+            self.execution.stop_all()
+            self.autosave.stop()
+            JournalPersistence.delete(self.autosave.file_name)
             Gtk.main_quit()
         else:
             return True
@@ -228,7 +334,19 @@ class MainControl():
         diagram = self.main_window.work_area.get_current_diagram()
         if diagram is None:
             return
-        DiagramControl(diagram).get_code_template().run(code = code)
+        DiagramControl(diagram).get_code_template().run(
+                code=code, execution=self.execution, key=str(id(diagram)))
+
+    # ----------------------------------------------------------------------
+    def stop(self):
+        """
+        This method stops the run of the current diagram.
+        """
+        diagram = self.main_window.work_area.get_current_diagram()
+        if diagram is None:
+            return
+        if not self.execution.cancel(str(id(diagram))):
+            System.log(_("Nothing is running"))
 
     # ----------------------------------------------------------------------
     def save_source(self, code = None):
@@ -304,6 +422,11 @@ class MainControl():
         diagram = self.main_window.work_area.get_current_diagram()
         if diagram is None:
             return False
+        if not block.is_usable():
+            message = "This block could not be read from its file.\n" + \
+                "See the log for details."
+            Dialog().message_dialog("Error", message, self.main_window)
+            return False
         if not diagram.add_block(block):
             message = "Block language is different from diagram language.\n" +\
                 "Diagram is expecting to generate " + diagram.language + \
@@ -391,6 +514,7 @@ class MainControl():
         if diagram is None:
             return
         diagram.update_scrolling()
+        diagram.update_flows()
 
     # ----------------------------------------------------------------------
     def align_top(self):
@@ -497,22 +621,33 @@ class MainControl():
     # ----------------------------------------------------------------------
     @classmethod
     def print_ports(cls):
+        System()
         for port in System.ports:
             print "--------------------- "
             PortControl.print_port(System.ports[port])
     # ----------------------------------------------------------------------
     @classmethod
     def print_plugins(cls):
+        System()
         for plugin in System.plugins:
             print "--------------------- "
             BlockControl.print_plugin(System.plugins[plugin])
     # ----------------------------------------------------------------------
     @classmethod
     def print_templates(cls):
+        System()
         for template in System.code_templates:
             print "--------------------- "
             CodeTemplateControl.print_template(System.code_templates[template])
 
+    # ----------------------------------------------------------------------
+    @classmethod
+    def print_load_times(cls):
+        System()
+        print "   Time  Items  Package"
+        for package, count, elapsed in System.load_times:
+            print "%6.3fs %6d  %s" % (elapsed, count, package)
+
     # ----------------------------------------------------------------------
     @classmethod
     def export_extensions(cls, extension):
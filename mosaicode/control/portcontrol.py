@@ -33,7 +33,19 @@ class PortControl():
 
             * **Types** (:class:`boolean<boolean>`)
         """
-        PortPersistence.load(file_name)
+        return PortPersistence.load(file_name)
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def load_xml(cls, parser):
+        """
+        This method loads the port from a parsed XML file.
+
+        Returns:
+
+            * **Types** (:class:`Port<mosaicode.model.port>`)
+        """
+        return PortPersistence.load_xml(parser)
 
     # ----------------------------------------------------------------------
     @classmethod
@@ -3,6 +3,21 @@
 
 
 class ConnectionModel(object):
+    """
+    This class contains the attributes of a connection between two blocks.
+
+    The attributes are kept in slots, as a diagram may have many thousands
+    of connections. The Connector of the GUI can not inherit the slots,
+    because of the layout of GooCanvas items, and sets the same
+    attributes itself.
+    """
+    __slots__ = (
+            "source",
+            "source_port",
+            "conn_type",
+            "sink",
+            "sink_port",
+            "diagram")
 
     # -------------------------------------------------------------------------
     def __init__(self, diagram, source, source_port, conn_type):
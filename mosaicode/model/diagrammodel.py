@@ -1,6 +1,11 @@
 # -*- coding: utf-8 -*-
 
+from collections import OrderedDict
+from collections import deque
+from contextlib import contextmanager
 from mosaicode.model.connectionmodel import ConnectionModel as ConnectionModel
+from mosaicode.model.history import History
+from mosaicode.model.plugin import Plugin
 from mosaicode.system import System as System
 
 class DiagramModel(object):
@@ -9,17 +14,398 @@ class DiagramModel(object):
     def __init__(self):
         self.last_id = 1  # first block is n1, increments to each new block
         self.blocks = {}  # GUI blocks
-        self.connectors = []
+        self.connectors = []  # also builds the connection indexes
         self.zoom = 1.0  # pixels per unit
         self.file_name = "Untitled"
         self.modified = False
+        self.changes = 0  # increased by each change, to tell saved states
         self.language = None
-        self.undo_stack = []
-        self.redo_stack = []
+        self.history = History()  # undo and redo
+        self.curr_connector = None
+        self.code_cache = {}  # rendered code by block id
+        self.__batch_depth = 0
 
     # ----------------------------------------------------------------------
     @property
     def patch_name(self):
         return self.file_name.split("/").pop()
 
+    # ----------------------------------------------------------------------
+    @contextmanager
+    def batch(self, msg="Batch"):
+        """
+        This method groups many changes to the diagram.
+
+        Inside the block, the changes make a single undo entry and the work
+        done after each change, like updating the GUI, is left to
+        end_batch, called once at the end. Batches can be nested.
+
+            Usage:
+                with diagram.batch():
+                    diagram.add_block(plugin)
+
+            Parameters:
+                * **msg** (:class:`str<str>`): message of the undo entry.
+        """
+        self.__batch_depth += 1
+        self.history.begin(msg)
+        try:
+            yield self
+        finally:
+            self.history.end()
+            self.__batch_depth -= 1
+            if self.__batch_depth == 0:
+                self.end_batch()
+
+    # ----------------------------------------------------------------------
+    def in_batch(self):
+        """
+        This method tells if a batch of changes is running.
+
+            Returns:
+                * **Types** (:class:`boolean<boolean>`)
+        """
+        return self.__batch_depth > 0
+
+    # ----------------------------------------------------------------------
+    def end_batch(self):
+        """
+        This method is called when the outer batch ends.
+        """
+        pass
+
+    # ----------------------------------------------------------------------
+    def set_modified(self, state):
+        """
+        This method sets if the diagram has changes that were not saved.
+
+            Parameters:
+                * **state** (:class:`boolean<boolean>`)
+        """
+        self.modified = state
+        if state:
+            self.changes += 1
+        else:
+            self.history.set_saved(True)
+
+    # ----------------------------------------------------------------------
+    @property
+    def connectors(self):
+        """
+        The connections of the diagram, in the order they were made.
+
+        Use add_connection and remove_connection to change them, so the
+        indexes are kept up to date.
+        """
+        if self.__connector_list is None:
+            self.__connector_list = list(self.__connectors)
+        return self.__connector_list
+
+    @connectors.setter
+    def connectors(self, connectors):
+        # Connections in order, for removals in constant time. The list
+        # is only built again when asked for after a removal.
+        self.__connectors = OrderedDict()
+        self.__connector_list = []
+        self.__outputs = {}  # connections by source block
+        self.__inputs = {}  # connections by sink block
+        self.__output_ports = {}  # connections by (source block, port)
+        self.__input_ports = {}  # connections by (sink block, port)
+        # Topological order of the connected blocks (Pearce-Kelly)
+        self.__order = {}
+        self.__next_order = 0
+        # Connections that do not follow the order, like the ones that
+        # close a cycle
+        self.__back_edges = set()
+        for connection in connectors:
+            self.add_connection(connection)
+
+    # ----------------------------------------------------------------------
+    def __index(self, index, key, connection):
+        if key not in index:
+            index[key] = []
+        index[key].append(connection)
+
+    # ----------------------------------------------------------------------
+    def __unindex(self, index, key, connection):
+        connections = index.get(key)
+        if connections is None or connection not in connections:
+            return
+        connections.remove(connection)
+        if not connections:
+            del index[key]
+
+    # ----------------------------------------------------------------------
+    def add_connection(self, connection):
+        """
+        This method adds a connection to the diagram and to the indexes.
+
+            Parameters:
+                * **connection** (:class:`ConnectionModel<mosaicode.model.connectionmodel>`)
+        """
+        if connection in self.__connectors:
+            return
+        self.__connectors[connection] = None
+        if self.__connector_list is not None:
+            self.__connector_list.append(connection)
+        source, sink = connection.source, connection.sink
+        self.__index(self.__outputs, source, connection)
+        self.__index(self.__inputs, sink, connection)
+        self.__index(self.__output_ports,
+                     (source, connection.source_port), connection)
+        self.__index(self.__input_ports,
+                     (sink, connection.sink_port), connection)
+        self.__update_order(connection)
+
+    # ----------------------------------------------------------------------
+    def remove_connection(self, connection):
+        """
+        This method removes a connection from the diagram and the indexes.
+
+            Parameters:
+                * **connection** (:class:`ConnectionModel<mosaicode.model.connectionmodel>`)
+            Returns:
+                * **Types** (:class:`boolean<boolean>`): False if the
+                  connection is not in the diagram.
+        """
+        if connection not in self.__connectors:
+            return False
+        del self.__connectors[connection]
+        self.__connector_list = None
+        source, sink = connection.source, connection.sink
+        self.__unindex(self.__outputs, source, connection)
+        self.__unindex(self.__inputs, sink, connection)
+        self.__unindex(self.__output_ports,
+                       (source, connection.source_port), connection)
+        self.__unindex(self.__input_ports,
+                       (sink, connection.sink_port), connection)
+        for block in (source, sink):
+            if block not in self.__outputs and block not in self.__inputs:
+                self.__order.pop(block, None)
+        # Removing a connection never breaks the order, but it can remove
+        # the last cycle
+        if self.__back_edges:
+            self.__back_edges.discard(connection)
+            self.__rebuild_order()
+        return True
+
+    # ----------------------------------------------------------------------
+    def __get_order(self, block):
+        if block not in self.__order:
+            self.__order[block] = self.__next_order
+            self.__next_order += 1
+        return self.__order[block]
+
+    # ----------------------------------------------------------------------
+    def __search(self, start, index, follow, accept):
+        """
+        This method returns the blocks reached from start following the
+        connections of an index, without recursion.
+        """
+        visited = set([start])
+        stack = [start]
+        while stack:
+            block = stack.pop()
+            for connection in index.get(block, ()):
+                adjacent = getattr(connection, follow)
+                if adjacent in visited or not accept(adjacent):
+                    continue
+                visited.add(adjacent)
+                stack.append(adjacent)
+        return visited
+
+    # ----------------------------------------------------------------------
+    def __update_order(self, connection):
+        """
+        This method keeps the topological order after a new connection.
+
+        Only the blocks between the sink and the source in the current
+        order are visited and renumbered (Pearce-Kelly algorithm).
+        """
+        source, sink = connection.source, connection.sink
+        lower = self.__get_order(sink)
+        upper = self.__get_order(source)
+        if lower > upper:
+            return
+        if self.__back_edges:
+            # The searches below would follow the cycles, so the order is
+            # only rebuilt when they are removed
+            self.__back_edges.add(connection)
+            return
+        order = self.__order
+        forward = self.__search(sink, self.__outputs, "sink",
+                                lambda block: order[block] <= upper)
+        if source in forward:
+            self.__back_edges.add(connection)
+            return
+        backward = self.__search(source, self.__inputs, "source",
+                                 lambda block: order[block] >= lower)
+        blocks = sorted(backward, key=order.get) + \
+            sorted(forward, key=order.get)
+        positions = sorted(order[block] for block in blocks)
+        for block, position in zip(blocks, positions):
+            order[block] = position
+
+    # ----------------------------------------------------------------------
+    def __rebuild_order(self):
+        """
+        This method computes the topological order of all the connected
+        blocks again (Kahn algorithm). The blocks in a cycle, or after one,
+        are put at the end and their connections out of order become back
+        edges.
+        """
+        old_order = self.__order
+        blocks = sorted(set(self.__outputs) | set(self.__inputs),
+                        key=lambda block: old_order.get(block, 0))
+        degree = {}
+        for block in blocks:
+            degree[block] = len(self.__inputs.get(block, ()))
+        ready = deque(block for block in blocks if degree[block] == 0)
+        order = {}
+        while ready:
+            block = ready.popleft()
+            order[block] = len(order)
+            for connection in self.__outputs.get(block, ()):
+                degree[connection.sink] -= 1
+                if degree[connection.sink] == 0:
+                    ready.append(connection.sink)
+        for block in blocks:
+            if block not in order:
+                order[block] = len(order)
+        self.__order = order
+        self.__next_order = len(order)
+        self.__back_edges = set(
+                connection for connection in self.__connectors
+                if order[connection.source] >= order[connection.sink])
+
+    # ----------------------------------------------------------------------
+    def creates_cycle(self, source, sink):
+        """
+        This method tells if a connection from source to sink would close
+        a cycle, that is, if source can be reached from sink.
+
+        While the diagram has no cycle, sinks after the source in the
+        topological order are accepted at once, and otherwise only the
+        blocks up to the source are visited.
+
+            Returns:
+                * **Types** (:class:`boolean<boolean>`)
+        """
+        if source == sink:
+            return True
+        if sink not in self.__outputs or source not in self.__inputs:
+            return False
+        if self.__back_edges:
+            accept = lambda block: True
+        else:
+            upper = self.__order[source]
+            if self.__order[sink] > upper:
+                return False
+            order = self.__order
+            accept = lambda block: order[block] <= upper
+        return source in self.__search(sink, self.__outputs, "sink", accept)
+
+    # ----------------------------------------------------------------------
+    def get_input_connections(self, block, port=None):
+        """
+        This method returns the connections that arrive at a block, or at
+        one of its input ports.
+
+            Returns:
+                * **Types** (:class:`tuple<tuple>`)
+        """
+        if port is None:
+            return tuple(self.__inputs.get(block, ()))
+        return tuple(self.__input_ports.get((block, port), ()))
+
+    # ----------------------------------------------------------------------
+    def get_output_connections(self, block, port=None):
+        """
+        This method returns the connections that leave a block, or one of
+        its output ports.
+
+            Returns:
+                * **Types** (:class:`tuple<tuple>`)
+        """
+        if port is None:
+            return tuple(self.__outputs.get(block, ()))
+        return tuple(self.__output_ports.get((block, port), ()))
+
+    # ----------------------------------------------------------------------
+    def get_connections(self, block):
+        """
+        This method returns all the connections of a block.
+
+            Returns:
+                * **Types** (:class:`list<list>`)
+        """
+        connections = list(self.get_output_connections(block))
+        for connection in self.get_input_connections(block):
+            if connection.source != block:
+                connections.append(connection)
+        return connections
+
+    # ----------------------------------------------------------------------
+    def insert_block(self, block):
+        if self.language is not None and self.language != block.language:
+            System.log("Block language is different from diagram language.")
+            return False
+        if self.language is None or self.language == 'None':
+            self.language = block.language
+
+        self.last_id = max(int(self.last_id), int(block.id))
+        if block.id < 0:
+            block.id = self.last_id
+        self.blocks[block.id] = block
+        self.last_id += 1
+        return True
+
+    # ----------------------------------------------------------------------
+    def add_block(self, plugin):
+        """
+        This method add a block in the diagram model, without GUI.
+
+            Parameters:
+                * **plugin**
+            Returns:
+                * **Types** (:class:`boolean<boolean>`)
+        """
+        if not plugin.is_usable():
+            return False
+        return self.insert_block(Plugin(plugin))
+
+    # ----------------------------------------------------------------------
+    def start_connection(self, block, output):
+        """
+        This method start a connection in the diagram model, without GUI.
+
+            Parameters:
+                * **block**
+                * **output**
+        """
+        self.curr_connector = None
+        if output >= len(block.out_ports):
+            return
+        conn_type = block.out_ports[output]["type"]
+        self.curr_connector = ConnectionModel(self, block, output, conn_type)
+
+    # ----------------------------------------------------------------------
+    def end_connection(self, block, block_input):
+        """
+        This method end a connection in the diagram model, without GUI.
+
+            Parameters:
+                * **block**
+                * **block_input**
+            Returns:
+                * **Types** (:class:`boolean<boolean>`)
+        """
+        if self.curr_connector is None:
+            return False
+        self.curr_connector.sink = block
+        self.curr_connector.sink_port = block_input
+        self.add_connection(self.curr_connector)
+        self.curr_connector = None
+        return True
+
 # ----------------------------------------------------------------------
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+This module contains the DiagramSnapshot class.
+"""
+from collections import namedtuple
+
+# Attribute values that are copied to the snapshot
+SCALAR_TYPES = (str, unicode, int, long, float, bool)
+
+BlockSnapshot = namedtuple("BlockSnapshot", [
+        "id",
+        "type",
+        "x",
+        "y",
+        "attributes",  # ((name, value), ...) scalar attributes
+        "properties",  # ((name, value), ...)
+        "in_ports",  # ((name, type), ...)
+        "out_ports",  # ((name, type), ...)
+        "codes"])
+
+ConnectionSnapshot = namedtuple("ConnectionSnapshot", [
+        "source",
+        "source_port",
+        "sink",
+        "sink_port",
+        "conn_type"])
+
+
+class DiagramSnapshot(namedtuple("DiagramSnapshot", [
+        "file_name",
+        "language",
+        "zoom",
+        "blocks",
+        "connectors"])):
+    """
+    This class is an immutable copy of a diagram.
+
+    It holds only ids, types, positions, properties and connections, so it
+    is cheap to build, can be shared between threads and processes and
+    can not change the diagram it came from.
+    """
+    __slots__ = ()
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def from_diagram(cls, diagram):
+        """
+        This method creates a snapshot of a diagram.
+
+            Parameters:
+                * **diagram** (:class:`DiagramModel<mosaicode.model.diagrammodel>`)
+            Returns:
+                * **Types** (:class:`DiagramSnapshot<DiagramSnapshot>`)
+        """
+        blocks = []
+        for block_id in diagram.blocks:
+            blocks.append(DiagramSnapshot.get_block(diagram.blocks[block_id]))
+        connectors = []
+        for conn in diagram.connectors:
+            if conn.sink is None:
+                continue
+            connectors.append(ConnectionSnapshot(
+                    conn.source.id,
+                    conn.source_port,
+                    conn.sink.id,
+                    conn.sink_port,
+                    conn.conn_type))
+        return cls(diagram.file_name,
+                   diagram.language,
+                   diagram.zoom,
+                   tuple(blocks),
+                   tuple(connectors))
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def get_block(cls, block):
+        """
+        This method creates a snapshot of a block.
+
+            Returns:
+                * **Types** (:class:`BlockSnapshot<BlockSnapshot>`)
+        """
+        attributes = []
+        for key in block.PLACEHOLDERS:
+            value = getattr(block, key, None)
+            if isinstance(value, SCALAR_TYPES):
+                attributes.append((key, value))
+        if hasattr(block, "get_position"):
+            x, y = block.get_position()
+        else:
+            x, y = block.x, block.y
+        properties = []
+        for prop in block.get_properties():
+            properties.append((prop.get("name"), prop.get("value")))
+        return BlockSnapshot(
+                block.id,
+                block.type,
+                x,
+                y,
+                tuple(attributes),
+                tuple(properties),
+                tuple((port["name"], port["type"]) for port in block.in_ports),
+                tuple((port["name"], port["type"]) for port in block.out_ports),
+                tuple(block.codes))
+
+    # ----------------------------------------------------------------------
+    @property
+    def patch_name(self):
+        return self.file_name.split("/").pop()
+
+# ----------------------------------------------------------------------
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+"""
+This module contains the History class.
+"""
+import sys
+
+
+class History(object):
+    """
+    This class contains the undo and redo history of a diagram.
+
+    Each entry has a message and the operations made by one action. An
+    operation is a tuple with its name and arguments, like
+    ("move", block, x, y). The history only stores them, the diagram
+    applies each operation and its inverse.
+    """
+
+    # ----------------------------------------------------------------------
+    def __init__(self, max_entries=100, max_size=16 * 1024 * 1024):
+        self.max_entries = max_entries  # entries kept in the undo stack
+        self.max_size = max_size  # estimated bytes kept in both stacks
+        self.undo_stack = []
+        self.redo_stack = []
+        self.size = 0
+        self.saved = 0  # undo stack length of the saved file, or None
+        self.__group = None
+        self.__depth = 0
+        self.__closed = True
+        self.__locked = False
+
+    # ----------------------------------------------------------------------
+    def clear(self):
+        """
+        This method forgets all entries. The current state is the saved one.
+        """
+        self.undo_stack = []
+        self.redo_stack = []
+        self.size = 0
+        self.saved = 0
+        self.__closed = True
+
+    # ----------------------------------------------------------------------
+    def set_saved(self, state):
+        """
+        This method sets if the current state is the one in the file.
+
+            Parameters:
+                * **state** (:class:`boolean<boolean>`): False if no state
+                  of the history is the one in the file.
+        """
+        if state:
+            self.saved = len(self.undo_stack)
+            self.__closed = True
+        else:
+            self.saved = None
+
+    # ----------------------------------------------------------------------
+    def is_saved(self):
+        """
+        This method returns if the current state is the one in the file.
+
+        Once the entries that lead to it are trimmed or replaced, the saved
+        state cannot be reached by undo or redo anymore.
+
+            Returns:
+                * **Types** (:class:`boolean<boolean>`)
+        """
+        return self.saved == len(self.undo_stack)
+
+    # ----------------------------------------------------------------------
+    def begin(self, msg):
+        """
+        This method starts an entry for an action made of many operations.
+
+        Operations added until the matching call to end are undone
+        together. Nested calls are part of the outer entry.
+
+            Parameters:
+                * **msg** (:class:`str<str>`)
+        """
+        if self.__depth == 0:
+            self.__group = [msg, [], 0]
+        self.__depth += 1
+
+    # ----------------------------------------------------------------------
+    def end(self):
+        """
+        This method ends the entry started by begin.
+        """
+        if self.__depth == 0:
+            return
+        self.__depth -= 1
+        if self.__depth > 0:
+            return
+        group = self.__group
+        self.__group = None
+        if group[1]:
+            self.__push(group)
+
+    # ----------------------------------------------------------------------
+    def close(self):
+        """
+        This method stops merging operations into the last entry.
+        """
+        self.__closed = True
+
+    # ----------------------------------------------------------------------
+    def add(self, msg, operation, merge=False):
+        """
+        This method adds an operation to the history.
+
+        If merge is True and the last entry has the same message and was
+        not closed, the operation joins it. Moves of the same block are
+        summed, so dragging a block makes a single small entry.
+
+        Operations made while undoing or redoing are ignored.
+
+            Parameters:
+                * **msg** (:class:`str<str>`)
+                * **operation** (:class:`tuple<tuple>`)
+                * **merge** (:class:`boolean<boolean>`)
+            Returns:
+                * **Types** (:class:`boolean<boolean>`): True if a new
+                  entry was created.
+        """
+        if self.__locked:
+            return False
+        size = self.get_size(operation)
+        if self.__group is not None:
+            self.__group[1].append(operation)
+            self.__group[2] += size
+            return False
+        if merge and not self.__closed and self.undo_stack and \
+                self.undo_stack[-1][0] == msg:
+            self.__merge(self.undo_stack[-1], operation, size)
+            return False
+        self.__push([msg, [operation], size])
+        self.__closed = not merge
+        return True
+
+    # ----------------------------------------------------------------------
+    def __merge(self, entry, operation, size):
+        if self.saved == len(self.undo_stack):
+            self.saved = None  # the saved state is changed
+        if operation[0] == "move":
+            for index, old in enumerate(entry[1]):
+                if old[0] == "move" and old[1] is operation[1]:
+                    entry[1][index] = ("move", old[1],
+                                       old[2] + operation[2],
+                                       old[3] + operation[3])
+                    return
+        entry[1].append(operation)
+        entry[2] += size
+        self.size += size
+        self.__trim()
+
+    # ----------------------------------------------------------------------
+    def __push(self, entry):
+        if self.saved is not None and self.saved > len(self.undo_stack):
+            self.saved = None  # it was in the redo stack
+        self.undo_stack.append(entry)
+        self.size += entry[2]
+        for old in self.redo_stack:
+            self.size -= old[2]
+        self.redo_stack = []
+        self.__trim()
+
+    # ----------------------------------------------------------------------
+    def __trim(self):
+        # The last entry is kept even if it is bigger than the limit
+        while len(self.undo_stack) > 1 and \
+                (len(self.undo_stack) > self.max_entries or
+                 self.size > self.max_size):
+            self.size -= self.undo_stack.pop(0)[2]
+            if self.saved is not None:
+                self.saved -= 1
+                if self.saved < 0:
+                    self.saved = None
+
+    # ----------------------------------------------------------------------
+    def undo(self, apply):
+        """
+        This method undoes the last entry.
+
+        The operations are given to apply, from the last to the first,
+        with undo set to True.
+
+            Parameters:
+                * **apply** (:class:`function<function>`): apply(operation, undo)
+            Returns:
+                * **Types** (:class:`str<str>`): The message of the entry or
+                  None if there is nothing to undo.
+        """
+        if not self.undo_stack:
+            return None
+        entry = self.undo_stack.pop()
+        self.__apply(apply, reversed(entry[1]), True)
+        self.redo_stack.append(entry)
+        self.__closed = True
+        return entry[0]
+
+    # ----------------------------------------------------------------------
+    def redo(self, apply):
+        """
+        This method redoes the last undone entry.
+
+            Parameters:
+                * **apply** (:class:`function<function>`): apply(operation, undo)
+            Returns:
+                * **Types** (:class:`str<str>`): The message of the entry or
+                  None if there is nothing to redo.
+        """
+        if not self.redo_stack:
+            return None
+        entry = self.redo_stack.pop()
+        self.__apply(apply, entry[1], False)
+        self.undo_stack.append(entry)
+        self.__closed = True
+        return entry[0]
+
+    # ----------------------------------------------------------------------
+    def __apply(self, apply, operations, undo):
+        self.__locked = True
+        try:
+            for operation in operations:
+                apply(operation, undo)
+        finally:
+            self.__locked = False
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def get_size(cls, value):
+        """
+        This method estimates the memory used by an operation.
+
+        Strings and containers are measured with their contents. Other
+        objects, like blocks, are shared with the diagram and count only
+        their own size.
+
+            Returns:
+                * **Types** (:class:`int<int>`)
+        """
+        size = sys.getsizeof(value)
+        if isinstance(value, dict):
+            for key in value:
+                size += cls.get_size(key) + cls.get_size(value[key])
+        elif isinstance(value, (tuple, list)):
+            for item in value:
+                size += cls.get_size(item)
+        return size
+
+# ----------------------------------------------------------------------
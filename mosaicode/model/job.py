@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+"""
+This module contains the Job class.
+"""
+import time
+
+
+class Job(object):
+    """
+    This class contains the state of a command run by ExecutionControl.
+
+    The output of the command arrives in pieces of any size. The job keeps
+    the incomplete last line of each output until the rest arrives.
+    """
+
+    # ----------------------------------------------------------------------
+    def __init__(self, key, command, process):
+        self.key = key
+        self.command = command
+        self.process = process
+        self.start = time.time()
+        self.open_streams = 2  # stdout and stderr
+        self.partial = {}  # incomplete last line by stream
+        self.timeout_id = None
+        self.stopped = None  # why it was stopped, if it was
+
+    # ----------------------------------------------------------------------
+    def read(self, stream, data):
+        """
+        This method adds output of the command and returns the lines that
+        are now complete.
+
+            Parameters:
+                * **stream**: The output, like stdout.
+                * **data** (:class:`str<str>`): The bytes read, or "" when
+                  the output was closed, to get its last line.
+            Returns:
+                * **Types** (:class:`list<list>`): unicode lines, without
+                  the line break.
+        """
+        if not data:
+            lines = [self.partial.pop(stream, "")]
+            if not lines[0]:
+                return []
+        else:
+            lines = (self.partial.get(stream, "") + data).split("\n")
+            self.partial[stream] = lines.pop()
+        return [line.decode("utf-8", "replace") for line in lines]
+
+# ----------------------------------------------------------------------
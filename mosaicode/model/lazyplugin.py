@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+This module contains the LazyPlugin class.
+"""
+import copy
+from mosaicode.model.plugin import Plugin
+
+
+class LazyPlugin(Plugin):
+    """
+    This class is a plug-in read from a XML file in two steps.
+
+    At startup only the attributes used to list the plug-in (type, label,
+    group, color, language and framework) are read. Help, ports,
+    properties and codes are read from the file the first time one of
+    them is used.
+    """
+
+    # Attributes read on demand
+    LAZY = ("help", "in_ports", "out_ports", "properties", "codes")
+
+    # ----------------------------------------------------------------------
+    def __init__(self, file_name):
+        Plugin.__init__(self)
+        for key in LazyPlugin.LAZY:
+            del self.__dict__[key]
+        self.file_name = file_name
+        self.error = None  # why the file could not be read
+
+    # ----------------------------------------------------------------------
+    def is_loaded(self):
+        """
+        This method returns if the plug-in was read from its file.
+
+        Returns:
+
+            * **Types** (:class:`boolean<boolean>`)
+        """
+        return "codes" in self.__dict__
+
+    # ----------------------------------------------------------------------
+    def load(self):
+        """
+        This method reads help, ports, properties and codes from the file.
+        """
+        if self.is_loaded():
+            return
+        defaults = Plugin()
+        for key in LazyPlugin.LAZY:
+            self.__dict__[key] = defaults.__dict__[key]
+        from mosaicode.persistence.blockpersistence import BlockPersistence
+        try:
+            BlockPersistence.load_body(self)
+        except Exception as e:
+            # The plugin stays in the list, but no block can be made from it
+            self.error = str(e)
+            from mosaicode.system import System
+            System.log("Could not load " + self.file_name + ": " + self.error)
+        # Blocks share the codes and ports of the plugin
+        self.freeze()
+
+    # ----------------------------------------------------------------------
+    def is_usable(self):
+        """
+        This method tells if blocks can be made from the plugin, that is,
+        if its file could be read.
+
+        Returns:
+
+            * **Types** (:class:`boolean<boolean>`)
+        """
+        self.load()
+        return self.error is None
+
+    # ----------------------------------------------------------------------
+    def __getattr__(self, name):
+        # Only called for attributes that are not in __dict__
+        if name not in LazyPlugin.LAZY:
+            raise AttributeError(name)
+        self.load()
+        return self.__dict__[name]
+
+    # ----------------------------------------------------------------------
+    def __deepcopy__(self, memo):
+        # Blocks are copies of the plug-in, so they are loaded plug-ins
+        return copy.deepcopy(Plugin(self), memo)
+
+# ------------------------------------------------------------------------------
@@ -9,6 +9,21 @@ class Plugin(object):
     each one.
     """
 
+    # Attributes that can be used as $name$ in the code of the plug-in.
+    # Plug-ins with other attributes must add them here.
+    PLACEHOLDERS = (
+            "id",
+            "x",
+            "y",
+            "type",
+            "language",
+            "framework",
+            "source",
+            "help",
+            "label",
+            "color",
+            "group")
+
     # ----------------------------------------------------------------------
     def __init__(self, plugin = None):
 
@@ -35,8 +50,35 @@ class Plugin(object):
 
         if plugin == None:
             return
+        # Codes, ports and help are shared with the plugin, as they do not
+        # change. Only the property values belong to each copy.
         for key in self.__dict__:
-            self.__dict__[key] = plugin.__dict__[key]
+            # getattr, so the attributes of lazy plugins are loaded
+            self.__dict__[key] = getattr(plugin, key)
+        self.properties = [dict(prop) for prop in self.properties]
+        self.freeze()
+
+    # ----------------------------------------------------------------------
+    def freeze(self):
+        """
+        This method turns codes and ports into tuples, so they can be
+        shared by the copies of the plugin and are never changed in place.
+        Plugins that are already frozen keep the same tuples.
+        """
+        self.codes = tuple(self.codes)
+        self.in_ports = tuple(self.in_ports)
+        self.out_ports = tuple(self.out_ports)
+
+    # ----------------------------------------------------------------------
+    def is_usable(self):
+        """
+        This method tells if blocks can be made from the plugin.
+
+        Returns:
+
+            * **Types** (:class:`boolean<boolean>`)
+        """
+        return True
 
     # ----------------------------------------------------------------------
     def get_color(self):
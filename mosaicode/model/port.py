@@ -3,7 +3,20 @@
 class Port(object):
     """
     This class contains the base attributes of each plugin port.
+
+    Ports are kept in slots, as the registry holds many of them.
     """
+    __slots__ = (
+            "type",
+            "language",
+            "label",
+            "color",
+            "multiple",
+            "source",
+            "code",
+            "input_codes",
+            "output_codes",
+            "var_name")
 
     # ----------------------------------------------------------------------
     def __init__(self):
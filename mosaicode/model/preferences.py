@@ -8,6 +8,10 @@ class Preferences(object):
         self.default_directory = "/tmp/%l/%n-%t"
         self.default_filename = "%n"
         self.grid = 10
+        self.undo_entries = 100
+        self.undo_memory = 16 * 1024 * 1024  # bytes
+        self.autosave_interval = 30  # seconds, 0 disables the autosave
+        self.run_timeout = 0  # seconds a run can take, 0 for no limit
 
         # GUI stuff
         self.width = 900
@@ -11,6 +11,7 @@ from os.path import expanduser
 from mosaicode.utils.XMLUtils import XMLParser
 from mosaicode.utils.PythonUtils import PythonParser
 from mosaicode.model.plugin import Plugin
+from mosaicode.model.lazyplugin import LazyPlugin
 
 class BlockPersistence():
     """
@@ -29,23 +30,81 @@ class BlockPersistence():
         """
         if os.path.exists(file_name) is False:
             return
-        parser = XMLParser(file_name)
+        return cls.load_xml(XMLParser(file_name))
 
+    # ----------------------------------------------------------------------
+    @classmethod
+    def load_xml(cls, parser):
+        """
+        This method loads the block from a parsed XML file.
+
+            Parameters:
+                * **parser** (:class:`XMLParser<mosaicode.utils.XMLUtils>`)
+            Returns:
+                * **Types** (:class:`Plugin<mosaicode.model.plugin>`)
+        """
         if parser.getTag("MosaicodePlugin") is None:
             return None
 
         plugin = Plugin()
+        cls.__load_header(plugin, parser.getTag("MosaicodePlugin"))
+        cls.__load_body(plugin, parser)
+
+        if plugin.type == "mosaicode.model.plugin":
+            return None
+        return plugin
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def load_lazy(cls, file_name, root):
+        """
+        This method loads only the attributes of the root tag of a plugin
+        file. The rest of the plugin is loaded when it is used.
+
+            Parameters:
+                * **file_name** (:class:`str<str>`)
+                * **root** (:class:`XMLParser<mosaicode.utils.XMLUtils>`): The root tag.
+            Returns:
+                * **Types** (:class:`LazyPlugin<mosaicode.model.lazyplugin>`)
+        """
+        plugin = LazyPlugin(file_name)
+        cls.__load_header(plugin, root)
+        if plugin.type == "mosaicode.model.plugin":
+            return None
+        return plugin
 
-        plugin.type = parser.getTagAttr("MosaicodePlugin", "type")
-        plugin.language = parser.getTagAttr("MosaicodePlugin", "language")
-        plugin.framework = parser.getTagAttr("MosaicodePlugin", "framework")
+    # ----------------------------------------------------------------------
+    @classmethod
+    def load_body(cls, plugin):
+        """
+        This method loads help, codes, properties and ports of a lazy
+        plugin from its file. Errors, like a missing or broken file, are
+        raised.
 
-        plugin.label = parser.getTagAttr("MosaicodePlugin", "label")
-        plugin.group = parser.getTagAttr("MosaicodePlugin", "group")
-        plugin.color = parser.getTagAttr("MosaicodePlugin", "color")
+            Parameters:
+                * **plugin** (:class:`LazyPlugin<mosaicode.model.lazyplugin>`)
+        """
+        parser = XMLParser(plugin.file_name)
         plugin.help = parser.getTagAttr("MosaicodePlugin", "help")
-        plugin.source = parser.getTagAttr("MosaicodePlugin", "source")
+        cls.__load_body(plugin, parser)
 
+    # ----------------------------------------------------------------------
+    @classmethod
+    def __load_header(cls, plugin, root):
+        plugin.type = root.getAttr("type")
+        plugin.language = root.getAttr("language")
+        plugin.framework = root.getAttr("framework")
+
+        plugin.label = root.getAttr("label")
+        plugin.group = root.getAttr("group")
+        plugin.color = root.getAttr("color")
+        if "help" in plugin.__dict__:
+            plugin.help = root.getAttr("help")
+        plugin.source = root.getAttr("source")
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def __load_body(cls, plugin, parser):
         count = 0
         for code in plugin.codes:
             plugin.codes[count] = parser.getTag("MosaicodePlugin").getTag("code" + str(count)).getText()
@@ -66,10 +125,6 @@ class BlockPersistence():
         for port in out_ports:
             plugin.out_ports.append(ast.literal_eval(port.getAttr("value")))
 
-        if plugin.type == "mosaicode.model.plugin":
-            return None
-        return plugin
-
     # ----------------------------------------------------------------------
     @classmethod
     def save(cls, plugin):
@@ -96,7 +151,7 @@ class BlockPersistence():
 
         count = 0
         for code in plugin.codes:
-            parser.appendToTag('MosaicodePlugin', 'code' + str(count)).string = str(plugin.codes[count])
+            parser.appendToTag('MosaicodePlugin', 'code' + str(count)).setText(plugin.codes[count])
             count = count + 1
 
         parser.appendToTag('MosaicodePlugin', 'properties')
@@ -152,10 +207,10 @@ class BlockPersistence():
         parser.setAttribute('color', plugin.color)
         parser.setAttribute('group', plugin.group)
         parser.setAttribute('help', plugin.help)
-        parser.setAttribute('in_ports', plugin.in_ports)
-        parser.setAttribute('out_ports', plugin.out_ports)
+        parser.setAttribute('in_ports', list(plugin.in_ports))
+        parser.setAttribute('out_ports', list(plugin.out_ports))
         parser.setAttribute('properties', plugin.properties)
-        parser.setAttribute('codes', plugin.codes)
+        parser.setAttribute('codes', list(plugin.codes))
 
         try:
             data_dir = System.get_user_dir() + "/extensions/"
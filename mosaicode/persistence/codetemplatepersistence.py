@@ -29,8 +29,19 @@ class CodeTemplatePersistence():
         # load the code_template
         if os.path.exists(file_name) is False:
             return
-        parser = XMLParser(file_name)
+        return cls.load_xml(XMLParser(file_name))
 
+    # ----------------------------------------------------------------------
+    @classmethod
+    def load_xml(cls, parser):
+        """
+        This method loads the code_template from a parsed XML file.
+
+            Parameters:
+                * **parser** (:class:`XMLParser<mosaicode.utils.XMLUtils>`)
+            Returns:
+                * **Types** (:class:`CodeTemplate<mosaicode.model.codetemplate>`)
+        """
         if parser.getTag("MosaicodeCodeTemplate") is None:
             return None
 
@@ -71,8 +82,8 @@ class CodeTemplatePersistence():
         parser.setTagAttr('MosaicodeCodeTemplate','language', code_template.language)
         parser.setTagAttr('MosaicodeCodeTemplate','extension', code_template.extension)
         parser.setTagAttr('MosaicodeCodeTemplate','source', code_template.source)
-        parser.appendToTag('MosaicodeCodeTemplate','command').string = str(code_template.command)
-        parser.appendToTag('MosaicodeCodeTemplate','code').string = str(code_template.code)
+        parser.appendToTag('MosaicodeCodeTemplate','command').setText(code_template.command)
+        parser.appendToTag('MosaicodeCodeTemplate','code').setText(code_template.code)
 
         try:
             data_dir = System.get_user_dir() + "/extensions/"
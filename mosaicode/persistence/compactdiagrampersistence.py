@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+"""
+This module contains the CompactDiagramPersistence class.
+"""
+import struct
+
+# File layout, little endian:
+#
+#   MAGIC, format version (H)
+#   string count (I), then each string: length (I) and UTF-8 bytes
+#   records, each one starting with its kind (B), then END
+#
+# Block types, property keys and values are indexes in the string table,
+# so a type used by thousands of blocks is stored only once.
+MAGIC = "MSCDB\0"
+FORMAT_VERSION = 1
+
+END = 0
+VERSION = 1  # string
+ZOOM = 2  # double
+LANGUAGE = 3  # string
+BLOCK = 4  # type, id, x, y, property count, (key, value)...
+CONNECTION = 5  # from_block, from_out, to_block, to_in
+
+HEADER = struct.Struct("<H")
+COUNT = struct.Struct("<I")
+KIND = struct.Struct("<B")
+STRING = struct.Struct("<I")
+DOUBLE = struct.Struct("<d")
+BLOCK_STRUCT = struct.Struct("<IiddI")
+PROPERTY_STRUCT = struct.Struct("<II")
+CONNECTION_STRUCT = struct.Struct("<iiii")
+
+
+class CompactDiagramPersistence():
+    """
+    This class reads and writes diagrams in a compact binary format.
+
+    It works on the same records as DiagramPersistence, so any diagram can
+    be converted to and from the XML format without loss.
+    """
+
+    EXTENSION = ".mscdb"
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def is_compact(cls, file_name):
+        """
+        This method tells if a file is in the compact format.
+
+        Returns:
+
+            * **Types** (:class:`boolean<boolean>`)
+        """
+        try:
+            diagram_file = open(file_name, "rb")
+            try:
+                return diagram_file.read(len(MAGIC)) == MAGIC
+            finally:
+                diagram_file.close()
+        except IOError:
+            return False
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def read(cls, file_name):
+        """
+        This method reads the records of a file.
+
+        Returns:
+
+            * **Types** (:class:`generator<generator>`): records like
+              ("block", type, id, x, y, ((key, value), ...)).
+        """
+        diagram_file = open(file_name, "rb")
+        try:
+            data = diagram_file.read()
+        finally:
+            diagram_file.close()
+        return cls.decode(data, file_name)
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def decode(cls, data, name="data"):
+        """
+        This method reads the records of a diagram in the compact format.
+
+            Parameters:
+                * **data** (:class:`str<str>`)
+                * **name** (:class:`str<str>`): used in error messages.
+            Returns:
+                * **Types** (:class:`generator<generator>`)
+        """
+        if not data.startswith(MAGIC):
+            raise ValueError(name + " is not a compact diagram")
+        # A cut or damaged file makes unpack_from fail or points out of
+        # the string table
+        try:
+            offset = len(MAGIC)
+            version, = HEADER.unpack_from(data, offset)
+            if version > FORMAT_VERSION:
+                raise ValueError(name + " has an unknown format version")
+            offset += HEADER.size
+
+            count, = COUNT.unpack_from(data, offset)
+            offset += COUNT.size
+            strings = []
+            for index in xrange(count):
+                length, = STRING.unpack_from(data, offset)
+                offset += STRING.size
+                if offset + length > len(data):
+                    raise IndexError("string out of the data")
+                value = data[offset:offset + length]
+                try:
+                    # As lxml does, ASCII text is kept in str
+                    value.decode("ascii")
+                except UnicodeDecodeError:
+                    value = value.decode("utf-8")
+                strings.append(value)
+                offset += length
+
+            while True:
+                kind, = KIND.unpack_from(data, offset)
+                offset += KIND.size
+                if kind == END:
+                    return
+                if kind == BLOCK:
+                    type_index, block_id, x, y, props = \
+                        BLOCK_STRUCT.unpack_from(data, offset)
+                    offset += BLOCK_STRUCT.size
+                    properties = []
+                    for index in xrange(props):
+                        key, value = PROPERTY_STRUCT.unpack_from(data, offset)
+                        offset += PROPERTY_STRUCT.size
+                        properties.append((strings[key], strings[value]))
+                    yield ("block", strings[type_index], block_id, x, y,
+                           tuple(properties))
+                elif kind == CONNECTION:
+                    yield ("connection",) + \
+                        CONNECTION_STRUCT.unpack_from(data, offset)
+                    offset += CONNECTION_STRUCT.size
+                elif kind == ZOOM:
+                    yield ("zoom", DOUBLE.unpack_from(data, offset)[0])
+                    offset += DOUBLE.size
+                elif kind in (VERSION, LANGUAGE):
+                    index, = STRING.unpack_from(data, offset)
+                    offset += STRING.size
+                    if kind == VERSION:
+                        yield ("version", strings[index])
+                    else:
+                        yield ("language", strings[index])
+                else:
+                    raise ValueError(name + " has an unknown record")
+        except (struct.error, IndexError):
+            raise ValueError(name + " is truncated or corrupt")
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def write(cls, file_name, records):
+        """
+        This method writes records to a file.
+
+            Parameters:
+                * **file_name** (:class:`str<str>`)
+                * **records** (:class:`iterable<iterable>`): records as
+                  returned by read.
+        """
+        data = cls.encode(records)
+        diagram_file = open(file_name, "wb")
+        try:
+            diagram_file.write(data)
+        finally:
+            diagram_file.close()
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def encode(cls, records):
+        """
+        This method converts records to the compact format.
+
+            Parameters:
+                * **records** (:class:`iterable<iterable>`): records as
+                  returned by read.
+            Returns:
+                * **Types** (:class:`str<str>`)
+        """
+        strings = {}
+        table = []
+
+        def intern(value):
+            if isinstance(value, unicode):
+                value = value.encode("utf-8")
+            elif not isinstance(value, str):
+                value = str(value)
+            index = strings.get(value)
+            if index is None:
+                index = strings[value] = len(table)
+                table.append(value)
+            return index
+
+        body = []
+        for record in records:
+            kind = record[0]
+            if kind == "block":
+                block_type, block_id, x, y, properties = record[1:]
+                body.append(KIND.pack(BLOCK))
+                body.append(BLOCK_STRUCT.pack(intern(block_type),
+                                              int(block_id),
+                                              float(x),
+                                              float(y),
+                                              len(properties)))
+                for key, value in properties:
+                    body.append(PROPERTY_STRUCT.pack(intern(key),
+                                                     intern(value)))
+            elif kind == "connection":
+                body.append(KIND.pack(CONNECTION))
+                body.append(CONNECTION_STRUCT.pack(*[int(value)
+                                                     for value in record[1:]]))
+            elif kind == "zoom":
+                body.append(KIND.pack(ZOOM))
+                body.append(DOUBLE.pack(float(record[1])))
+            elif record[1] is None:
+                # Not saved, as in the XML format
+                continue
+            elif kind == "version":
+                body.append(KIND.pack(VERSION))
+                body.append(STRING.pack(intern(record[1])))
+            elif kind == "language":
+                body.append(KIND.pack(LANGUAGE))
+                body.append(STRING.pack(intern(record[1])))
+        body.append(KIND.pack(END))
+
+        head = [MAGIC, HEADER.pack(FORMAT_VERSION), COUNT.pack(len(table))]
+        for value in table:
+            head.append(STRING.pack(len(value)))
+            head.append(value)
+        return "".join(head) + "".join(body)
+
+# ----------------------------------------------------------------------
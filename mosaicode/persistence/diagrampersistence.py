@@ -4,12 +4,15 @@
 This module contains the DiagramPersistence class.
 """
 import os
-import gi
-gi.require_version('Gdk', '3.0')
-from gi.repository import Gdk
 from mosaicode.utils.XMLUtils import XMLParser
+from mosaicode.utils.XMLUtils import XMLWriter
+from mosaicode.model.plugin import Plugin
+from mosaicode.persistence.compactdiagrampersistence import CompactDiagramPersistence
 from mosaicode.system import System as System
 
+# Bytes written to the file at a time
+BUFFER_SIZE = 64 * 1024
+
 
 class DiagramPersistence():
     """
@@ -17,59 +20,113 @@ class DiagramPersistence():
     """
     # ----------------------------------------------------------------------
     @classmethod
-    def load(cls, diagram):
+    def load(cls, diagram, records=None):
+        """
+        This method load a file.
 
-        # load the diagram
-        parser = XMLParser(diagram.file_name)
+        The file is read as a stream: each block and connection is added
+        to the diagram as soon as it is read, all in one batch. Files in
+        the compact format are detected by their header.
 
-        zoom = parser.getTag("mosaicode").getTag("zoom").getAttr("value")
-        diagram.zoom = float(zoom)
-        try:
-            language = parser.getTag("mosaicode").getTag(
-                "language").getAttr("value")
-            diagram.language = language
-        except:
-            pass
-
-        # new version load
-        blocks = parser.getTag("mosaicode").getTag(
-            "blocks").getChildTags("block")
-        for block in blocks:
-            block_type = block.getAttr("type")
-            if block_type not in System.plugins:
-                continue
-            block_id = int(block.getAttr("id"))
-            position = block.getTag("position")
-            x = position.getAttr("x")
-            y = position.getAttr("y")
-            properties = block.getChildTags("property")
-            props = {}
-            for prop in properties:
+            Parameters:
+                * **diagram** (:class:`DiagramModel<mosaicode.model.diagrammodel>`)
+                * **records** (:class:`iterable<iterable>`): records to load
+                  instead of the file, as returned by read.
+            Returns:
+                * **Types** (:class:`boolean<boolean>`)
+        """
+        if records is None:
+            records = cls.read(diagram.file_name)
+        with diagram.batch("Load"):
+            for record in records:
+                kind = record[0]
+                if kind == "block":
+                    cls.__load_block(diagram, *record[1:])
+                elif kind == "connection":
+                    cls.__load_connection(diagram, *record[1:])
+                elif kind == "zoom":
+                    diagram.zoom = record[1]
+                elif kind == "language":
+                    diagram.language = record[1]
+        return True
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def __load_block(cls, diagram, block_type, block_id, x, y, properties):
+        if block_type not in System.plugins or \
+                not System.plugins[block_type].is_usable():
+            return
+        # A copy, so the registered plugin keeps its default values
+        new_block = Plugin(System.plugins[block_type])
+        new_block.set_properties(dict(properties))
+        new_block.id = block_id
+        new_block.x = x
+        new_block.y = y
+        diagram.add_block(new_block)
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def __load_connection(cls, diagram, from_block, from_out, to_block, to_in):
+        if from_block not in diagram.blocks or to_block not in diagram.blocks:
+            return
+        diagram.start_connection(diagram.blocks[from_block], from_out)
+        diagram.end_connection(diagram.blocks[to_block], to_in)
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def read(cls, file_name):
+        """
+        This method reads the records of a diagram file, in any format.
+
+        The records are ("version", value), ("zoom", value),
+        ("language", value), ("block", type, id, x, y, ((key, value), ...))
+        and ("connection", from_block, from_out, to_block, to_in), with
+        ports counted from zero.
+
+        Returns:
+
+            * **Types** (:class:`generator<generator>`)
+        """
+        if CompactDiagramPersistence.is_compact(file_name):
+            return CompactDiagramPersistence.read(file_name)
+        return cls.__read_xml(file_name)
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def __read_xml(cls, file_name):
+        tags = ("version", "zoom", "language", "block", "connection")
+        for tag in XMLParser.iterTags(file_name, tags):
+            name = tag.getName()
+            if name == "block":
+                position = tag.getTag("position")
+                properties = []
+                for prop in tag.getChildTags("property"):
+                    try:
+                        properties.append((prop.key, prop.value))
+                    except:
+                        pass
+                yield ("block",
+                       tag.getAttr("type"),
+                       int(tag.getAttr("id")),
+                       float(position.getAttr("x")),
+                       float(position.getAttr("y")),
+                       tuple(properties))
+            elif name == "connection":
                 try:
-                    props[prop.key] = prop.value
+                    yield ("connection",
+                           int(tag.getAttr("from_block")),
+                           int(tag.getAttr("from_out")) - 1,
+                           int(tag.getAttr("to_block")),
+                           int(tag.getAttr("to_in")) - 1)
+                except:
+                    pass
+            elif name == "zoom":
+                yield ("zoom", float(tag.getAttr("value")))
+            else:
+                try:
+                    yield (name, tag.getAttr("value"))
                 except:
                     pass
-            new_block = System.plugins[block_type]
-            new_block.set_properties(props)
-            new_block.id = block_id
-            new_block.x = float(x)
-            new_block.y = float(y)
-            diagram.add_block(new_block)
-
-        connections = parser.getTag("mosaicode").getTag(
-            "connections").getChildTags("connection")
-        for conn in connections:
-            try:
-                from_block = diagram.blocks[
-                    int(conn.getAttr("from_block"))]
-                to_block = diagram.blocks[int(conn.getAttr("to_block"))]
-            except:
-                continue
-            from_block_out = int(conn.getAttr("from_out"))
-            to_block_in = int(conn.getAttr("to_in"))
-            diagram.start_connection(from_block, int(from_block_out) - 1)
-            diagram.end_connection(to_block, int(to_block_in) - 1)
-        return True
 
     # ----------------------------------------------------------------------
     @classmethod
@@ -77,47 +134,157 @@ class DiagramPersistence():
         """
         This method save a file.
 
+        Files ending with CompactDiagramPersistence.EXTENSION are saved in
+        the compact format, the others in XML.
+
         Returns:
 
             * **Types** (:class:`boolean<boolean>`)
         """
+        try:
+            cls.write(str(diagram.file_name), cls.__get_records(diagram))
+        except EnvironmentError as e:
+            System.log(e.strerror)
+            return False, e.strerror
 
-        parser = XMLParser()
-        parser.addTag('mosaicode')
-        parser.appendToTag('mosaicode', 'version', value=System.VERSION)
-        parser.appendToTag('mosaicode', 'zoom', value=diagram.zoom)
-        parser.appendToTag('mosaicode', 'language', value=diagram.language)
+        diagram.set_modified(False)
+        return True, "Success"
 
-        parser.appendToTag('mosaicode', 'blocks')
+    # ----------------------------------------------------------------------
+    @classmethod
+    def __get_records(cls, diagram):
+        yield ("version", System.VERSION)
+        yield ("zoom", diagram.zoom)
+        yield ("language", diagram.language)
         for block_id in diagram.blocks:
-            block_type = diagram.blocks[block_id].type
-            pos = diagram.blocks[block_id].get_position()
-            parser.appendToTag('blocks', 'block', type=block_type, id=block_id)
-            parser.appendToLastTag('block', 'position', x=pos[0], y=pos[1])
-            props = diagram.blocks[block_id].get_properties()
-            for prop in props:
-                parser.appendToLastTag('block',
-                                       'property',
-                                       key=str(prop["name"]),
-                                       value=str(prop["value"])
-                                       )
-
-        parser.appendToTag('mosaicode', 'connections')
+            block = diagram.blocks[block_id]
+            pos = block.get_position()
+            properties = []
+            for prop in block.get_properties():
+                properties.append((str(prop["name"]), str(prop["value"])))
+            yield ("block", block.type, block_id, pos[0], pos[1],
+                   tuple(properties))
         for connector in diagram.connectors:
-            parser.appendToTag('connections', 'connection',
-                               from_block=connector.source.id,
-                               from_out=int(connector.source_port) + 1,
-                               to_block=connector.sink.id,
-                               to_in=int(connector.sink_port) + 1)
+            yield ("connection",
+                   connector.source.id,
+                   int(connector.source_port),
+                   connector.sink.id,
+                   int(connector.sink_port))
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """
+        This method returns the records of a diagram snapshot, as they are
+        saved.
+
+            Parameters:
+                * **snapshot** (:class:`DiagramSnapshot<mosaicode.model.diagramsnapshot>`)
+            Returns:
+                * **Types** (:class:`generator<generator>`)
+        """
+        yield ("version", System.VERSION)
+        yield ("zoom", snapshot.zoom)
+        yield ("language", snapshot.language)
+        for block in snapshot.blocks:
+            properties = []
+            for key, value in block.properties:
+                properties.append((str(key), str(value)))
+            yield ("block", block.type, block.id, block.x, block.y,
+                   tuple(properties))
+        for connector in snapshot.connectors:
+            yield ("connection",
+                   connector.source,
+                   int(connector.source_port),
+                   connector.sink,
+                   int(connector.sink_port))
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def write(cls, file_name, records):
+        """
+        This method writes the records of a diagram to a file. The format
+        is chosen by the file extension.
+
+        The file is written to a temporary file that replaces the old one,
+        so a failed save never leaves a half written diagram.
+
+            Parameters:
+                * **file_name** (:class:`str<str>`)
+                * **records** (:class:`iterable<iterable>`): records as
+                  returned by read.
+        """
+        temp_name = file_name + ".tmp"
+        try:
+            if file_name.endswith(CompactDiagramPersistence.EXTENSION):
+                CompactDiagramPersistence.write(temp_name, records)
+            else:
+                cls.__write_xml(temp_name, records)
+            os.rename(temp_name, file_name)
+        except:
+            if os.path.exists(temp_name):
+                os.remove(temp_name)
+            raise
 
+    # ----------------------------------------------------------------------
+    @classmethod
+    def __write_xml(cls, file_name, records):
+        save_file = open(file_name, "w", BUFFER_SIZE)
         try:
-            save_file = open(str(diagram.file_name), "w")
-            save_file.write(parser.prettify())
+            writer = XMLWriter(save_file)
+            writer.start('mosaicode')
+            section = None
+            for record in records:
+                kind = record[0]
+                if kind == "block":
+                    if section is None:
+                        writer.start('blocks')
+                        section = "blocks"
+                    block_type, block_id, x, y, properties = record[1:]
+                    writer.start('block', type=block_type, id=block_id)
+                    writer.element('position', x=x, y=y)
+                    for key, value in properties:
+                        writer.element('property', key=key, value=value)
+                    writer.end()
+                elif kind == "connection":
+                    if section is None:
+                        writer.element('blocks')
+                    if section == "blocks":
+                        writer.end()
+                    if section != "connections":
+                        writer.start('connections')
+                        section = "connections"
+                    writer.element('connection',
+                                   from_block=record[1],
+                                   from_out=record[2] + 1,
+                                   to_block=record[3],
+                                   to_in=record[4] + 1)
+                else:
+                    writer.element(kind, value=record[1])
+            if section is None:
+                writer.element('blocks')
+            elif section == "blocks":
+                writer.end()
+            if section != "connections":
+                writer.element('connections')
+            writer.close()
+        finally:
             save_file.close()
-        except IOError as e:
-            System.log(e.strerror)
-            return False, e.strerror
 
-        diagram.set_modified(False)
+    # ----------------------------------------------------------------------
+    @classmethod
+    def convert(cls, source, target):
+        """
+        This method converts a diagram file to the format of the target
+        file name, without loading the diagram.
+
+        Returns:
+
+            * **Types** (:class:`tuple<tuple>`): (result, message)
+        """
+        try:
+            cls.write(target, cls.read(source))
+        except (EnvironmentError, ValueError) as e:
+            return False, str(e)
         return True, "Success"
 # ------------------------------------------------------------------------------
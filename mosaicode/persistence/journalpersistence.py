@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+"""
+This module contains the JournalPersistence class.
+"""
+import os
+import errno
+import struct
+import time
+
+# Each entry is the header, the key, the file name of the diagram and the
+# diagram in the compact format. An entry without diagram means that the
+# diagram was saved or closed.
+ENTRY_MAGIC = "MSCJ"
+ENTRY = struct.Struct("<4sdIII")  # magic, time, key, file name, data sizes
+
+
+class JournalPersistence():
+    """
+    This class keeps the diagrams that were not saved in a journal.
+
+    Each process has its own journal, where entries are only appended, so
+    a crash can at most cut the last entry, which is then ignored. The
+    journals of processes that are not running anymore can be recovered.
+    """
+
+    DIRECTORY = "autosave"
+
+    # The journal is rewritten with only the last entries above this size
+    MAX_SIZE = 32 * 1024 * 1024
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def get_directory(cls):
+        from mosaicode.system import System
+        return System.get_user_dir() + "/" + JournalPersistence.DIRECTORY
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def get_file_name(cls, pid=None):
+        """
+        This method returns the journal of a process.
+
+            Parameters:
+                * **pid** (:class:`int<int>`): the current process if None.
+            Returns:
+                * **Types** (:class:`str<str>`)
+        """
+        if pid is None:
+            pid = os.getpid()
+        return cls.get_directory() + "/%d.journal" % pid
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def get_orphans(cls):
+        """
+        This method returns the journals left by processes that are not
+        running, like the ones that crashed.
+
+        Returns:
+
+            * **Types** (:class:`list<list>`)
+        """
+        directory = cls.get_directory()
+        if not os.path.isdir(directory):
+            return []
+        journals = []
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".journal"):
+                continue
+            try:
+                # <pid>.journal, or <pid>.<time>.journal if set aside
+                pid = int(name.split(".")[0])
+            except ValueError:
+                continue
+            # The current process has not written yet, so a journal with
+            # its pid was left by an old process
+            if pid != os.getpid() and cls.__is_running(pid):
+                continue
+            journals.append(os.path.join(directory, name))
+        return journals
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def set_aside(cls, file_name):
+        """
+        This method renames a journal that is kept, so the current process
+        never writes to it if it has the same pid. The journal is still
+        found by get_orphans.
+
+            Returns:
+                * **Types** (:class:`str<str>`): The new name.
+        """
+        new_name = "%s.%d.journal" % (file_name[:-len(".journal")],
+                                      int(time.time() * 1000))
+        os.rename(file_name, new_name)
+        return new_name
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def __is_running(cls, pid):
+        try:
+            os.kill(pid, 0)
+        except OSError as e:
+            return e.errno == errno.EPERM
+        return True
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def append(cls, file_name, key, diagram_file_name, data, saved=None):
+        """
+        This method adds an entry to a journal.
+
+            Parameters:
+                * **file_name** (:class:`str<str>`): The journal.
+                * **key** (:class:`str<str>`): The diagram in the journal.
+                * **diagram_file_name** (:class:`str<str>`)
+                * **data** (:class:`str<str>`): The diagram in the compact
+                  format or "" if it was saved or closed.
+                * **saved** (:class:`float<float>`): time of the entry, now
+                  if None.
+        """
+        directory = os.path.dirname(file_name)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        key = cls.__encode(key)
+        diagram_file_name = cls.__encode(diagram_file_name)
+        if saved is None:
+            saved = time.time()
+        journal = open(file_name, "ab")
+        try:
+            journal.write(ENTRY.pack(ENTRY_MAGIC, saved, len(key),
+                                     len(diagram_file_name), len(data)))
+            journal.write(key)
+            journal.write(diagram_file_name)
+            journal.write(data)
+            journal.flush()
+            os.fsync(journal.fileno())
+        finally:
+            journal.close()
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def remove(cls, file_name, key):
+        """
+        This method tells the journal that a diagram has no unsaved work.
+        """
+        cls.append(file_name, key, "", "")
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def __encode(cls, value):
+        if isinstance(value, unicode):
+            return value.encode("utf-8")
+        return str(value)
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def load(cls, file_name):
+        """
+        This method reads the last entry of each diagram of a journal.
+
+        Returns:
+
+            * **Types** (:class:`list<list>`): (key, time, file name, data)
+              of each diagram with unsaved work, oldest first.
+        """
+        journal = open(file_name, "rb")
+        try:
+            data = journal.read()
+        finally:
+            journal.close()
+        entries = {}
+        offset = 0
+        while offset + ENTRY.size <= len(data):
+            magic, saved, key_size, name_size, data_size = \
+                ENTRY.unpack_from(data, offset)
+            start = offset + ENTRY.size
+            end = start + key_size + name_size + data_size
+            if magic != ENTRY_MAGIC or end > len(data):
+                # Cut by a crash
+                break
+            key = data[start:start + key_size]
+            name = data[start + key_size:start + key_size + name_size]
+            if data_size == 0:
+                entries.pop(key, None)
+            else:
+                entries[key] = (key, saved, name.decode("utf-8"),
+                                data[end - data_size:end])
+            offset = end
+        return sorted(entries.values(), key=lambda entry: entry[1])
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def compact(cls, file_name):
+        """
+        This method rewrites a journal with only the last entries.
+
+        The journal is replaced by a temporary file, so a crash never
+        loses the entries.
+        """
+        entries = cls.load(file_name)
+        temp_name = file_name + ".tmp"
+        cls.delete(temp_name)
+        for key, saved, name, data in entries:
+            cls.append(temp_name, key, name, data, saved)
+        if entries:
+            os.rename(temp_name, file_name)
+        else:
+            cls.delete(file_name)
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def delete(cls, file_name):
+        """
+        This method deletes a journal, if it exists.
+        """
+        try:
+            os.remove(file_name)
+        except OSError:
+            pass
+
+# ----------------------------------------------------------------------
@@ -29,7 +29,19 @@ class PortPersistence():
         # load the port
         if os.path.exists(file_name) is False:
             return
-        parser = XMLParser(file_name)
+        return cls.load_xml(XMLParser(file_name))
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def load_xml(cls, parser):
+        """
+        This method loads the port from a parsed XML file.
+
+            Parameters:
+                * **parser** (:class:`XMLParser<mosaicode.utils.XMLUtils>`)
+            Returns:
+                * **Types** (:class:`Port<mosaicode.model.port>`)
+        """
         if parser.getTag("MosaicodePort") is None:
             return None
 
@@ -73,14 +85,14 @@ class PortPersistence():
         parser.setTagAttr('MosaicodePort','color', port.color)
         parser.setTagAttr('MosaicodePort','multiple', port.multiple)
         parser.setTagAttr('MosaicodePort','source', port.source)
-        parser.appendToTag('MosaicodePort','code').string = str(port.code)
+        parser.appendToTag('MosaicodePort','code').setText(port.code)
 
         count = 0
         for code in port.input_codes:
             parser.appendToTag('MosaicodePort', 'input_code' + \
-                        str(count)).string = str(port.input_codes[count])
+                        str(count)).setText(port.input_codes[count])
             parser.appendToTag('MosaicodePort', 'output_code' + \
-                        str(count)).string = str(port.output_codes[count])
+                        str(count)).setText(port.output_codes[count])
             count = count + 1
 
 
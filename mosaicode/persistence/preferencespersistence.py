@@ -54,6 +54,14 @@ class PreferencesPersistence():
                         "recent_files").getChildTags("name")
             for file_name in files:
                 prefs.recent_files.append(file_name.getAttr("value"))
+            prefs.undo_entries = int(parser.getTagAttr(
+                        "MosaicodeProperties", "undo_entries"))
+            prefs.undo_memory = int(parser.getTagAttr("MosaicodeProperties",
+                        "undo_memory"))
+            prefs.autosave_interval = int(parser.getTagAttr(
+                        "MosaicodeProperties", "autosave_interval"))
+            prefs.run_timeout = int(parser.getTagAttr(
+                        "MosaicodeProperties", "run_timeout"))
         except:
             pass
         return prefs
@@ -83,6 +91,14 @@ class PreferencesPersistence():
                 prefs.vpaned_bottom)
         parser.setTagAttr('MosaicodeProperties','vpaned_left',
                 prefs.vpaned_left)
+        parser.setTagAttr('MosaicodeProperties','undo_entries',
+                prefs.undo_entries)
+        parser.setTagAttr('MosaicodeProperties','undo_memory',
+                prefs.undo_memory)
+        parser.setTagAttr('MosaicodeProperties','autosave_interval',
+                prefs.autosave_interval)
+        parser.setTagAttr('MosaicodeProperties','run_timeout',
+                prefs.run_timeout)
 
         parser.appendToTag('MosaicodeProperties', 'recent_files')
         for key in prefs.recent_files:
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# ----------------------------------------------------------------------
+"""
+This module contains the RegistryPersistence class.
+"""
+import os
+import cPickle as pickle
+
+
+class RegistryPersistence():
+    """
+    This class contains methods related the RegistryPersistence class.
+
+    The registry keeps the extensions loaded from XML files, so the files
+    that did not change since the last run are not parsed again.
+    """
+
+    # Increase it when the cached models change
+    VERSION = 4
+
+    FILE_NAME = "registry.cache"
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def get_file_name(cls):
+        from mosaicode.system import System
+        return System.get_user_dir() + "/" + RegistryPersistence.FILE_NAME
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def get_key(cls, file_name):
+        """
+        This method returns the key that tells if a file changed.
+
+        Returns:
+
+            * **Types** (:class:`tuple<tuple>`): mtime and size of the file.
+        """
+        stat = os.stat(file_name)
+        return (stat.st_mtime, stat.st_size)
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def load(cls, file_name=None):
+        """
+        This method loads the registry.
+
+        An empty registry is returned if the file does not exist, can not
+        be read or was written by another version.
+
+        Returns:
+
+            * **Types** (:class:`dict<dict>`): (key, item) by file name.
+        """
+        from mosaicode.system import System
+        if file_name is None:
+            file_name = cls.get_file_name()
+        if not os.path.exists(file_name):
+            return {}
+        try:
+            registry_file = open(file_name, "rb")
+            try:
+                version, entries = pickle.load(registry_file)
+            finally:
+                registry_file.close()
+        except Exception as e:
+            print "Could not load " + file_name + ": " + str(e)
+            return {}
+        if version != (RegistryPersistence.VERSION, System.VERSION):
+            return {}
+        return entries
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def save(cls, entries, file_name=None):
+        """
+        This method saves the registry.
+
+        The registry is written to a temporary file that replaces the old
+        one, so a crash never leaves a half written registry.
+
+        Returns:
+
+            * **Types** (:class:`boolean<boolean>`)
+        """
+        from mosaicode.system import System
+        if file_name is None:
+            file_name = cls.get_file_name()
+        version = (RegistryPersistence.VERSION, System.VERSION)
+        temp_name = file_name + ".tmp"
+        try:
+            registry_file = open(temp_name, "wb")
+            try:
+                pickle.dump((version, entries), registry_file,
+                            pickle.HIGHEST_PROTOCOL)
+            finally:
+                registry_file.close()
+            os.rename(temp_name, file_name)
+        except Exception as e:
+            print "Could not save " + file_name + ": " + str(e)
+            return False
+        return True
+
+# ----------------------------------------------------------------------
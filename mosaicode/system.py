@@ -5,11 +5,16 @@ This module contains the System class.
 import os
 import sys
 import copy
+import time
 import inspect  # For module inspect
 import mosaicode.extensions
 import pkgutil  # For dynamic package load
 from glob import glob  # To load examples
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
 from mosaicode.persistence.preferencespersistence import PreferencesPersistence
+from mosaicode.persistence.registrypersistence import RegistryPersistence
+from mosaicode.utils.XMLUtils import XMLParser
 from mosaicode.control.portcontrol import PortControl
 from mosaicode.control.blockcontrol import BlockControl
 from mosaicode.control.codetemplatecontrol import CodeTemplateControl
@@ -48,10 +53,12 @@ class System(object):
             self.plugins = {}
             self.list_of_examples = []
             self.ports = {}
+            # (package, number of extensions, seconds) of the last load
+            self.load_times = []
             self.__load()
 
         # ----------------------------------------------------------------------
-        def __load_xml(self, data_dir):
+        def __list_xml(self, data_dir, files):
             if not os.path.exists(data_dir):
                 return
             for file_name in os.listdir(data_dir):
@@ -59,25 +66,156 @@ class System(object):
 
                 # Recursion to make it more interesting...
                 if os.path.isdir(full_file_path):
-                    self.__load_xml(full_file_path)
+                    self.__list_xml(full_file_path, files)
 
                 if not file_name.endswith(".xml"):
                     continue
+                files.append(full_file_path)
 
-                code_template = CodeTemplateControl.load(full_file_path)
-                if code_template is not None:
-                    code_template.source = "xml"
-                    self.code_templates[code_template.type] = code_template
+        # ----------------------------------------------------------------------
+        def __load_xml(self, data_dirs):
+            loaders = {
+                "MosaicodeCodeTemplate": self.code_templates,
+                "MosaicodePort": self.ports,
+                "MosaicodePlugin": self.plugins
+            }
+            files = []
+            for data_dir in data_dirs:
+                self.__list_xml(data_dir, files)
+
+            # Files that did not change come from the registry
+            registry = RegistryPersistence.load()
+            new_registry = {}
+            keys = {}
+            changed = []
+            for file_name in files:
+                try:
+                    keys[file_name] = RegistryPersistence.get_key(file_name)
+                except OSError:
+                    continue
+                entry = registry.get(file_name)
+                if entry is None or entry[0] != keys[file_name]:
+                    changed.append(file_name)
+
+            # The other files are read by a pool of threads
+            if len(changed) > 1:
+                pool = ThreadPool(min(len(changed), cpu_count(), 8))
+                results = dict(zip(changed, pool.map(self.__read_xml, changed)))
+                pool.close()
+                pool.join()
+            else:
+                results = dict(zip(changed, map(self.__read_xml, changed)))
+
+            # Items are merged in the order of the files, so user space
+            # still overrides application space
+            packages = []
+            times = {}
+            for file_name in files:
+                if file_name not in keys:
+                    continue
+                if file_name in results:
+                    root, item, elapsed = results[file_name]
+                    if root is None:
+                        continue
+                else:
+                    root, item, elapsed = registry[file_name][1:] + (0,)
+                new_registry[file_name] = (keys[file_name], root, item)
+                package = "xml " + os.path.dirname(os.path.normpath(file_name))
+                if package not in times:
+                    packages.append(package)
+                    times[package] = [0, 0]
+                times[package][1] += elapsed
+                if item is not None:
+                    loaders[root][item.type] = item
+                    times[package][0] += 1
+            for package in packages:
+                self.load_times.append((package,) + tuple(times[package]))
+
+            # Removed files are dropped from the registry too
+            if results or len(new_registry) != len(registry):
+                RegistryPersistence.save(new_registry)
+
+        # ----------------------------------------------------------------------
+        @staticmethod
+        def __read_xml(file_name):
+            """
+            This method reads an extension file. It runs on worker threads.
 
-                port = PortControl.load(full_file_path)
-                if port is not None:
-                    port.source = "xml"
-                    self.ports[port.type] = port
+            Returns:
 
-                plugin = BlockControl.load(full_file_path)
-                if plugin is not None:
-                    plugin.source = "xml"
-                    self.plugins[plugin.type] = plugin
+                * **Types** (:class:`tuple<tuple>`): root tag, item or None,
+                  elapsed time. The root tag is None if the file could not
+                  be read.
+            """
+            start = time.time()
+            # The root tag tells what the file holds. Plugins are read
+            # only when used, the other files are parsed once.
+            item = None
+            try:
+                root_tag = XMLParser.getRootTag(file_name)
+                root = root_tag.getName()
+                if root == "MosaicodePlugin":
+                    item = BlockControl.load_lazy(file_name, root_tag)
+                elif root == "MosaicodePort":
+                    item = PortControl.load_xml(XMLParser(file_name))
+                elif root == "MosaicodeCodeTemplate":
+                    item = CodeTemplateControl.load_xml(XMLParser(file_name))
+            except Exception as e:
+                print "Could not load " + file_name + ": " + str(e)
+                return None, None, time.time() - start
+            if item is not None:
+                item.source = "xml"
+            return root, item, time.time() - start
+
+        # ----------------------------------------------------------------------
+        def __load_python(self):
+            # Extensions are the mosaicode_* packages installed with python
+            for importer, name, ispkg in pkgutil.iter_modules():
+                if not name.startswith(System.APP + "_"):
+                    continue
+                start = time.time()
+                count = 0
+                try:
+                    module = __import__(name)
+                    modules = [module]
+                    if ispkg:
+                        modules = []
+                        for importer, module_name, ispkg in \
+                                pkgutil.walk_packages(module.__path__,
+                                                      name + "."):
+                            if not ispkg:
+                                modules.append(__import__(module_name,
+                                                          fromlist="dummy"))
+                    for module in modules:
+                        count += self.__load_python_module(module)
+                except Exception as e:
+                    print "Could not load " + name + ": " + str(e)
+                self.load_times.append(("python " + name, count,
+                                        time.time() - start))
+
+        # ----------------------------------------------------------------------
+        def __load_python_module(self, module):
+            count = 0
+            for class_name, obj in inspect.getmembers(module):
+                if not inspect.isclass(obj):
+                    continue
+                modname = inspect.getmodule(obj).__name__
+                if not modname.startswith(System.APP+"_"):
+                    continue
+
+                instance = obj()
+                if isinstance(instance, CodeTemplate):
+                    self.code_templates[instance.type] = instance
+                    count += 1
+                if isinstance(instance, Port):
+                    instance.source = "Python"
+                    self.ports[instance.type] = instance
+                    count += 1
+                if isinstance(instance, Plugin):
+                    if instance.label != "":
+                        self.plugins[instance.type] = instance
+                        count += 1
+            return count
 
         # ----------------------------------------------------------------------
         def __load(self):
@@ -99,45 +237,18 @@ class System(object):
             self.code_templates.clear()
             self.ports.clear()
             self.plugins.clear()
-            # First load ports on python classes.
+            del self.load_times[:]
+            start = time.time()
+            # First load extensions on python classes.
             # They are installed with mosaicode as root
-
-            def my_walk_packages(path=None, name_par=""):
-                for importer, name, ispkg in pkgutil.iter_modules(path, name_par + "."):
-                    if name.startswith(System.APP+"_") or name_par.startswith(System.APP+"_"):
-                        if ispkg:
-                            if name_par is not "":
-                                name = name_par + "." + name
-                            __import__(name)
-                            path = getattr(sys.modules[name], '__path__', None) or []
-                            my_walk_packages(path, name)
-                        else:
-                            module = __import__(name, fromlist="dummy")
-                            print name
-                            for class_name, obj in inspect.getmembers(module):
-                                if not inspect.isclass(obj):
-                                    continue
-                                modname = inspect.getmodule(obj).__name__
-                                if not modname.startswith(System.APP+"_"):
-                                    continue
-
-                                instance = obj()
-                                if isinstance(instance, CodeTemplate):
-                                    self.code_templates[instance.type] = instance
-                                if isinstance(instance, Port):
-                                    instance.source = "Python"
-                                    self.ports[instance.type] = instance
-                                if isinstance(instance, Plugin):
-                                    if instance.label != "":
-                                        self.plugins[instance.type] = instance
-
-
-            my_walk_packages(None, "")
-
-            # Load XML files in application space
-            self.__load_xml(System.DATA_DIR + "extensions/")
-            # Load XML files in user space
-            self.__load_xml(System.get_user_dir() + "/extensions/")
+            self.__load_python()
+            # Load XML files in application space and in user space
+            self.__load_xml([System.DATA_DIR + "extensions/",
+                             System.get_user_dir() + "/extensions/"])
+            self.load_times.append(("total", len(self.plugins) +
+                                    len(self.ports) +
+                                    len(self.code_templates),
+                                    time.time() - start))
 
     # ----------------------------------------------------------------------
     def __init__(self):
@@ -154,6 +265,7 @@ class System(object):
             cls.list_of_examples = System.instance.list_of_examples
             cls.ports = System.instance.ports
             cls.code_templates = System.instance.code_templates
+            cls.load_times = System.instance.load_times
 
     # ----------------------------------------------------------------------
     @classmethod
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+This module contains the functions that build the paths of connectors.
+"""
+
+# From the output, to the middle height, then to the input, with an arrow
+NEAR_PATH = "M %.1f %.1f L %.1f %.1f L %.1f %.1f L %.1f %.1f L %.1f %.1f" \
+    " L %.1f %.1f L %.1f %.1f L %.1f %.1f L %.1f %.1f L %.1f %.1f"
+# The input is far to the right: straight to its height
+FAR_PATH = "M %.1f %.1f L %.1f %.1f L %.1f %.1f L %.1f %.1f" \
+    " L %.1f %.1f L %.1f %.1f L %.1f %.1f L %.1f %.1f L %.1f %.1f"
+
+
+# ----------------------------------------------------------------------
+def get_path(from_point, to_point):
+    """
+    This function returns the SVG path of a connector.
+
+        Parameters:
+            * **from_point** (:class:`tuple<tuple>`): output position.
+            * **to_point** (:class:`tuple<tuple>`): input position.
+        Returns:
+            * **Types** (:class:`str<str>`)
+    """
+    x0, y0 = from_point
+    x1, y1 = to_point
+    middle = (y0 + y1) / 2.0
+    if x1 < x0 + 50:
+        return NEAR_PATH % (x0, y0, x0 + 25, y0, x0 + 25, middle,
+                            (x1 + x0) / 2.0, middle, x1 - 25, middle,
+                            x1 - 25, y1, x1, y1,
+                            x1 - 4, y1 - 4, x1 - 4, y1 + 4, x1, y1)
+    return FAR_PATH % (x0, y0, x0 + 25, y0, x0 + 25, middle,
+                       x0 + 25, y1, x1 - 25, y1, x1, y1,
+                       x1 - 4, y1 - 4, x1 - 4, y1 + 4, x1, y1)
+
+
+# ----------------------------------------------------------------------
+def get_paths(points):
+    """
+    This function returns the SVG paths of many connectors.
+
+        Parameters:
+            * **points** (:class:`list<list>`): (from_point, to_point) of
+              each connector.
+        Returns:
+            * **Types** (:class:`list<list>`)
+    """
+    return [get_path(from_point, to_point) for from_point, to_point in points]
+
+# ----------------------------------------------------------------------
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+This module contains the SpatialIndex class.
+"""
+
+
+class SpatialIndex(object):
+    """
+    This class indexes the bounding boxes of items in a uniform grid.
+
+    Each item is kept in the cells its box overlaps, so a query visits
+    only the cells of the queried area instead of every item.
+    """
+
+    # ----------------------------------------------------------------------
+    def __init__(self, cell_size=128):
+        self.cell_size = cell_size
+        self.__cells = {}  # items by cell
+        self.__bounds = {}  # (x1, y1, x2, y2) by item
+
+    # ----------------------------------------------------------------------
+    def __get_cells(self, bounds):
+        x1, y1, x2, y2 = bounds
+        size = self.cell_size
+        cells = []
+        for x in range(int(x1 // size), int(x2 // size) + 1):
+            for y in range(int(y1 // size), int(y2 // size) + 1):
+                cells.append((x, y))
+        return cells
+
+    # ----------------------------------------------------------------------
+    def __len__(self):
+        return len(self.__bounds)
+
+    # ----------------------------------------------------------------------
+    def __contains__(self, item):
+        return item in self.__bounds
+
+    # ----------------------------------------------------------------------
+    def clear(self):
+        """
+        This method removes all items.
+        """
+        self.__cells = {}
+        self.__bounds = {}
+
+    # ----------------------------------------------------------------------
+    def get_bounds(self, item):
+        """
+        This method returns the box of an item or None.
+
+            Returns:
+                * **Types** (:class:`tuple<tuple>`): (x1, y1, x2, y2)
+        """
+        return self.__bounds.get(item)
+
+    # ----------------------------------------------------------------------
+    def update(self, item, bounds):
+        """
+        This method adds an item or changes its box.
+
+            Parameters:
+                * **item**: Any hashable object.
+                * **bounds** (:class:`tuple<tuple>`): (x1, y1, x2, y2)
+        """
+        bounds = tuple(bounds)
+        old_bounds = self.__bounds.get(item)
+        if old_bounds == bounds:
+            return
+        new_cells = self.__get_cells(bounds)
+        if old_bounds is not None:
+            old_cells = self.__get_cells(old_bounds)
+            if old_cells == new_cells:
+                self.__bounds[item] = bounds
+                return
+            self.remove(item)
+        self.__bounds[item] = bounds
+        for cell in new_cells:
+            if cell not in self.__cells:
+                self.__cells[cell] = set()
+            self.__cells[cell].add(item)
+
+    # ----------------------------------------------------------------------
+    def remove(self, item):
+        """
+        This method removes an item, if present.
+        """
+        bounds = self.__bounds.pop(item, None)
+        if bounds is None:
+            return
+        for cell in self.__get_cells(bounds):
+            items = self.__cells.get(cell)
+            if items is None:
+                continue
+            items.discard(item)
+            if not items:
+                del self.__cells[cell]
+
+    # ----------------------------------------------------------------------
+    def query(self, bounds, inside=False):
+        """
+        This method returns the items whose boxes overlap an area.
+
+            Parameters:
+                * **bounds** (:class:`tuple<tuple>`): (x1, y1, x2, y2)
+                * **inside** (:class:`boolean<boolean>`): only the items
+                  completely inside the area.
+            Returns:
+                * **Types** (:class:`set<set>`)
+        """
+        x1, y1, x2, y2 = bounds
+        if x2 < x1:
+            x1, x2 = x2, x1
+        if y2 < y1:
+            y1, y2 = y2, y1
+        # Large areas are cheaper to test item by item
+        size = self.cell_size
+        cell_count = (int(x2 // size) - int(x1 // size) + 1) * \
+            (int(y2 // size) - int(y1 // size) + 1)
+        if cell_count > len(self.__cells):
+            candidates = self.__bounds
+        else:
+            candidates = set()
+            for cell in self.__get_cells((x1, y1, x2, y2)):
+                candidates.update(self.__cells.get(cell, ()))
+        result = set()
+        for item in candidates:
+            ix1, iy1, ix2, iy2 = self.__bounds[item]
+            if inside:
+                if ix1 >= x1 and iy1 >= y1 and ix2 <= x2 and iy2 <= y2:
+                    result.add(item)
+            elif ix1 <= x2 and iy1 <= y2 and ix2 >= x1 and iy2 >= y1:
+                result.add(item)
+        return result
+
+# ----------------------------------------------------------------------
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+This module contains the TemplateParser class.
+"""
+import re
+
+
+class TemplateParser(object):
+    """
+    This class contains methods related the TemplateParser class.
+
+    A template is a text with $key$ placeholders. The text is split only
+    once, when the parser is created, and each render does a single
+    dictionary lookup per placeholder.
+    """
+
+    KEY = re.compile(r"^[A-Za-z_]\w*(\[[^\]]*\])?$")
+
+    # ----------------------------------------------------------------------
+    def __init__(self, text=""):
+        self.text = text
+        self.pieces = text.split("$")
+        self.candidates = []
+        self.keys = set()
+        for piece in self.pieces:
+            candidate = TemplateParser.KEY.match(piece) is not None
+            self.candidates.append(candidate)
+            if candidate:
+                self.keys.add(piece)
+
+    # ----------------------------------------------------------------------
+    def render(self, values):
+        """
+        This method replaces the placeholders by their values.
+
+        Placeholders are matched from left to right and the ones without a
+        value are kept in the text.
+
+            Parameters:
+                * **values** (:class:`dict<dict>`): str values by key.
+            Returns:
+                * **Types** (:class:`str<str>`)
+        """
+        pieces = self.pieces
+        if len(pieces) == 1:
+            return self.text
+        candidates = self.candidates
+        result = [pieces[0]]
+        last = len(pieces) - 1
+        i = 1
+        while i <= last:
+            piece = pieces[i]
+            if i < last and candidates[i] and piece in values:
+                result.append(values[piece])
+                result.append(pieces[i + 1])
+                i += 2
+            else:
+                result.append("$")
+                result.append(piece)
+                i += 1
+        return "".join(result)
+
+# ----------------------------------------------------------------------
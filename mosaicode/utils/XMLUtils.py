@@ -1,8 +1,37 @@
 # -*- coding: utf-8 -*-
 """
-This module contains the XMLParser class.
+This module contains the XMLParser and XMLWriter classes.
+
+The parser is built on lxml when it is installed and on the
+ElementTree of the standard library otherwise.
 """
-from bs4 import BeautifulSoup
+from xml.sax.saxutils import escape
+
+try:
+    from lxml import etree as ElementTree
+    # Damaged files are loaded as far as possible, as BeautifulSoup did
+    PARSE_OPTIONS = {"recover": True}
+except ImportError:
+    import xml.etree.cElementTree as ElementTree
+    PARSE_OPTIONS = {}
+
+# Tag of the element that holds the root of a document
+DOCUMENT = "document"
+
+DECLARATION = '<?xml version="1.0" encoding="utf-8"?>'
+
+ATTR_ENTITIES = {'"': "&quot;", "\n": "&#10;", "\r": "&#13;", "\t": "&#9;"}
+
+
+def to_text(value):
+    """
+    This function converts a value to an unicode string.
+    """
+    if isinstance(value, unicode):
+        return value
+    if not isinstance(value, str):
+        value = str(value)
+    return value.decode("utf-8")
 
 
 class XMLParser(object):
@@ -12,91 +41,288 @@ class XMLParser(object):
 
     def __init__(self, source=None, fromString=False, fromTag=False):
 
-        if (source is None):
-            self.__dict__['parsedXML'] = BeautifulSoup(features='xml')
-        elif fromString:
-            self.__dict__['parsedXML'] = BeautifulSoup(source, "xml")
-        elif fromTag:
+        if fromTag:
             self.__dict__['parsedXML'] = source
+            return
+        document = ElementTree.Element(DOCUMENT)
+        if source is None:
+            pass
+        elif fromString:
+            if isinstance(source, unicode):
+                source = source.encode("utf-8")
+            if PARSE_OPTIONS:
+                parser = ElementTree.XMLParser(**PARSE_OPTIONS)
+                document.append(ElementTree.fromstring(source, parser))
+            else:
+                document.append(ElementTree.fromstring(source))
         else:
-            self.__dict__['parsedXML'] = BeautifulSoup(open(source),
-                                                       "xml",
-                                                       from_encoding="UTF-8")
+            if PARSE_OPTIONS:
+                parser = ElementTree.XMLParser(**PARSE_OPTIONS)
+                tree = ElementTree.parse(source, parser)
+            else:
+                tree = ElementTree.parse(source)
+            document.append(tree.getroot())
+        self.__dict__['parsedXML'] = document
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def iterTags(cls, source, tags):
+        """
+        This method reads a file and returns its tags as soon as they are
+        closed, without building the whole document.
+
+        Once used, the tags and the elements around them are cleared and
+        removed from their parents, so the document holds only the open
+        elements and the memory does not grow with the size of the file.
+
+            Parameters:
+                * **source** (:class:`str<str>`): The file name.
+                * **tags** (:class:`tuple<tuple>`): Names of the tags.
+            Returns:
+                * **Types** (:class:`generator<generator>`)
+        """
+        parents = []  # open elements, from the root
+        inside = 0  # open elements in tags, kept for the tag around them
+        for event, element in ElementTree.iterparse(source,
+                                                    ("start", "end"),
+                                                    **PARSE_OPTIONS):
+            if event == "start":
+                parents.append(element)
+                if element.tag in tags:
+                    inside += 1
+                continue
+            parents.pop()
+            if element.tag in tags:
+                inside -= 1
+                yield XMLParser(element, fromTag=True)
+            if inside == 0:
+                element.clear()
+                if parents:
+                    parents[-1].remove(element)
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def getRootTag(cls, source):
+        """
+        This method reads only the root tag of a file, with its attributes.
+
+            Parameters:
+                * **source** (:class:`str<str>`): The file name.
+            Returns:
+                * **Types** (:class:`XMLParser<XMLParser>`): The root tag,
+                  without children, or None.
+        """
+        for event, element in ElementTree.iterparse(source, ("start",),
+                                                    **PARSE_OPTIONS):
+            return XMLParser(element, fromTag=True)
+        return None
+
+    # ----------------------------------------------------------------------
+    def __find(self, tag):
+        return self.parsedXML.find(".//" + tag)
 
     def getTagAttr(self, tag, attr):
-        return getattr(self.parsedXML, tag)[attr]
+        return self.__find(tag).attrib[attr]
 
     def setTagAttr(self, tag, attr, value):
-        getattr(self.parsedXML, tag)[attr] = value
+        self.__find(tag).set(attr, to_text(value))
 
     def getAttr(self, attr):
-        return self.parsedXML[attr]
+        return self.parsedXML.attrib[attr]
 
     def setAttr(self, attr, value):
-        self.parsedXML[attr] = value
+        self.parsedXML.set(attr, to_text(value))
 
     def getChildTagAttr(self, parent, child, attr):
-        return getattr(getattr(self.parsedXML, parent), child)[attr]
+        return self.__find(parent).find(".//" + child).attrib[attr]
 
     def setChildTagAttr(self, parent, child, attr, value):
-        getattr(getattr(self.parsedXML, parent), child)[attr] = value
+        self.__find(parent).find(".//" + child).set(attr, to_text(value))
 
     def getChildTags(self, child):
         tags = []
-        for tag in self.parsedXML.find_all(child):
+        for tag in self.parsedXML.findall(".//" + child):
             tags.append(XMLParser(tag, fromTag=True))
         return tags
 
+    def __new_tag(self, parent, tagName, attrs):
+        new_tag = ElementTree.SubElement(parent, tagName)
+        for key in attrs:
+            # None values are not saved, as BeautifulSoup did
+            if attrs[key] is not None:
+                new_tag.set(key, to_text(attrs[key]))
+        return XMLParser(new_tag, fromTag=True)
+
     def addTag(self, tagName, **attrs):
-        new_tag = self.parsedXML.new_tag(tagName, **attrs)
-        self.parsedXML.append(new_tag)
-        return new_tag
+        return self.__new_tag(self.parsedXML, tagName, attrs)
 
     def appendToTag(self, tagParent, tagChild, **attrs):
-        new_tag = self.parsedXML.new_tag(tagChild, **attrs)
-        getattr(self.parsedXML, tagParent).append(new_tag)
-        return new_tag
+        return self.__new_tag(self.__find(tagParent), tagChild, attrs)
 
     def appendToLastTag(self, tagParent, tagChild, **attrs):
-        new_tag = self.parsedXML.new_tag(tagChild, **attrs)
-        self.parsedXML.find_all(tagParent)[-1].append(new_tag)
-        return new_tag
+        parent = self.parsedXML.findall(".//" + tagParent)[-1]
+        return self.__new_tag(parent, tagChild, attrs)
 
     def getXML(self):
-        return self.parsedXML.prettify()
+        return self.prettify()
 
     def getTagXML(self, tag):
-        return tag.prettify()
+        if isinstance(tag, XMLParser):
+            return tag.prettify()
+        return XMLParser(tag, fromTag=True).prettify()
 
     def getTag(self, tag):
-        if self.parsedXML.find(tag):
-            return XMLParser(getattr(self.parsedXML, tag), fromTag=True)
-        else:
+        element = self.__find(tag)
+        if element is None:
             return None
+        return XMLParser(element, fromTag=True)
 
     def getTagChild(self, parent, child):
-        return getattr(getattr(self.parsedXML, parent), child)
+        return self.getTag(parent).getTag(child)
 
     def getTagContent(self):
-        return self.parsedXML.contents[0]
+        if self.parsedXML.text:
+            return self.parsedXML.text
+        return XMLParser(self.parsedXML[0], fromTag=True)
 
     def getTagChildren(self):
-        return self.parsedXML.children
+        return [XMLParser(tag, fromTag=True) for tag in self.parsedXML]
+
+    def getName(self):
+        return self.parsedXML.tag
 
     def getText(self):
-        return self.parsedXML.text
+        return "".join(self.parsedXML.itertext())
+
+    def setText(self, text):
+        self.parsedXML.text = to_text(text)
 
     def prettify(self):
-        return self.parsedXML.prettify()
+        """
+        This method returns the XML indented by one space, with the text
+        of the tags kept as it is.
+
+            Returns:
+                * **Types** (:class:`str<str>`): UTF-8 encoded XML.
+        """
+        lines = []
+        if self.parsedXML.tag == DOCUMENT:
+            lines.append(DECLARATION)
+            for element in self.parsedXML:
+                self.__prettify(element, 0, lines)
+        else:
+            self.__prettify(self.parsedXML, 0, lines)
+        return u"\n".join(lines).encode("utf-8")
+
+    def __prettify(self, element, level, lines):
+        tag = element.tag
+        if not isinstance(tag, basestring):
+            # Comments and processing instructions
+            return
+        attrs = u""
+        for key, value in element.attrib.items():
+            attrs += u' %s="%s"' % (key, escape(value, ATTR_ENTITIES))
+        indent = u" " * level
+        children = len(element) > 0
+        text = element.text
+        if not children and not text:
+            lines.append(u"%s<%s%s/>" % (indent, tag, attrs))
+        elif not children:
+            lines.append(u"%s<%s%s>%s</%s>" % (indent, tag, attrs,
+                                                escape(text), tag))
+        else:
+            lines.append(u"%s<%s%s>" % (indent, tag, attrs))
+            if text and text.strip():
+                lines.append(escape(text))
+            for child in element:
+                self.__prettify(child, level + 1, lines)
+                if child.tail and child.tail.strip():
+                    lines.append(escape(child.tail))
+            lines.append(u"%s</%s>" % (indent, tag))
 
     def __repr__(self):
-        return str(self.parsedXML)
+        if self.parsedXML.tag == DOCUMENT:
+            return "".join(ElementTree.tostring(element)
+                           for element in self.parsedXML)
+        return ElementTree.tostring(self.parsedXML)
 
     def __getattr__(self, attr):
-        return self.parsedXML[attr]
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        return self.parsedXML.attrib[attr]
 
     def __setattr__(self, attr, value):
-        self.parsedXML[attr] = value
+        self.parsedXML.set(attr, to_text(value))
 
     # __str__ is the same as __repr__
     __str__ = __repr__
+
+
+class XMLWriter(object):
+    """
+    This class writes XML to a file while it is produced, with the same
+    layout as XMLParser.prettify, so large documents are never held in
+    memory.
+
+    Only tags with attributes are supported, not text.
+    """
+
+    def __init__(self, output):
+        self.output = output
+        self.__tags = []
+        self.__pending = False  # the last start tag may still be empty
+        self.output.write(DECLARATION)
+
+    # ----------------------------------------------------------------------
+    def __start(self, tag, attrs):
+        if self.__pending:
+            self.output.write(">")
+        line = u"\n" + u" " * len(self.__tags) + u"<" + tag
+        for key in attrs:
+            # None values are not saved, as in XMLParser
+            if attrs[key] is not None:
+                line += u' %s="%s"' % (key, escape(to_text(attrs[key]),
+                                                   ATTR_ENTITIES))
+        self.output.write(line.encode("utf-8"))
+
+    # ----------------------------------------------------------------------
+    def start(self, tag, **attrs):
+        """
+        This method opens a tag. Tags opened later are its children until
+        end is called.
+        """
+        self.__start(tag, attrs)
+        self.__tags.append(tag)
+        self.__pending = True
+
+    # ----------------------------------------------------------------------
+    def element(self, tag, **attrs):
+        """
+        This method writes a tag without children.
+        """
+        self.__start(tag, attrs)
+        self.output.write("/>")
+        self.__pending = False
+
+    # ----------------------------------------------------------------------
+    def end(self):
+        """
+        This method closes the last open tag.
+        """
+        tag = self.__tags.pop()
+        if self.__pending:
+            self.output.write("/>")
+        else:
+            self.output.write("\n" + " " * len(self.__tags) + "</" +
+                              tag.encode("utf-8") + ">")
+        self.__pending = False
+
+    # ----------------------------------------------------------------------
+    def close(self):
+        """
+        This method closes all open tags.
+        """
+        while self.__tags:
+            self.end()
+
+# ----------------------------------------------------------------------
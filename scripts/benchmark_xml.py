@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+This script compares the time to read diagrams with BeautifulSoup, the old
+XML backend, and with the XMLParser of mosaicode.
+
+Usage: python scripts/benchmark_xml.py [repeat] [blocks]
+
+The bundled examples are read "repeat" times and a generated diagram with
+"blocks" blocks is read once.
+"""
+import os
+import sys
+import time
+import tempfile
+from glob import glob
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from mosaicode.utils import XMLUtils
+from mosaicode.utils.XMLUtils import XMLParser
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+TAGS = ("zoom", "language", "block", "connection")
+
+
+# ----------------------------------------------------------------------
+def read_soup(file_name):
+    parsed = BeautifulSoup(open(file_name), "xml", from_encoding="UTF-8")
+    count = 0
+    for block in parsed.mosaicode.blocks.find_all("block"):
+        block.position["x"]
+        count += len(block.find_all("property"))
+    for connection in parsed.mosaicode.connections.find_all("connection"):
+        count += 1
+    return count
+
+
+# ----------------------------------------------------------------------
+def read_tree(file_name):
+    parser = XMLParser(file_name)
+    count = 0
+    for block in parser.getTag("mosaicode").getChildTags("block"):
+        block.getTag("position").getAttr("x")
+        count += len(block.getChildTags("property"))
+    for connection in parser.getTag("mosaicode").getChildTags("connection"):
+        count += 1
+    return count
+
+
+# ----------------------------------------------------------------------
+def read_stream(file_name):
+    count = 0
+    for tag in XMLParser.iterTags(file_name, TAGS):
+        if tag.getName() == "block":
+            tag.getTag("position").getAttr("x")
+            count += len(tag.getChildTags("property"))
+        elif tag.getName() == "connection":
+            count += 1
+    return count
+
+
+# ----------------------------------------------------------------------
+def write_diagram(file_name, blocks):
+    parser = XMLParser()
+    parser.addTag("mosaicode")
+    parser.appendToTag("mosaicode", "zoom", value=1.0)
+    parser.appendToTag("mosaicode", "language", value="c")
+    tag = parser.appendToTag("mosaicode", "blocks")
+    for block_id in range(1, blocks + 1):
+        block = tag.addTag("block", type="benchmark.block", id=block_id)
+        block.addTag("position", x=block_id * 10.0, y=block_id * 5.0)
+        for key in range(5):
+            block.addTag("property", key="key" + str(key), value=key)
+    tag = parser.appendToTag("mosaicode", "connections")
+    for block_id in range(1, blocks):
+        tag.addTag("connection", from_block=block_id, from_out=1,
+                   to_block=block_id + 1, to_in=1)
+    xml_file = open(file_name, "w")
+    xml_file.write(parser.prettify())
+    xml_file.close()
+
+
+# ----------------------------------------------------------------------
+def measure(name, function, files, repeat):
+    start = time.time()
+    for count in range(repeat):
+        for file_name in files:
+            function(file_name)
+    elapsed = time.time() - start
+    print "  %-14s %8.3fs" % (name, elapsed)
+    return elapsed
+
+
+# ----------------------------------------------------------------------
+def benchmark(title, files, repeat):
+    print "%s (%d files x %d)" % (title, len(files), repeat)
+    tree = measure("XMLParser", read_tree, files, repeat)
+    measure("iterTags", read_stream, files, repeat)
+    if BeautifulSoup is not None:
+        soup = measure("BeautifulSoup", read_soup, files, repeat)
+        print "  speedup        %8.1fx" % (soup / tree)
+
+
+# ----------------------------------------------------------------------
+def main(argv):
+    repeat = int(argv[1]) if len(argv) > 1 else 10
+    blocks = int(argv[2]) if len(argv) > 2 else 5000
+    print "Backend:", XMLUtils.ElementTree.__name__
+
+    examples = os.path.join(os.path.dirname(__file__), "..",
+                            "app_data", "examples", "*")
+    benchmark("Examples", sorted(glob(examples)), repeat)
+
+    file_name = os.path.join(tempfile.mkdtemp(), "benchmark.mscd")
+    write_diagram(file_name, blocks)
+    benchmark("Diagram with %d blocks" % blocks, [file_name], 1)
+    os.remove(file_name)
+    os.rmdir(os.path.dirname(file_name))
+
+if __name__ == "__main__":
+    main(sys.argv)
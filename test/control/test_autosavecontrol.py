@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from mosaicode.control.autosavecontrol import AutosaveControl
+from mosaicode.model.diagrammodel import DiagramModel
+from mosaicode.model.diagramsnapshot import DiagramSnapshot
+from mosaicode.model.plugin import Plugin
+from mosaicode.persistence.compactdiagrampersistence import CompactDiagramPersistence
+from mosaicode.persistence.journalpersistence import JournalPersistence
+
+
+class TestAutosaveControl(TestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, "1.journal")
+        self.autosave = AutosaveControl(self.file_name)
+        self.diagram = DiagramModel()
+        self.diagram.file_name = "test.mscd"
+        plugin = Plugin()
+        plugin.id = 1
+        plugin.type = "test.plugin"
+        plugin.properties = [{"name": "size", "value": 3}]
+        self.diagram.blocks[1] = plugin
+
+    # ----------------------------------------------------------------------
+    def tearDown(self):
+        self.autosave.stop()
+        shutil.rmtree(self.directory)
+
+    # ----------------------------------------------------------------------
+    def test_save(self):
+        self.autosave.start()
+        self.autosave.save("a", DiagramSnapshot.from_diagram(self.diagram))
+        self.autosave.save("b", DiagramSnapshot.from_diagram(self.diagram))
+        self.autosave.remove("b")
+        self.autosave.stop()
+        entries = JournalPersistence.load(self.file_name)
+        self.assertEqual(len(entries), 1)
+        key, saved, file_name, data = entries[0]
+        self.assertEqual((key, file_name), ("a", "test.mscd"))
+        records = list(CompactDiagramPersistence.decode(data))
+        self.assertIn(("block", "test.plugin", 1, 0.0, 0.0,
+                       (("size", "3"),)), records)
+
+    # ----------------------------------------------------------------------
+    def test_only_newest(self):
+        # Snapshots given before the thread starts wait for it
+        for index in range(5):
+            self.diagram.zoom = index
+            self.autosave.save("a", DiagramSnapshot.from_diagram(self.diagram))
+        self.autosave.start()
+        self.autosave.stop()
+        journal = open(self.file_name, "rb").read()
+        self.assertEqual(journal.count("MSCJ"), 1)
+        data = JournalPersistence.load(self.file_name)[0][3]
+        self.assertIn(("zoom", 4.0),
+                      list(CompactDiagramPersistence.decode(data)))
+
+    # ----------------------------------------------------------------------
+    def test_changes(self):
+        self.assertEqual(self.diagram.changes, 0)
+        self.diagram.set_modified(True)
+        self.diagram.set_modified(False)
+        self.assertFalse(self.diagram.modified)
+        self.assertEqual(self.diagram.changes, 1)
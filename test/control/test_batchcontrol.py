@@ -0,0 +1,127 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from mosaicode.control.batchcontrol import BatchControl
+from mosaicode.control.batchcontrol import generate_file
+from mosaicode.model.codetemplate import CodeTemplate
+from mosaicode.model.plugin import Plugin
+from mosaicode.model.port import Port
+from mosaicode.system import System
+
+
+class TestBatchControl(TestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, "empty.mscd")
+        diagram_file = open(self.file_name, "w")
+        diagram_file.write('<?xml version="1.0" encoding="utf-8"?>\n'
+                           '<mosaicode><zoom value="1.0"/>'
+                           '<blocks/><connections/></mosaicode>')
+        diagram_file.close()
+
+    # ----------------------------------------------------------------------
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    # ----------------------------------------------------------------------
+    def test_get_files(self):
+        files = BatchControl.get_files([self.directory, "other.mscd"])
+        self.assertEqual(files, [self.file_name, "other.mscd"])
+
+    # ----------------------------------------------------------------------
+    def test_generate_file(self):
+        file_name, name, elapsed, error = generate_file(
+                (self.file_name, self.directory))
+        self.assertEqual(file_name, self.file_name)
+        self.assertEqual(error, "Diagram is empty")
+
+    # ----------------------------------------------------------------------
+    def test_generate(self):
+        self.assertFalse(BatchControl.generate(
+                [self.directory], self.directory, 1))
+
+    # ----------------------------------------------------------------------
+    def test_get_tasks(self):
+        other = os.path.join(self.directory, "other", "empty.mscdb")
+        tasks, errors = BatchControl.get_tasks(
+                [self.file_name, "diagram.mscd", other], "output")
+        self.assertEqual(tasks, [(self.file_name, "output"),
+                                 ("diagram.mscd", "output")])
+        self.assertEqual(errors, [(other, "Same output name as " +
+                                   self.file_name)])
+
+
+class TestBatchControlExample(TestCase):
+
+    # Blocks of the example: type, inputs, outputs and properties
+    PLUGINS = [("mosaicode.extensions.c.openCV.And", 2, 1, []),
+               ("mosaicode.extensions.c.openCV.imageFile", 0, 1,
+                ["filename"]),
+               ("mosaicode.extensions.c.openCV.show", 1, 0,
+                ["window_type", "title"])]
+
+    def setUp(self):
+        """Do the test basic setup."""
+        System()
+        self.directory = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.directory, "output")
+        self.file_name = os.path.join(self.directory, "And.mscd")
+        examples = os.path.join(os.path.dirname(__file__), "..", "..",
+                                "app_data", "examples")
+        shutil.copy(os.path.join(examples, "And.hrp"), self.file_name)
+        # The extensions of the example are not installed with the tests
+        port = Port()
+        port.type = "test.image"
+        port.code = "/* $source$ -> $sink$ */\n"
+        System.ports[port.type] = port
+        for plugin_type, inputs, outputs, properties in self.PLUGINS:
+            plugin = Plugin()
+            plugin.type = plugin_type
+            plugin.language = "C"
+            plugin.in_ports = [{"type": port.type, "name": "in%d" % number}
+                               for number in range(inputs)]
+            plugin.out_ports = [{"type": port.type, "name": "out%d" % number}
+                                for number in range(outputs)]
+            plugin.properties = [{"name": name, "value": ""}
+                                 for name in properties]
+            plugin.codes = ["", "block_$id$();\n", "", "", ""]
+            System.plugins[plugin_type] = plugin
+        code_template = CodeTemplate()
+        code_template.type = "test.template"
+        code_template.language = "C"
+        code_template.extension = ".c"
+        code_template.code = "$code[1]$$connections$"
+        System.code_templates[code_template.type] = code_template
+
+    # ----------------------------------------------------------------------
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        del System.ports["test.image"]
+        for plugin_type, inputs, outputs, properties in self.PLUGINS:
+            del System.plugins[plugin_type]
+        del System.code_templates["test.template"]
+
+    # ----------------------------------------------------------------------
+    def test_generate_file(self):
+        file_name, name, elapsed, error = generate_file(
+                (self.file_name, self.directory))
+        self.assertEqual(error, None)
+        self.assertEqual(name, os.path.join(self.directory, "And.c"))
+        code = open(name).read()
+        for block_id in range(1, 5):
+            self.assertIn("block_%d();" % block_id, code)
+        self.assertIn("/* 1 -> 4 */", code)
+
+    # ----------------------------------------------------------------------
+    def test_generate(self):
+        # The second diagram makes two tasks, for the pool
+        shutil.copy(self.file_name, os.path.join(self.directory, "Or.mscd"))
+        for jobs in [1, 2]:
+            output_dir = os.path.join(self.output_dir, str(jobs))
+            self.assertTrue(BatchControl.generate([self.directory],
+                                                  output_dir, jobs))
+            self.assertEqual(sorted(os.listdir(output_dir)),
+                             ["And.c", "Or.c"])
@@ -0,0 +1,218 @@
+from unittest import TestCase
+from mosaicode.control.codegenerator import CodeGenerator
+from mosaicode.model.codetemplate import CodeTemplate
+from mosaicode.model.connectionmodel import ConnectionModel
+from mosaicode.model.diagrammodel import DiagramModel
+from mosaicode.model.diagramsnapshot import DiagramSnapshot
+from mosaicode.model.plugin import Plugin
+from mosaicode.model.port import Port
+from mosaicode.system import System
+
+
+class Log(object):
+
+    def __init__(self):
+        self.messages = []
+
+    def log(self, msg):
+        self.messages.append(msg)
+
+
+class DiagramTestCase(TestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        System()
+        self.log = Log()
+        System.set_log(self.log)
+        for port_type in ["test.int", "test.float"]:
+            port = Port()
+            port.type = port_type
+            port.multiple = True
+            port.code = "$source$:$source_port$ -> $sink$:$sink_port$;\n"
+            System.ports[port_type] = port
+        self.code_template = CodeTemplate()
+        self.code_template.language = "c"
+        self.code_template.code = "$single_code[0]$$code[1]$" + \
+            "$code[2, connection]$$code[4]$"
+        self.diagram = DiagramModel()
+        self.diagram.language = "c"
+
+    # ----------------------------------------------------------------------
+    def tearDown(self):
+        del System.ports["test.int"]
+        del System.ports["test.float"]
+
+    # ----------------------------------------------------------------------
+    def add_block(self, block_id, in_ports=("test.int",)):
+        plugin = Plugin()
+        plugin.id = block_id
+        plugin.type = "test.plugin"
+        plugin.language = "c"
+        plugin.in_ports = [{"type": port_type, "name": "in%d" % number}
+                           for number, port_type in enumerate(in_ports)]
+        plugin.out_ports = [{"type": "test.int", "name": "out"}]
+        plugin.properties = [{"name": "value", "value": block_id}]
+        inputs = " ".join("$in_ports[in%d]$" % number
+                          for number in range(len(in_ports)))
+        plugin.codes = ["#include <test.h>\n",
+                        "int $out_ports[out]$;\n",
+                        "$out_ports[out]$ = f($prop[value]$, " +
+                        inputs + ");\n",
+                        "",
+                        "end $id$\n"]
+        self.diagram.blocks[block_id] = plugin
+        return plugin
+
+    # ----------------------------------------------------------------------
+    def connect(self, source, sink, sink_port=0):
+        connection = ConnectionModel(self.diagram,
+                                     self.diagram.blocks[source],
+                                     0,
+                                     "test.int")
+        connection.sink = self.diagram.blocks[sink]
+        connection.sink_port = sink_port
+        self.diagram.add_connection(connection)
+        return connection
+
+    # ----------------------------------------------------------------------
+    def generate(self, cache=None):
+        snapshot = DiagramSnapshot.from_diagram(self.diagram)
+        return CodeGenerator(snapshot, self.code_template,
+                             cache).generate_code()
+
+
+class TestCodeGeneratorCommand(TestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        code_template = CodeTemplate()
+        code_template.command = \
+            "gcc $dir_name$$filename$$extension$ -o $filename$"
+        code_template.extension = ".c"
+        self.code_generator = CodeGenerator(None, code_template)
+        self.code_generator.dir_name = "/tmp/code/"
+        self.code_generator.filename = "diagram"
+
+    # ----------------------------------------------------------------------
+    def test_get_command(self):
+        self.assertEqual(self.code_generator.get_command(),
+                         "gcc /tmp/code/diagram.c -o diagram")
+
+
+class TestCodeGeneratorCache(DiagramTestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        DiagramTestCase.setUp(self)
+        self.add_block(1)
+        self.add_block(2)
+        self.add_block(3, ("test.int", "test.float"))
+        self.connect(1, 2)
+        self.connect(1, 3)
+        self.cache = {}
+        self.check()
+
+    # ----------------------------------------------------------------------
+    def check(self):
+        """
+        Generates with the cache, checks the code is the same as without
+        it and returns the block ids rendered again.
+        """
+        old = dict(self.cache)
+        self.assertEqual(self.generate(self.cache), self.generate())
+        rendered = set()
+        for block_id in self.cache:
+            if old.get(block_id) is not self.cache[block_id]:
+                rendered.add(block_id)
+        return rendered
+
+    # ----------------------------------------------------------------------
+    def test_same_code(self):
+        self.assertEqual(sorted(self.cache), [1, 2, 3])
+        self.assertEqual(self.check(), set())
+        self.assertIn("block_1_o0 = f(1, block_1_i0);\n1:0 -> 2:0;\n",
+                      self.generate(self.cache))
+
+    # ----------------------------------------------------------------------
+    def test_property(self):
+        self.diagram.blocks[2].properties[0]["value"] = 20
+        self.assertEqual(self.check(), set([2]))
+        self.assertIn("f(20, block_2_i0)", self.generate(self.cache))
+
+    # ----------------------------------------------------------------------
+    def test_connection(self):
+        connection = self.connect(2, 3)
+        self.assertEqual(self.check(), set([2]))
+        self.assertIn("2:0 -> 3:0;", self.generate(self.cache))
+        self.diagram.remove_connection(connection)
+        self.assertEqual(self.check(), set([2]))
+
+    # ----------------------------------------------------------------------
+    def test_var_name(self):
+        System.ports["test.float"].var_name = "float_$id$_$port_number$"
+        self.assertEqual(self.check(), set([3]))
+        self.assertIn("float_3_1", self.generate(self.cache))
+
+    # ----------------------------------------------------------------------
+    def test_remove_block(self):
+        for connection in list(self.diagram.connectors):
+            if connection.sink.id == 3:
+                self.diagram.remove_connection(connection)
+        del self.diagram.blocks[3]
+        self.assertEqual(self.check(), set([1]))
+        self.assertEqual(sorted(self.cache), [1, 2])
+
+
+class TestCodeGeneratorSort(DiagramTestCase):
+
+    def get_layers(self):
+        snapshot = DiagramSnapshot.from_diagram(self.diagram)
+        code_generator = CodeGenerator(snapshot, self.code_template)
+        self.code = code_generator.generate_code()
+        return [[block.id for block in layer]
+                for layer in code_generator.layers]
+
+    # ----------------------------------------------------------------------
+    def test_diamond(self):
+        # The longest path sets the layer, as the old algorithm did
+        for block_id in range(1, 6):
+            self.add_block(block_id)
+        self.connect(1, 2)
+        self.connect(2, 3)
+        self.connect(3, 5)
+        self.connect(1, 4)
+        self.connect(4, 5)
+        self.assertEqual(self.get_layers(), [[1], [2, 4], [3], [5]])
+
+    # ----------------------------------------------------------------------
+    def test_fan_in(self):
+        for block_id in range(1, 5):
+            self.add_block(block_id)
+        self.connect(3, 4)
+        self.connect(1, 4)
+        self.connect(2, 4)
+        self.connect(1, 2)
+        self.assertEqual(self.get_layers(), [[1, 3], [2], [4]])
+
+    # ----------------------------------------------------------------------
+    def test_disconnected(self):
+        for block_id in range(1, 5):
+            self.add_block(block_id)
+        self.connect(3, 4)
+        self.assertEqual(self.get_layers(), [[1, 2, 3], [4]])
+        self.diagram.remove_connection(self.diagram.connectors[0])
+        self.assertEqual(self.get_layers(), [[1, 2, 3, 4]])
+
+    # ----------------------------------------------------------------------
+    def test_cycle(self):
+        for block_id in range(1, 5):
+            self.add_block(block_id)
+        self.connect(1, 2)
+        self.connect(2, 3)
+        self.connect(3, 2)
+        self.assertEqual(self.get_layers(), [[1, 3, 4], [2]])
+        self.assertIn("Block 2 is part of a cycle", self.log.messages)
+        self.assertIn("Block 3 is part of a cycle", self.log.messages)
+        for block_id in range(1, 5):
+            self.assertIn("end %d\n" % block_id, self.code)
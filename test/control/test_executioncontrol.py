@@ -0,0 +1,49 @@
+import os
+import shutil
+import signal
+import tempfile
+import time
+from unittest import TestCase
+from mosaicode.control.executioncontrol import ExecutionControl
+
+
+class TestExecutionControl(TestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        self.directory = tempfile.mkdtemp()
+        self.execution = ExecutionControl()
+
+    # ----------------------------------------------------------------------
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    # ----------------------------------------------------------------------
+    def test_start(self):
+        job = ExecutionControl.start("test", "pwd; echo error >&2",
+                                     self.directory)
+        # The command leads its own process group
+        self.assertEqual(os.getpgid(job.process.pid), job.process.pid)
+        self.assertEqual(job.key, "test")
+        self.assertEqual(job.process.wait(), 0)
+        self.assertEqual(job.read(job.process.stdout,
+                                  job.process.stdout.read()),
+                         [os.path.realpath(self.directory)])
+        self.assertEqual(job.process.stderr.read(), "error\n")
+
+    # ----------------------------------------------------------------------
+    def test_stop_all(self):
+        stopped = ExecutionControl.start("stopped", "sleep 30",
+                                         self.directory)
+        # A command that ignores SIGTERM is killed after the timeout
+        killed = ExecutionControl.start("killed", "trap '' TERM; sleep 30",
+                                        self.directory)
+        self.execution.jobs["stopped"] = stopped
+        self.execution.jobs["killed"] = killed
+        time.sleep(0.2)  # so the shell sets the trap
+        start = time.time()
+        self.execution.stop_all(0.5)
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual(self.execution.jobs, {})
+        self.assertEqual(stopped.process.returncode, -signal.SIGTERM)
+        self.assertEqual(killed.process.returncode, -signal.SIGKILL)
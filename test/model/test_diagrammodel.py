@@ -1,5 +1,7 @@
 from unittest import TestCase
 from mosaicode.model.diagrammodel import DiagramModel
+from mosaicode.model.connectionmodel import ConnectionModel
+from mosaicode.model.plugin import Plugin
 
 
 class TestDiagramModel(TestCase):
@@ -56,3 +58,135 @@ class TestDiagramModel(TestCase):
     # ----------------------------------------------------------------------
     def get_zoom(self):
         self.diagram_model.get_zoom()
+
+
+class TestDiagramModelConnections(TestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        self.diagram = DiagramModel()
+        for block_id in [1, 2, 3]:
+            plugin = Plugin()
+            plugin.id = block_id
+            plugin.out_ports = [{"type": "int", "name": "output"}]
+            plugin.in_ports = [{"type": "int", "name": "first"},
+                               {"type": "int", "name": "second"}]
+            self.diagram.blocks[block_id] = plugin
+        self.first = self.connect(1, 0, 2, 0)
+        self.second = self.connect(1, 0, 3, 1)
+        self.third = self.connect(2, 0, 3, 0)
+
+    def connect(self, source, source_port, sink, sink_port):
+        self.diagram.start_connection(self.diagram.blocks[source],
+                                      source_port)
+        connection = self.diagram.curr_connector
+        self.diagram.end_connection(self.diagram.blocks[sink], sink_port)
+        return connection
+
+    # ----------------------------------------------------------------------
+    def test_connection_indexes(self):
+        blocks = self.diagram.blocks
+        self.assertEqual(self.diagram.connectors,
+                         [self.first, self.second, self.third])
+        self.assertEqual(self.diagram.get_output_connections(blocks[1]),
+                         (self.first, self.second))
+        self.assertEqual(self.diagram.get_input_connections(blocks[3]),
+                         (self.second, self.third))
+        self.assertEqual(self.diagram.get_input_connections(blocks[3], 1),
+                         (self.second,))
+        self.assertEqual(self.diagram.get_output_connections(blocks[2], 0),
+                         (self.third,))
+        self.assertEqual(self.diagram.get_input_connections(blocks[1]), ())
+        self.assertEqual(self.diagram.get_connections(blocks[2]),
+                         [self.third, self.first])
+
+    # ----------------------------------------------------------------------
+    def test_remove_connection(self):
+        blocks = self.diagram.blocks
+        self.assertTrue(self.diagram.remove_connection(self.second))
+        self.assertFalse(self.diagram.remove_connection(self.second))
+        self.assertEqual(self.diagram.connectors, [self.first, self.third])
+        self.assertEqual(self.diagram.get_input_connections(blocks[3], 1), ())
+        self.assertEqual(self.diagram.get_output_connections(blocks[1]),
+                         (self.first,))
+
+    # ----------------------------------------------------------------------
+    def test_connectors_order(self):
+        self.diagram.remove_connection(self.first)
+        self.diagram.add_connection(self.first)
+        self.diagram.add_connection(self.first)
+        self.assertEqual(self.diagram.connectors,
+                         [self.second, self.third, self.first])
+        fourth = self.connect(2, 0, 3, 1)
+        self.assertEqual(self.diagram.connectors,
+                         [self.second, self.third, self.first, fourth])
+
+    # ----------------------------------------------------------------------
+    def test_set_connectors(self):
+        blocks = self.diagram.blocks
+        connectors = [self.third]
+        self.diagram.connectors = connectors
+        self.diagram.add_connection(self.first)
+        self.assertEqual(connectors, [self.third])
+        self.assertEqual(self.diagram.get_output_connections(blocks[1]),
+                         (self.first,))
+        self.assertEqual(self.diagram.get_input_connections(blocks[3]),
+                         (self.third,))
+
+    # ----------------------------------------------------------------------
+    def test_creates_cycle(self):
+        blocks = self.diagram.blocks
+        self.assertTrue(self.diagram.creates_cycle(blocks[3], blocks[1]))
+        self.assertTrue(self.diagram.creates_cycle(blocks[2], blocks[2]))
+        self.assertFalse(self.diagram.creates_cycle(blocks[1], blocks[3]))
+        self.diagram.remove_connection(self.second)
+        self.diagram.remove_connection(self.third)
+        self.assertFalse(self.diagram.creates_cycle(blocks[3], blocks[1]))
+
+    # ----------------------------------------------------------------------
+    def test_creates_cycle_after_cycle(self):
+        # Connections are not checked without GUI, so cycles can be made
+        blocks = self.diagram.blocks
+        self.diagram.connectors = []
+        self.connect(3, 0, 1, 0)
+        cycle = self.connect(1, 0, 3, 0)
+        self.connect(2, 0, 1, 1)
+        self.connect(3, 0, 2, 0)
+        self.diagram.remove_connection(cycle)
+        self.connect(1, 0, 2, 1)
+        self.assertTrue(self.diagram.creates_cycle(blocks[1], blocks[2]))
+        self.assertTrue(self.diagram.creates_cycle(blocks[2], blocks[3]))
+        self.assertFalse(self.diagram.creates_cycle(blocks[3], blocks[1]))
+
+    # ----------------------------------------------------------------------
+    def test_creates_cycle_long_chain(self):
+        # Connections are made backwards, so every one reorders the chain
+        diagram = DiagramModel()
+        for block_id in range(1, 1501):
+            plugin = Plugin()
+            plugin.id = block_id
+            plugin.out_ports = [{"type": "int", "name": "output"}]
+            plugin.in_ports = [{"type": "int", "name": "input"}]
+            diagram.blocks[block_id] = plugin
+        for block_id in range(1499, 0, -1):
+            diagram.start_connection(diagram.blocks[block_id], 0)
+            diagram.end_connection(diagram.blocks[block_id + 1], 0)
+        self.assertTrue(diagram.creates_cycle(diagram.blocks[1500],
+                                              diagram.blocks[1]))
+        self.assertFalse(diagram.creates_cycle(diagram.blocks[1],
+                                               diagram.blocks[1500]))
+
+    # ----------------------------------------------------------------------
+    def test_batch(self):
+        ended = []
+        self.diagram.end_batch = lambda: ended.append(True)
+        with self.diagram.batch("Test"):
+            self.assertTrue(self.diagram.in_batch())
+            with self.diagram.batch():
+                self.diagram.history.add("Add", ("add_block", 1))
+            self.diagram.history.add("Add", ("add_block", 2))
+            self.assertEqual(ended, [])
+        self.assertFalse(self.diagram.in_batch())
+        self.assertEqual(ended, [True])
+        self.assertEqual(len(self.diagram.history.undo_stack), 1)
+        self.assertEqual(self.diagram.history.undo_stack[0][0], "Test")
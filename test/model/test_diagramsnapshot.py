@@ -0,0 +1,63 @@
+from unittest import TestCase
+from mosaicode.model.diagrammodel import DiagramModel
+from mosaicode.model.connectionmodel import ConnectionModel
+from mosaicode.model.diagramsnapshot import DiagramSnapshot
+from mosaicode.model.plugin import Plugin
+
+
+class TestDiagramSnapshot(TestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        self.diagram = DiagramModel()
+        self.diagram.language = "c"
+        for block_id in [1, 2]:
+            plugin = Plugin()
+            plugin.id = block_id
+            plugin.label = "Block"
+            plugin.out_ports = [{"type": "int", "name": "output"}]
+            plugin.in_ports = [{"type": "int", "name": "input"}]
+            plugin.properties = [{"name": "value", "value": block_id}]
+            self.diagram.blocks[block_id] = plugin
+        connection = ConnectionModel(self.diagram,
+                                     self.diagram.blocks[1], 0, "int")
+        connection.sink = self.diagram.blocks[2]
+        connection.sink_port = 0
+        self.diagram.add_connection(connection)
+        self.snapshot = DiagramSnapshot.from_diagram(self.diagram)
+
+    # ----------------------------------------------------------------------
+    def test_from_diagram(self):
+        self.assertEqual(self.snapshot.language, "c")
+        self.assertEqual(len(self.snapshot.blocks), 2)
+        self.assertEqual(self.snapshot.connectors[0].source, 1)
+        self.assertEqual(self.snapshot.connectors[0].sink, 2)
+
+    # ----------------------------------------------------------------------
+    def test_get_block(self):
+        block = DiagramSnapshot.get_block(self.diagram.blocks[1])
+        self.assertEqual(block.properties, (("value", 1),))
+        self.assertEqual(block.in_ports, (("input", "int"),))
+        self.assertIn(("label", "Block"), block.attributes)
+
+    # ----------------------------------------------------------------------
+    def test_get_block_placeholders(self):
+        plugin = self.diagram.blocks[1]
+        plugin.width = 100
+        block = DiagramSnapshot.get_block(plugin)
+        names = [name for name, value in block.attributes]
+        self.assertEqual(names, list(Plugin.PLACEHOLDERS))
+
+    # ----------------------------------------------------------------------
+    def test_connection_slots(self):
+        connection = self.diagram.connectors[0]
+        self.assertFalse(hasattr(connection, "__dict__"))
+
+    # ----------------------------------------------------------------------
+    def test_snapshot_is_a_copy(self):
+        self.diagram.blocks[1].properties[0]["value"] = 10
+        self.assertEqual(self.snapshot.blocks[0].properties, (("value", 1),))
+
+    # ----------------------------------------------------------------------
+    def test_patch_name(self):
+        self.assertEqual(self.snapshot.patch_name, "Untitled")
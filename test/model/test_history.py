@@ -0,0 +1,118 @@
+from unittest import TestCase
+from mosaicode.model.history import History
+
+
+class TestHistory(TestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        self.history = History()
+        self.applied = []
+
+    def apply(self, operation, undo):
+        self.applied.append((operation, undo))
+
+    # ----------------------------------------------------------------------
+    def test_undo_redo(self):
+        self.history.add("Add", ("add_block", 1))
+        self.history.add("Connect", ("connect", 2))
+        self.assertEqual(self.history.undo(self.apply), "Connect")
+        self.assertEqual(self.applied, [(("connect", 2), True)])
+        self.assertEqual(self.history.redo(self.apply), "Connect")
+        self.assertEqual(self.applied[-1], (("connect", 2), False))
+        self.assertEqual(self.history.redo(self.apply), None)
+
+    # ----------------------------------------------------------------------
+    def test_add_clears_redo(self):
+        self.history.add("Add", ("add_block", 1))
+        self.history.undo(self.apply)
+        self.history.add("Add", ("add_block", 2))
+        self.assertEqual(self.history.redo_stack, [])
+
+    # ----------------------------------------------------------------------
+    def test_group(self):
+        self.history.begin("Delete")
+        self.history.add("Delete connection", ("disconnect", 1))
+        self.history.begin("Delete block")
+        self.history.add("Delete block", ("remove_block", 2))
+        self.history.end()
+        self.history.end()
+        self.assertEqual(len(self.history.undo_stack), 1)
+        self.history.undo(self.apply)
+        self.assertEqual(self.applied, [(("remove_block", 2), True),
+                                        (("disconnect", 1), True)])
+
+    # ----------------------------------------------------------------------
+    def test_merge_moves(self):
+        block = object()
+        self.history.add("Move blocks", ("move", block, 10, 0), True)
+        self.history.add("Move blocks", ("move", block, 5, 20), True)
+        self.assertEqual(self.history.undo_stack[-1][1],
+                         [("move", block, 15, 20)])
+        self.history.close()
+        self.history.add("Move blocks", ("move", block, 5, 0), True)
+        self.assertEqual(len(self.history.undo_stack), 2)
+
+    # ----------------------------------------------------------------------
+    def test_apply_is_not_recorded(self):
+        self.history.add("Add", ("add_block", 1))
+
+        def apply(operation, undo):
+            self.history.add("Delete block", ("remove_block", 1))
+        self.history.undo(apply)
+        self.assertEqual(self.history.undo_stack, [])
+        self.assertEqual(len(self.history.redo_stack), 1)
+
+    # ----------------------------------------------------------------------
+    def test_limits(self):
+        self.history.max_entries = 3
+        for count in range(10):
+            self.history.add("Add", ("add_block", count))
+        self.assertEqual(len(self.history.undo_stack), 3)
+        self.assertEqual(self.history.undo_stack[0][1], [("add_block", 7)])
+
+        self.history.clear()
+        self.history.max_entries = 100
+        self.history.max_size = History.get_size(("add_block", "x" * 100)) * 2
+        for count in range(10):
+            self.history.add("Add", ("add_block", "x" * 100))
+        self.assertEqual(len(self.history.undo_stack), 2)
+        self.assertTrue(self.history.size <= self.history.max_size)
+
+    # ----------------------------------------------------------------------
+    def test_saved(self):
+        self.history.add("Add", ("add_block", 1))
+        self.history.set_saved(True)
+        self.history.add("Add", ("add_block", 2))
+        self.assertFalse(self.history.is_saved())
+        self.history.undo(self.apply)
+        self.assertTrue(self.history.is_saved())
+        self.history.undo(self.apply)
+        self.assertFalse(self.history.is_saved())
+        self.history.redo(self.apply)
+        self.assertTrue(self.history.is_saved())
+        # The saved state is lost when its redo entries are replaced
+        self.history.undo(self.apply)
+        self.history.add("Add", ("add_block", 3))
+        self.history.undo(self.apply)
+        self.assertFalse(self.history.is_saved())
+
+    # ----------------------------------------------------------------------
+    def test_saved_trimmed(self):
+        history = History(max_entries=3)
+        history.clear()
+        for block_id in range(5):
+            history.add("Add", ("add_block", block_id))
+        while history.undo(self.apply):
+            self.assertFalse(history.is_saved())
+        self.assertEqual(history.undo_stack, [])
+        self.assertFalse(history.is_saved())
+
+    # ----------------------------------------------------------------------
+    def test_saved_merged(self):
+        block = object()
+        self.history.add("Move blocks", ("move", block, 10, 0), True)
+        self.history.set_saved(True)
+        self.history.add("Move blocks", ("move", block, 5, 0), True)
+        self.history.undo(self.apply)
+        self.assertTrue(self.history.is_saved())
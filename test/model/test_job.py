@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+from mosaicode.model.job import Job
+
+
+class TestJob(TestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        self.job = Job("key", "command", None)
+
+    # ----------------------------------------------------------------------
+    def test_read_lines(self):
+        self.assertEqual(self.job.read("out", "first\nsec"), [u"first"])
+        self.assertEqual(self.job.read("err", "error\n"), [u"error"])
+        self.assertEqual(self.job.read("out", "ond\n\nthi"),
+                         [u"second", u""])
+        self.assertEqual(self.job.read("out", ""), [u"thi"])
+        self.assertEqual(self.job.read("out", ""), [])
+        self.assertEqual(self.job.read("err", ""), [])
+
+    # ----------------------------------------------------------------------
+    def test_read_utf8(self):
+        data = u"árvore\n".encode("utf-8")
+        # A character split between two reads
+        self.assertEqual(self.job.read("out", data[:1]), [])
+        self.assertEqual(self.job.read("out", data[1:]), [u"árvore"])
+        self.assertEqual(self.job.read("out", "\xff\n"), [u"\ufffd"])
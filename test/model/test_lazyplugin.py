@@ -0,0 +1,83 @@
+import os
+import copy
+import shutil
+import tempfile
+import cPickle as pickle
+from unittest import TestCase
+from mosaicode.model.diagrammodel import DiagramModel
+from mosaicode.model.plugin import Plugin
+from mosaicode.model.lazyplugin import LazyPlugin
+from mosaicode.persistence.blockpersistence import BlockPersistence
+from mosaicode.utils.XMLUtils import XMLParser
+
+
+class TestLazyPlugin(TestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, "plugin.xml")
+        parser = XMLParser()
+        parser.addTag("MosaicodePlugin", type="test.plugin", language="c",
+                      framework="base", label="Test", group="Tests",
+                      color="1:2:3:4", help="Some help", source="xml")
+        for count in range(5):
+            parser.appendToTag("MosaicodePlugin",
+                               "code" + str(count)).setText("code" + str(count))
+        parser.appendToTag("MosaicodePlugin", "properties")
+        parser.appendToTag("properties", "property",
+                           value={"name": "value", "value": 1})
+        parser.appendToTag("MosaicodePlugin", "in_ports")
+        parser.appendToTag("MosaicodePlugin", "out_ports")
+        parser.appendToTag("out_ports", "port",
+                           value={"name": "output", "type": "test.port"})
+        xml_file = open(self.file_name, "w")
+        xml_file.write(parser.prettify())
+        xml_file.close()
+        root = XMLParser.getRootTag(self.file_name)
+        self.plugin = BlockPersistence.load_lazy(self.file_name, root)
+
+    # ----------------------------------------------------------------------
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    # ----------------------------------------------------------------------
+    def test_metadata(self):
+        self.assertEqual(self.plugin.type, "test.plugin")
+        self.assertEqual(self.plugin.label, "Test")
+        self.assertEqual(self.plugin.group, "Tests")
+        self.assertFalse(self.plugin.is_loaded())
+        # Pickled plugins are not loaded
+        plugin = pickle.loads(pickle.dumps(self.plugin, 2))
+        self.assertFalse(plugin.is_loaded())
+
+    # ----------------------------------------------------------------------
+    def test_missing_file(self):
+        os.remove(self.file_name)
+        self.assertFalse(self.plugin.is_usable())
+        self.assertTrue(self.plugin.error is not None)
+        self.assertEqual(self.plugin.codes, ("", "", "", "", ""))
+        diagram = DiagramModel()
+        self.assertFalse(diagram.add_block(self.plugin))
+        self.assertEqual(diagram.blocks, {})
+
+    # ----------------------------------------------------------------------
+    def test_load_on_demand(self):
+        self.assertEqual(self.plugin.codes[3], "code3")
+        self.assertTrue(self.plugin.is_loaded())
+        self.assertEqual(self.plugin.help, "Some help")
+        self.assertTrue(self.plugin.is_usable())
+        self.assertEqual(self.plugin.get_properties()[0]["value"], 1)
+        self.assertEqual(self.plugin.in_ports, ())
+        self.assertEqual(self.plugin.out_ports[0]["type"], "test.port")
+        self.assertRaises(AttributeError, getattr, self.plugin, "missing")
+
+    # ----------------------------------------------------------------------
+    def test_copy(self):
+        block = copy.deepcopy(self.plugin)
+        self.assertEqual(type(block), Plugin)
+        self.assertEqual(block.codes[1], "code1")
+        block.properties[0]["value"] = 2
+        self.assertEqual(self.plugin.properties[0]["value"], 1)
+        self.assertEqual(Plugin(self.plugin).label, "Test")
+        self.assertTrue(Plugin(self.plugin).codes is self.plugin.codes)
@@ -1,3 +1,4 @@
+import operator
 from unittest import TestCase
 from mosaicode.model.plugin import Plugin
 
@@ -101,3 +102,37 @@ class TestPlugin(TestCase):
     # ----------------------------------------------------------------------x
     def test_generate_out_dealloc(self):
         self.plugin.generate_out_dealloc()
+
+
+class TestPluginCopy(TestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        self.plugin = Plugin()
+        self.plugin.codes = ["header", "code", "", "", ""]
+        self.plugin.in_ports = [{"type": "int", "name": "input"}]
+        self.plugin.properties = [{"name": "value", "type": "int",
+                                   "value": 1}]
+        self.copy = Plugin(self.plugin)
+
+    # ----------------------------------------------------------------------
+    def test_shared_definitions(self):
+        self.assertEqual(self.copy.codes, ("header", "code", "", "", ""))
+        block = Plugin(self.copy)
+        self.assertTrue(block.codes is self.copy.codes)
+        self.assertTrue(block.in_ports is self.copy.in_ports)
+
+    # ----------------------------------------------------------------------
+    def test_frozen_definitions(self):
+        self.assertRaises(TypeError, operator.setitem,
+                          self.copy.codes, 0, "")
+        self.assertRaises(AttributeError, getattr, self.copy.in_ports,
+                          "append")
+        self.plugin.codes[0] = "changed"
+        self.assertEqual(self.copy.codes[0], "header")
+
+    # ----------------------------------------------------------------------
+    def test_own_property_values(self):
+        self.copy.set_properties({"value": 2})
+        self.assertEqual(self.plugin.properties[0]["value"], 1)
+        self.assertEqual(self.copy.properties[0]["value"], 2)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from mosaicode.persistence import compactdiagrampersistence as compact
+from mosaicode.persistence.compactdiagrampersistence import CompactDiagramPersistence
+from mosaicode.persistence.diagrampersistence import DiagramPersistence
+
+
+class TestCompactDiagramPersistence(TestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        self.directory = tempfile.mkdtemp()
+        self.records = [
+                ("version", "0.0.1"),
+                ("zoom", 1.5),
+                ("language", "c"),
+                ("block", "test.plugin", 1, 10.0, 20.0,
+                 (("size", "3"), ("label", u"árvore"))),
+                ("block", "test.plugin", 2, 100.0, 20.0, (("size", "3"),)),
+                ("connection", 1, 0, 2, 1)]
+
+    # ----------------------------------------------------------------------
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    # ----------------------------------------------------------------------
+    def test_write_read(self):
+        file_name = os.path.join(self.directory, "test.mscdb")
+        CompactDiagramPersistence.write(file_name, self.records)
+        self.assertTrue(CompactDiagramPersistence.is_compact(file_name))
+        records = list(CompactDiagramPersistence.read(file_name))
+        self.assertEqual(records, self.records)
+
+    # ----------------------------------------------------------------------
+    def test_is_compact(self):
+        file_name = os.path.join(self.directory, "test.mscd")
+        DiagramPersistence.write(file_name, self.records)
+        self.assertFalse(CompactDiagramPersistence.is_compact(file_name))
+        self.assertFalse(CompactDiagramPersistence.is_compact(
+                file_name + "x"))
+        self.assertRaises(ValueError, list,
+                          CompactDiagramPersistence.read(file_name))
+
+    # ----------------------------------------------------------------------
+    def test_convert(self):
+        xml_name = os.path.join(self.directory, "test.mscd")
+        compact_name = os.path.join(self.directory, "test.mscdb")
+        other_name = os.path.join(self.directory, "other.mscd")
+        DiagramPersistence.write(xml_name, self.records)
+        self.assertEqual(DiagramPersistence.convert(xml_name, compact_name),
+                         (True, "Success"))
+        self.assertEqual(list(DiagramPersistence.read(compact_name)),
+                         self.records)
+        DiagramPersistence.convert(compact_name, other_name)
+        self.assertEqual(open(other_name).read(), open(xml_name).read())
+        self.assertFalse(DiagramPersistence.convert(other_name + "x",
+                                                    compact_name)[0])
+
+    # ----------------------------------------------------------------------
+    def test_truncated(self):
+        data = CompactDiagramPersistence.encode(self.records)
+        for size in [len(data) - 5, 20, 8]:
+            self.assertRaises(ValueError, list,
+                              CompactDiagramPersistence.decode(data[:size]))
+        compact_name = os.path.join(self.directory, "test.mscdb")
+        with open(compact_name, "wb") as compact_file:
+            compact_file.write(data[:-5])
+        result, message = DiagramPersistence.convert(
+                compact_name, os.path.join(self.directory, "test.mscd"))
+        self.assertFalse(result)
+        self.assertTrue(message.endswith("is truncated or corrupt"))
+
+    # ----------------------------------------------------------------------
+    def test_bad_string_index(self):
+        data = compact.MAGIC + compact.HEADER.pack(1) + \
+            compact.COUNT.pack(0) + compact.KIND.pack(compact.BLOCK) + \
+            compact.BLOCK_STRUCT.pack(5, 1, 0.0, 0.0, 0) + \
+            compact.KIND.pack(compact.END)
+        self.assertRaises(ValueError, list,
+                          CompactDiagramPersistence.decode(data))
@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from mosaicode.model.diagrammodel import DiagramModel
+from mosaicode.persistence.diagrampersistence import DiagramPersistence
+
+
+class TestDiagramPersistence(TestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, "test.mscd")
+        self.records = [
+                ("zoom", 1.0),
+                ("block", "test.plugin", 1, 10.0, 20.0, (("size", "3"),)),
+                ("block", "test.plugin", 2, 100.0, 20.0, ()),
+                ("connection", 1, 0, 2, 0)]
+
+    # ----------------------------------------------------------------------
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    # ----------------------------------------------------------------------
+    def test_write_read(self):
+        DiagramPersistence.write(self.file_name, self.records)
+        self.assertEqual(list(DiagramPersistence.read(self.file_name)),
+                         self.records)
+        self.assertEqual(os.listdir(self.directory), ["test.mscd"])
+
+    # ----------------------------------------------------------------------
+    def test_write_empty(self):
+        DiagramPersistence.write(self.file_name, [])
+        content = open(self.file_name).read()
+        self.assertIn("<blocks/>", content)
+        self.assertIn("<connections/>", content)
+
+    # ----------------------------------------------------------------------
+    def test_write_error(self):
+        DiagramPersistence.write(self.file_name, self.records)
+        content = open(self.file_name).read()
+        records = self.records + [("connection", 1, None, 2, 0)]
+        for file_name in [self.file_name, self.file_name + "b"]:
+            self.assertRaises(TypeError, DiagramPersistence.write,
+                              file_name, records)
+        # The old file is kept and no temporary file is left
+        self.assertEqual(open(self.file_name).read(), content)
+        self.assertEqual(os.listdir(self.directory), ["test.mscd"])
+
+    # ----------------------------------------------------------------------
+    def test_save_on_directory(self):
+        # Only the rename fails, with OSError
+        os.mkdir(self.file_name)
+        diagram = DiagramModel()
+        diagram.file_name = self.file_name
+        diagram.set_modified(True)
+        result, message = DiagramPersistence.save(diagram)
+        self.assertFalse(result)
+        self.assertTrue(diagram.modified)
+        DiagramPersistence.write(self.file_name + "b", self.records)
+        self.assertFalse(DiagramPersistence.convert(self.file_name + "b",
+                                                    self.file_name)[0])
+        self.assertTrue(os.path.isdir(self.file_name))
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         ["test.mscd", "test.mscdb"])
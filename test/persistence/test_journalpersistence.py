@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from mosaicode.persistence.journalpersistence import JournalPersistence
+
+
+class TestJournalPersistence(TestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, "1.journal")
+
+    # ----------------------------------------------------------------------
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    # ----------------------------------------------------------------------
+    def test_append_load(self):
+        JournalPersistence.append(self.file_name, "a", "a.mscd", "old", 1.0)
+        JournalPersistence.append(self.file_name, "b", u"b\xe1.mscd", "b", 2.0)
+        JournalPersistence.append(self.file_name, "a", "a.mscd", "new", 3.0)
+        JournalPersistence.append(self.file_name, "c", "c.mscd", "c", 4.0)
+        JournalPersistence.remove(self.file_name, "c")
+        self.assertEqual(JournalPersistence.load(self.file_name),
+                         [("b", 2.0, u"b\xe1.mscd", "b"),
+                          ("a", 3.0, "a.mscd", "new")])
+
+    # ----------------------------------------------------------------------
+    def test_cut_entry(self):
+        JournalPersistence.append(self.file_name, "a", "a.mscd", "data", 1.0)
+        JournalPersistence.append(self.file_name, "a", "a.mscd", "more", 2.0)
+        size = os.path.getsize(self.file_name)
+        journal = open(self.file_name, "r+b")
+        journal.truncate(size - 2)
+        journal.close()
+        self.assertEqual(JournalPersistence.load(self.file_name),
+                         [("a", 1.0, "a.mscd", "data")])
+
+    # ----------------------------------------------------------------------
+    def test_compact(self):
+        for index in range(10):
+            JournalPersistence.append(self.file_name, "a", "a.mscd",
+                                      "data%d" % index, index)
+        entries = JournalPersistence.load(self.file_name)
+        size = os.path.getsize(self.file_name)
+        JournalPersistence.compact(self.file_name)
+        self.assertTrue(os.path.getsize(self.file_name) < size)
+        self.assertEqual(JournalPersistence.load(self.file_name), entries)
+        JournalPersistence.remove(self.file_name, "a")
+        JournalPersistence.compact(self.file_name)
+        self.assertFalse(os.path.exists(self.file_name))
+
+    # ----------------------------------------------------------------------
+    def test_set_aside(self):
+        home = os.environ.get("HOME")
+        os.environ["HOME"] = self.directory
+        try:
+            own = JournalPersistence.get_file_name()
+            JournalPersistence.append(own, "a", "a.mscd", "data", 1.0)
+            # A journal with the pid of this process was left by another
+            self.assertEqual(JournalPersistence.get_orphans(), [own])
+            kept = JournalPersistence.set_aside(own)
+            self.assertFalse(os.path.exists(own))
+            self.assertEqual(JournalPersistence.get_orphans(), [kept])
+            self.assertEqual(JournalPersistence.load(kept),
+                             [("a", 1.0, "a.mscd", "data")])
+        finally:
+            os.environ["HOME"] = home
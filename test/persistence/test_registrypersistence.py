@@ -0,0 +1,44 @@
+import os
+import shutil
+import tempfile
+import cPickle as pickle
+from unittest import TestCase
+from mosaicode.model.port import Port
+from mosaicode.persistence.registrypersistence import RegistryPersistence
+
+
+class TestRegistryPersistence(TestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, "registry.cache")
+
+    # ----------------------------------------------------------------------
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    # ----------------------------------------------------------------------
+    def test_save_load(self):
+        port = Port()
+        port.type = "test.port"
+        entries = {"a.xml": ((1.0, 10), "MosaicodePort", port),
+                   "b.xml": ((2.0, 20), "other", None)}
+        self.assertTrue(RegistryPersistence.save(entries, self.file_name))
+        loaded = RegistryPersistence.load(self.file_name)
+        self.assertEqual(sorted(loaded), ["a.xml", "b.xml"])
+        self.assertEqual(loaded["a.xml"][2].type, "test.port")
+        self.assertEqual(loaded["b.xml"], ((2.0, 20), "other", None))
+
+    # ----------------------------------------------------------------------
+    def test_load_other_version(self):
+        registry_file = open(self.file_name, "wb")
+        pickle.dump(((0, "0"), {"a.xml": None}), registry_file)
+        registry_file.close()
+        self.assertEqual(RegistryPersistence.load(self.file_name), {})
+        self.assertEqual(RegistryPersistence.load(self.file_name + "x"), {})
+
+    # ----------------------------------------------------------------------
+    def test_get_key(self):
+        open(self.file_name, "w").write("12345")
+        self.assertEqual(RegistryPersistence.get_key(self.file_name)[1], 5)
@@ -19,3 +19,8 @@ class TestSystem(TestCase):
 
     def test_log(self):
         System.log("Hello World")
+
+    def test_load_times(self):
+        self.assertEqual(System.load_times[-1][0], "total")
+        for package, count, elapsed in System.load_times:
+            self.assertTrue(elapsed >= 0)
@@ -0,0 +1,28 @@
+from unittest import TestCase
+from mosaicode.utils.GeometryUtils import get_path, get_paths
+
+
+class TestGeometryUtils(TestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        self.near = ((100.0, 50.0), (120.0, 150.0))
+        self.far = ((100.0, 50.0), (300.0, 150.0))
+
+    # ----------------------------------------------------------------------
+    def test_get_path(self):
+        self.assertEqual(get_path(*self.near),
+                         "M 100.0 50.0 L 125.0 50.0 L 125.0 100.0"
+                         " L 110.0 100.0 L 95.0 100.0 L 95.0 150.0"
+                         " L 120.0 150.0 L 116.0 146.0 L 116.0 154.0"
+                         " L 120.0 150.0")
+        self.assertEqual(get_path(*self.far),
+                         "M 100.0 50.0 L 125.0 50.0 L 125.0 100.0"
+                         " L 125.0 150.0 L 275.0 150.0 L 300.0 150.0"
+                         " L 296.0 146.0 L 296.0 154.0 L 300.0 150.0")
+
+    # ----------------------------------------------------------------------
+    def test_get_paths(self):
+        self.assertEqual(get_paths([self.near, self.far]),
+                         [get_path(*self.near), get_path(*self.far)])
+        self.assertEqual(get_paths([]), [])
@@ -0,0 +1,55 @@
+import random
+from unittest import TestCase
+from mosaicode.utils.SpatialUtils import SpatialIndex
+
+
+class TestSpatialIndex(TestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        self.index = SpatialIndex(cell_size=100)
+        self.index.update("a", (10, 10, 50, 50))
+        self.index.update("b", (90, 90, 250, 120))
+        self.index.update("c", (-300, -300, -200, -200))
+
+    # ----------------------------------------------------------------------
+    def test_query(self):
+        self.assertEqual(self.index.query((0, 0, 100, 100)),
+                         set(["a", "b"]))
+        self.assertEqual(self.index.query((0, 0, 100, 100), True),
+                         set(["a"]))
+        self.assertEqual(self.index.query((-250, -250, -260, -260)),
+                         set(["c"]))
+        self.assertEqual(self.index.query((500, 500, 600, 600)), set())
+
+    # ----------------------------------------------------------------------
+    def test_update_and_remove(self):
+        self.index.update("a", (510, 510, 520, 520))
+        self.assertEqual(self.index.query((0, 0, 100, 100)), set(["b"]))
+        self.assertEqual(self.index.query((500, 500, 600, 600)), set(["a"]))
+        self.index.remove("a")
+        self.index.remove("a")
+        self.assertFalse("a" in self.index)
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.index.query((500, 500, 600, 600)), set())
+
+    # ----------------------------------------------------------------------
+    def test_query_like_scan(self):
+        random.seed(1)
+        boxes = {}
+        for item in range(300):
+            x = random.uniform(-1000, 1000)
+            y = random.uniform(-1000, 1000)
+            boxes[item] = (x, y, x + random.uniform(0, 300),
+                           y + random.uniform(0, 300))
+            self.index.update(item, boxes[item])
+        for count in range(50):
+            x = random.uniform(-1000, 1000)
+            y = random.uniform(-1000, 1000)
+            area = (x, y, x + random.uniform(0, 1500),
+                    y + random.uniform(0, 1500))
+            expected = set(item for item, box in boxes.items()
+                           if box[0] >= area[0] and box[1] >= area[1] and
+                           box[2] <= area[2] and box[3] <= area[3])
+            self.assertEqual(self.index.query(area, True) - set("abc"),
+                             expected)
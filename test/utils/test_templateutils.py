@@ -0,0 +1,30 @@
+from unittest import TestCase
+from mosaicode.utils.TemplateUtils import TemplateParser
+
+
+class TestTemplateParser(TestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        self.template = TemplateParser(
+                "int $label$ = $prop[value]$ + $id$; // $ $unknown$ $id$")
+
+    # ----------------------------------------------------------------------
+    def test_keys(self):
+        self.assertEqual(self.template.keys,
+                         set(["label", "id", "prop[value]", "unknown"]))
+
+    # ----------------------------------------------------------------------
+    def test_render(self):
+        code = self.template.render(
+                {"label": "x", "id": "1", "prop[value]": "10"})
+        self.assertEqual(code, "int x = 10 + 1; // $ $unknown$ 1")
+
+    # ----------------------------------------------------------------------
+    def test_render_without_placeholders(self):
+        self.assertEqual(TemplateParser("a = b;").render({}), "a = b;")
+
+    # ----------------------------------------------------------------------
+    def test_render_like_replace(self):
+        template = TemplateParser("$a$id$b$")
+        self.assertEqual(template.render({"id": "1"}), "$a1b$")
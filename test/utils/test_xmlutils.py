@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+from StringIO import StringIO
+from unittest import TestCase
+from mosaicode.utils import XMLUtils
+from mosaicode.utils.XMLUtils import XMLParser
+from mosaicode.utils.XMLUtils import XMLWriter
+
+
+class ElementTreeRecorder(object):
+    """Keeps the root element read by iterparse."""
+
+    def __init__(self, module):
+        self.module = module
+        self.root = None
+
+    def iterparse(self, source, events=("end",), **options):
+        for event, element in self.module.iterparse(source, events,
+                                                    **options):
+            if self.root is None:
+                self.root = element
+            yield event, element
+
+
+class TestXMLParser(TestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        self.parser = XMLParser()
+        self.parser.addTag("mosaicode")
+        self.parser.appendToTag("mosaicode", "zoom", value=1.5)
+        self.parser.appendToTag("mosaicode", "language", value=None)
+        self.parser.appendToTag("mosaicode", "blocks")
+        for block_id in range(1, 4):
+            self.parser.appendToTag("blocks", "block", id=block_id)
+            self.parser.appendToLastTag("block", "property", key="k",
+                                        value=block_id * 10)
+        self.parser.appendToTag("mosaicode", "code").setText(
+                " a < b && c\n  $id$\n")
+
+    # ----------------------------------------------------------------------
+    def test_get_tags(self):
+        blocks = self.parser.getTag("mosaicode").getChildTags("block")
+        self.assertEqual([block.getAttr("id") for block in blocks],
+                         ["1", "2", "3"])
+        self.assertEqual(blocks[1].getTag("property").value, "20")
+        self.assertEqual(self.parser.getTagAttr("zoom", "value"), "1.5")
+        self.assertIsNone(self.parser.getTag("connections"))
+        self.assertRaises(KeyError, self.parser.getTagAttr,
+                          "language", "value")
+
+    # ----------------------------------------------------------------------
+    def test_prettify(self):
+        parser = XMLParser(self.parser.prettify(), fromString=True)
+        self.assertEqual(parser.getTag("code").getText(),
+                         " a < b && c\n  $id$\n")
+        self.assertEqual(len(parser.getChildTags("property")), 3)
+        self.assertTrue(self.parser.prettify().startswith("<?xml"))
+
+    # ----------------------------------------------------------------------
+    def test_iter_tags(self):
+        directory = tempfile.mkdtemp()
+        try:
+            file_name = os.path.join(directory, "diagram.mscd")
+            xml_file = open(file_name, "w")
+            xml_file.write(self.parser.prettify())
+            xml_file.close()
+            names = []
+            for tag in XMLParser.iterTags(file_name, ("zoom", "block")):
+                names.append(tag.getName())
+                if tag.getName() == "block":
+                    self.assertEqual(len(tag.getChildTags("property")), 1)
+            self.assertEqual(names, ["zoom", "block", "block", "block"])
+        finally:
+            shutil.rmtree(directory)
+
+    # ----------------------------------------------------------------------
+    def test_iter_tags_detach(self):
+        directory = tempfile.mkdtemp()
+        recorder = ElementTreeRecorder(XMLUtils.ElementTree)
+        XMLUtils.ElementTree = recorder
+        try:
+            file_name = os.path.join(directory, "diagram.mscd")
+            xml_file = open(file_name, "w")
+            xml_file.write(self.parser.prettify())
+            xml_file.close()
+            for tag in XMLParser.iterTags(file_name, ("block",)):
+                # The blocks read before were removed from the document
+                first = recorder.root.find("blocks/block")
+                self.assertEqual(first.get("id"), tag.getAttr("id"))
+            self.assertEqual(len(recorder.root), 0)
+        finally:
+            XMLUtils.ElementTree = recorder.module
+            shutil.rmtree(directory)
+
+
+class TestXMLWriter(TestCase):
+
+    def setUp(self):
+        """Do the test basic setup."""
+        self.output = StringIO()
+        self.writer = XMLWriter(self.output)
+
+    # ----------------------------------------------------------------------
+    def test_same_as_prettify(self):
+        parser = XMLParser()
+        parser.addTag("mosaicode")
+        parser.appendToTag("mosaicode", "zoom", value=1.5)
+        parser.appendToTag("mosaicode", "language", value=None)
+        parser.appendToTag("mosaicode", "blocks")
+        parser.appendToTag("mosaicode", "connections")
+        parser.appendToTag("connections", "connection", label=u'"\xe1"\n')
+
+        self.writer.start("mosaicode")
+        self.writer.element("zoom", value=1.5)
+        self.writer.element("language", value=None)
+        self.writer.start("blocks")
+        self.writer.end()
+        self.writer.start("connections")
+        self.writer.element("connection", label=u'"\xe1"\n')
+        self.writer.close()
+        self.assertEqual(self.output.getvalue(), parser.prettify())